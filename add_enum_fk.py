@@ -1,18 +1,41 @@
 """
 Script temporal para agregar la columna enum_id a field_definitions
+
+En PostgreSQL se hace en dos pasos para no bloquear la tabla mientras se
+valida la FK:
+1. ADD COLUMN + ADD CONSTRAINT ... NOT VALID (lock breve, con lock_timeout)
+2. VALIDATE CONSTRAINT en otra transacción (SHARE UPDATE EXCLUSIVE: permite
+   lecturas y escrituras mientras recorre la tabla)
 """
 from app.database import engine
 from sqlalchemy import text
 
-# Add enum_id column to field_definitions
 with engine.connect() as conn:
     try:
-        conn.execute(text("""
-            ALTER TABLE field_definitions
-            ADD COLUMN enum_id INTEGER
-            REFERENCES enum_definitions(id)
-        """))
-        conn.commit()
+        if conn.dialect.name == "postgresql":
+            # Paso 1: cambios de catálogo, fallar rápido si la tabla está ocupada
+            conn.execute(text("SET LOCAL lock_timeout = '2s'"))
+            conn.execute(text("SET LOCAL statement_timeout = 0"))
+            conn.execute(text("ALTER TABLE field_definitions ADD COLUMN enum_id INTEGER"))
+            conn.execute(text("""
+                ALTER TABLE field_definitions
+                ADD CONSTRAINT fk_field_def_enum
+                FOREIGN KEY (enum_id) REFERENCES enum_definitions(id) NOT VALID
+            """))
+            conn.commit()
+
+            # Paso 2: validar filas existentes sin bloquear lecturas/escrituras
+            conn.execute(text("SET LOCAL statement_timeout = 0"))
+            conn.execute(text("ALTER TABLE field_definitions VALIDATE CONSTRAINT fk_field_def_enum"))
+            conn.commit()
+        else:
+            conn.execute(text("""
+                ALTER TABLE field_definitions
+                ADD COLUMN enum_id INTEGER
+                REFERENCES enum_definitions(id)
+            """))
+            conn.commit()
         print("Columna enum_id agregada exitosamente!")
     except Exception as e:
+        conn.rollback()
         print(f"Error o la columna ya existe: {e}")
@@ -0,0 +1,41 @@
+"""api_metrics time/endpoint covering index
+
+Índice compuesto (timestamp, path, method, status_code) con INCLUDE
+(duration_ms) en PostgreSQL para las agregaciones por ventana de tiempo
+agrupadas por endpoint (index-only scan). En SQLite se crea sin INCLUDE.
+Se elimina ix_api_metrics_method: ninguna consulta filtra solo por método.
+
+Revision ID: 1a185086b200
+Revises: c249806e8a43
+Create Date: 2026-10-15 12:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1a185086b200'
+down_revision: Union[str, Sequence[str], None] = 'c249806e8a43'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_metric_time_endpoint',
+        'api_metrics',
+        ['timestamp', 'path', 'method', 'status_code'],
+        unique=False,
+        postgresql_include=['duration_ms'],
+    )
+    op.drop_index(op.f('ix_api_metrics_method'), table_name='api_metrics')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('ix_api_metrics_method'), 'api_metrics', ['method'], unique=False)
+    op.drop_index('ix_metric_time_endpoint', table_name='api_metrics')
@@ -0,0 +1,61 @@
+"""media embedding partial hnsw indexes
+
+Índices HNSW parciales sobre media.embedding para los filtros habituales de
+búsqueda semántica, de modo que el planner pueda usar HNSW también cuando el
+predicado es selectivo (en lugar de ANN global + post-filtro):
+
+- idx_media_embedding_hnsw_live:   WHERE deleted_at IS NULL
+- idx_media_embedding_hnsw_public: WHERE is_public AND deleted_at IS NULL
+
+Además agrega ix_media_is_public (B-Tree) para el plan
+"attribute index scan + kNN exacto" cuando el filtro es muy selectivo.
+organization_id y user_id ya tienen B-Tree desde el baseline.
+
+Revision ID: 3ebc5b49849d
+Revises: 4436bf91c6bf
+Create Date: 2026-10-15 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3ebc5b49849d'
+down_revision: Union[str, Sequence[str], None] = '4436bf91c6bf'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTIAL_HNSW_INDEXES = {
+    "idx_media_embedding_hnsw_live": "deleted_at IS NULL",
+    "idx_media_embedding_hnsw_public": "is_public AND deleted_at IS NULL",
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_media_is_public'), 'media', ['is_public'], unique=False)
+
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    with op.get_context().autocommit_block():
+        for name, predicate in PARTIAL_HNSW_INDEXES.items():
+            op.execute(f"""
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS {name}
+                ON media USING hnsw (embedding halfvec_l2_ops)
+                WITH (m = 16, ef_construction = 64)
+                WHERE {predicate}
+            """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name in PARTIAL_HNSW_INDEXES:
+                op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+    op.drop_index(op.f('ix_media_is_public'), table_name='media')
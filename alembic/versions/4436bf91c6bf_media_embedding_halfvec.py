@@ -0,0 +1,64 @@
+"""media embedding halfvec
+
+Convierte media.embedding de vector(512) (FP32, 2 KB/fila) a halfvec(512)
+(FP16, 1 KB/fila) y reconstruye el índice HNSW con halfvec_l2_ops.
+Requiere pgvector >= 0.7 en el servidor. Solo PostgreSQL.
+
+Revision ID: 4436bf91c6bf
+Revises: d00e359e3826
+Create Date: 2026-10-15 10:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4436bf91c6bf'
+down_revision: Union[str, Sequence[str], None] = 'd00e359e3826'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+HNSW_INDEX_SQL = """
+    CREATE INDEX {concurrently} IF NOT EXISTS idx_media_embedding_hnsw
+    ON media USING hnsw (embedding {opclass})
+    WITH (m = 16, ef_construction = 64)
+"""
+
+
+def _rebuild_hnsw(column_type: str, opclass: str) -> None:
+    """Cambia el tipo de la columna y reconstruye el índice HNSW."""
+    bind = op.get_bind()
+    op.execute("DROP INDEX IF EXISTS idx_media_embedding_hnsw")
+    op.execute(
+        f"ALTER TABLE media ALTER COLUMN embedding TYPE {column_type} "
+        f"USING embedding::{column_type}"
+    )
+
+    has_rows = bind.execute(sa.text("SELECT EXISTS (SELECT 1 FROM media)")).scalar()
+    if not has_rows:
+        op.execute(HNSW_INDEX_SQL.format(concurrently="", opclass=opclass))
+        return
+
+    with op.get_context().autocommit_block():
+        op.execute("SET maintenance_work_mem = '2GB'")
+        op.execute("SET max_parallel_maintenance_workers = 7")
+        op.execute(HNSW_INDEX_SQL.format(concurrently="CONCURRENTLY", opclass=opclass))
+        op.execute("RESET max_parallel_maintenance_workers")
+        op.execute("RESET maintenance_work_mem")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    _rebuild_hnsw("halfvec(512)", "halfvec_l2_ops")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    _rebuild_hnsw("vector(512)", "vector_l2_ops")
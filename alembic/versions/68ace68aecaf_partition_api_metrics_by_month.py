@@ -0,0 +1,155 @@
+"""partition api_metrics by month
+
+Convierte api_metrics en una tabla particionada por RANGE (timestamp) con
+particiones mensuales api_metrics_yYYYYmMM (solo PostgreSQL; en SQLite no hay
+particionado y la migración no hace nada).
+
+- La PK pasa a (id, timestamp): Postgres exige que la clave de partición
+  forme parte de toda restricción única.
+- Se crean particiones desde el mes del registro más antiguo hasta dos meses
+  adelante, más una partición DEFAULT de resguardo. Las siguientes las crea
+  MetricsService.ensure_partitions() en el arranque de la app y en el cron
+  diario maintain_metrics_partitions del worker, que además aplica
+  METRICS_RETENTION_MONTHS.
+- Los datos existentes se copian a la nueva tabla: en tablas grandes conviene
+  correr la migración en una ventana de mantenimiento.
+- Los índices se declaran en la tabla padre y Postgres los propaga a cada
+  partición.
+
+Revision ID: 68ace68aecaf
+Revises: 1a185086b200
+Create Date: 2026-10-15 13:00:00.000000
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '68ace68aecaf'
+down_revision: Union[str, Sequence[str], None] = '1a185086b200'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = (
+    "id, method, path, status_code, duration_ms, client_ip, user_agent, "
+    "user_id, error_type, error_message, timestamp"
+)
+
+INDEXES_SQL = [
+    "CREATE INDEX ix_api_metrics_path ON api_metrics (path)",
+    "CREATE INDEX ix_api_metrics_status_code ON api_metrics (status_code)",
+    "CREATE INDEX ix_api_metrics_timestamp ON api_metrics (timestamp)",
+    "CREATE INDEX ix_api_metrics_user_id ON api_metrics (user_id)",
+    "CREATE INDEX ix_metric_time_endpoint ON api_metrics "
+    "(timestamp, path, method, status_code) INCLUDE (duration_ms)",
+]
+
+DROP_INDEXES_SQL = [
+    "DROP INDEX IF EXISTS ix_api_metrics_path",
+    "DROP INDEX IF EXISTS ix_api_metrics_status_code",
+    "DROP INDEX IF EXISTS ix_api_metrics_timestamp",
+    "DROP INDEX IF EXISTS ix_api_metrics_user_id",
+    "DROP INDEX IF EXISTS ix_metric_time_endpoint",
+]
+
+
+def _add_months(d: date, months: int) -> date:
+    total = d.year * 12 + (d.month - 1) + months
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    oldest = bind.execute(sa.text("SELECT MIN(timestamp) FROM api_metrics")).scalar()
+    current = date.today().replace(day=1)
+    start = oldest.date().replace(day=1) if oldest else current
+
+    op.execute("ALTER TABLE api_metrics RENAME TO api_metrics_old")
+    for stmt in DROP_INDEXES_SQL:
+        op.execute(stmt)
+
+    op.execute("""
+        CREATE TABLE api_metrics (
+            id SERIAL,
+            method VARCHAR NOT NULL,
+            path VARCHAR NOT NULL,
+            status_code INTEGER NOT NULL,
+            duration_ms FLOAT NOT NULL,
+            client_ip VARCHAR,
+            user_agent VARCHAR(500),
+            user_id INTEGER,
+            error_type VARCHAR,
+            error_message VARCHAR(1000),
+            timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+    """)
+
+    month = start
+    end = _add_months(current, 3)
+    while month < end:
+        upper = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE api_metrics_y{month.year}m{month.month:02d} "
+            f"PARTITION OF api_metrics FOR VALUES FROM ('{month}') TO ('{upper}')"
+        )
+        month = upper
+    op.execute("CREATE TABLE api_metrics_default PARTITION OF api_metrics DEFAULT")
+
+    for stmt in INDEXES_SQL:
+        op.execute(stmt)
+
+    op.execute(f"INSERT INTO api_metrics ({COLUMNS}) SELECT {COLUMNS} FROM api_metrics_old")
+    op.execute(
+        "SELECT setval(pg_get_serial_sequence('api_metrics', 'id'), "
+        "COALESCE((SELECT MAX(id) FROM api_metrics), 0) + 1, false)"
+    )
+    op.execute("DROP TABLE api_metrics_old")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    op.execute("ALTER TABLE api_metrics RENAME TO api_metrics_partitioned")
+    for stmt in DROP_INDEXES_SQL:
+        op.execute(stmt)
+
+    op.execute("""
+        CREATE TABLE api_metrics (
+            id SERIAL PRIMARY KEY,
+            method VARCHAR NOT NULL,
+            path VARCHAR NOT NULL,
+            status_code INTEGER NOT NULL,
+            duration_ms FLOAT NOT NULL,
+            client_ip VARCHAR,
+            user_agent VARCHAR(500),
+            user_id INTEGER,
+            error_type VARCHAR,
+            error_message VARCHAR(1000),
+            timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL
+        )
+    """)
+    op.execute(
+        f"INSERT INTO api_metrics ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM api_metrics_partitioned"
+    )
+    op.execute(
+        "SELECT setval(pg_get_serial_sequence('api_metrics', 'id'), "
+        "COALESCE((SELECT MAX(id) FROM api_metrics), 0) + 1, false)"
+    )
+    # DROP de la tabla padre elimina también todas sus particiones
+    op.execute("DROP TABLE api_metrics_partitioned")
+
+    for stmt in INDEXES_SQL:
+        op.execute(stmt)
@@ -0,0 +1,58 @@
+"""tasks status/user/created covering index
+
+Índice compuesto para el patrón
+    WHERE status = ? AND user_id = ? ORDER BY created_at
+con INCLUDE (task_id, progress) en PostgreSQL para permitir index-only scans
+(en SQLite se crea sin INCLUDE). ix_tasks_status se mantiene porque el API
+de filtros genérico permite filtrar solo por status.
+
+En PostgreSQL se construye con CREATE INDEX CONCURRENTLY (dentro de un
+autocommit_block) para no bloquear escrituras sobre una tabla tasks con datos.
+
+Revision ID: 9a857903f2a1
+Revises: 3ebc5b49849d
+Create Date: 2026-10-15 11:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a857903f2a1'
+down_revision: Union[str, Sequence[str], None] = '3ebc5b49849d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    def create(**kw):
+        op.create_index(
+            'ix_tasks_status_user_created',
+            'tasks',
+            ['status', 'user_id', 'created_at'],
+            unique=False,
+            postgresql_include=['task_id', 'progress'],
+            **kw,
+        )
+
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            create(postgresql_concurrently=True, if_not_exists=True)
+    else:
+        create()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.drop_index(
+                'ix_tasks_status_user_created', table_name='tasks',
+                postgresql_concurrently=True, if_exists=True,
+            )
+    else:
+        op.drop_index('ix_tasks_status_user_created', table_name='tasks')
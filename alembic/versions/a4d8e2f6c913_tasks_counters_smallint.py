@@ -0,0 +1,47 @@
+"""tasks counters to smallint
+
+tasks.progress (0-100), tasks.retry_count y tasks.max_retries pasan de
+integer a smallint en PostgreSQL: 2 bytes por columna en lugar de 4, más
+tuplas por página en la tabla más consultada por los workers. En SQLite el
+tipo no cambia el almacenamiento y la migración no hace nada.
+
+ALTER COLUMN ... TYPE reescribe la tabla (y sus índices, incluido el
+covering ix_tasks_status_user_created que incluye progress): las tres
+columnas van en un solo ALTER TABLE para reescribirla una sola vez.
+
+Revision ID: a4d8e2f6c913
+Revises: f3c81a6e0d52
+Create Date: 2026-10-15 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4d8e2f6c913'
+down_revision: Union[str, Sequence[str], None] = 'f3c81a6e0d52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ('progress', 'retry_count', 'max_retries')
+
+
+def _alter_type(type_: str) -> None:
+    clauses = ", ".join(f"ALTER COLUMN {column} TYPE {type_}" for column in COLUMNS)
+    op.execute(f"ALTER TABLE tasks {clauses}")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    _alter_type('smallint')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    _alter_type('integer')
@@ -0,0 +1,65 @@
+"""server-side timestamps
+
+created_at / updated_at (y assigned_at, last_login) de users, roles,
+permissions, user_roles y tasks pasan a asignarse en la BD:
+server_default now() (y onupdate desde el ORM) en lugar de
+datetime.utcnow() en Python.
+
+En PostgreSQL las columnas pasan a TIMESTAMPTZ; los valores existentes se
+guardaron como UTC naive, así que se convierten con AT TIME ZONE 'UTC'.
+En SQLite no hay tipo con zona horaria y solo cambia el DEFAULT (batch
+mode, que recrea la tabla).
+
+Revision ID: b7e2c4d91f30
+Revises: 68ace68aecaf
+Create Date: 2026-10-15 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2c4d91f30'
+down_revision: Union[str, Sequence[str], None] = '68ace68aecaf'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# tabla -> [(columna, nullable, con server_default)]
+TIMESTAMP_COLUMNS = {
+    'users': [('created_at', False, True), ('updated_at', False, True), ('last_login', True, False)],
+    'roles': [('created_at', False, True), ('updated_at', False, True)],
+    'permissions': [('created_at', False, True)],
+    'user_roles': [('assigned_at', False, True)],
+    'tasks': [('created_at', False, True)],
+}
+
+
+def _alter(to_timezone: bool) -> None:
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+    zone_sql = "{col} AT TIME ZONE 'UTC'"
+
+    for table, columns in TIMESTAMP_COLUMNS.items():
+        with op.batch_alter_table(table) as batch_op:
+            for column, nullable, has_default in columns:
+                kwargs = {}
+                if is_postgres:
+                    kwargs['type_'] = sa.DateTime(timezone=to_timezone)
+                    kwargs['existing_type'] = sa.DateTime(timezone=not to_timezone)
+                    kwargs['postgresql_using'] = zone_sql.format(col=column)
+                if has_default:
+                    kwargs['server_default'] = sa.func.now() if to_timezone else None
+                if kwargs:
+                    batch_op.alter_column(column, existing_nullable=nullable, **kwargs)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _alter(to_timezone=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _alter(to_timezone=False)
@@ -0,0 +1,86 @@
+"""native enum for tasks.status, webhook_event_type type
+
+tasks.status (varchar) pasa al tipo ENUM task_status en PostgreSQL: 4 bytes
+por fila, comparaciones por OID en lugar de por texto y valores inválidos
+rechazados al insertar. En SQLite el modelo sigue usando VARCHAR y la
+migración no hace nada.
+
+También se crea el tipo webhook_event_type que usa WebhookDelivery.event_type.
+Las tablas de webhooks no las crea ninguna migración (el modelo está sobre
+Base, no en SQLModel.metadata), así que aquí no se altera webhook_deliveries:
+el cambio de columna vive solo en el modelo.
+
+El índice parcial ix_tasks_retry_ready tiene status en su predicado
+(status = 'pending'::varchar), que no se puede reescribir contra el enum:
+se elimina antes del ALTER y se recrea después. ALTER COLUMN ... TYPE
+reescribe ambas tablas; si hay valores fuera del enum la migración falla.
+
+Revision ID: b81f4c2e7a95
+Revises: a4d8e2f6c913
+Create Date: 2026-10-15 18:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81f4c2e7a95'
+down_revision: Union[str, Sequence[str], None] = 'a4d8e2f6c913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TASK_STATUSES = ('pending', 'processing', 'completed', 'failed')
+
+# Snapshot de WebhookEventType al momento de la migración: nuevos eventos
+# requieren su propia migración con ALTER TYPE ... ADD VALUE
+WEBHOOK_EVENT_TYPES = (
+    'user.created', 'user.updated', 'user.deleted', 'user.login',
+    'entity.created', 'entity.updated', 'entity.deleted',
+    'task.completed', 'task.failed', 'task.started',
+    'media.processed', 'media.failed',
+    'email.sent', 'email.failed', 'bulk_email.completed',
+    'permissions.updated', 'role.created', 'role.updated',
+)
+
+RETRY_READY_PREDICATE = "status = 'pending' AND retry_count < max_retries"
+
+
+def _create_retry_ready_index() -> None:
+    op.create_index(
+        'ix_tasks_retry_ready',
+        'tasks',
+        ['created_at'],
+        unique=False,
+        postgresql_where=sa.text(RETRY_READY_PREDICATE),
+    )
+
+
+def _enum_values(values: Sequence[str]) -> str:
+    return ", ".join(f"'{value}'" for value in values)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute(f"CREATE TYPE task_status AS ENUM ({_enum_values(TASK_STATUSES)})")
+    op.execute(f"CREATE TYPE webhook_event_type AS ENUM ({_enum_values(WEBHOOK_EVENT_TYPES)})")
+
+    op.drop_index('ix_tasks_retry_ready', table_name='tasks')
+    op.execute("ALTER TABLE tasks ALTER COLUMN status TYPE task_status USING status::task_status")
+    _create_retry_ready_index()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_tasks_retry_ready', table_name='tasks')
+    op.execute("ALTER TABLE tasks ALTER COLUMN status TYPE varchar USING status::text")
+    _create_retry_ready_index()
+
+    op.execute("DROP TYPE webhook_event_type")
+    op.execute("DROP TYPE task_status")
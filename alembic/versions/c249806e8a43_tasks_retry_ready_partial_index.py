@@ -0,0 +1,58 @@
+"""tasks retry-ready partial index
+
+Índice parcial sobre tasks.created_at que solo contiene las filas elegibles
+para (re)despacho: status = 'pending' AND retry_count < max_retries.
+El worker que hace SELECT ... ORDER BY created_at FOR UPDATE SKIP LOCKED
+LIMIT N recorre un índice pequeño en vez de uno con todos los estados.
+En PostgreSQL se construye CONCURRENTLY para no bloquear escrituras.
+
+Revision ID: c249806e8a43
+Revises: 9a857903f2a1
+Create Date: 2026-10-15 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c249806e8a43'
+down_revision: Union[str, Sequence[str], None] = '9a857903f2a1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+RETRY_READY_PREDICATE = "status = 'pending' AND retry_count < max_retries"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    def create(**kw):
+        op.create_index(
+            'ix_tasks_retry_ready',
+            'tasks',
+            ['created_at'],
+            unique=False,
+            postgresql_where=sa.text(RETRY_READY_PREDICATE),
+            sqlite_where=sa.text(RETRY_READY_PREDICATE),
+            **kw,
+        )
+
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            create(postgresql_concurrently=True, if_not_exists=True)
+    else:
+        create()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.drop_index(
+                'ix_tasks_retry_ready', table_name='tasks',
+                postgresql_concurrently=True, if_exists=True,
+            )
+    else:
+        op.drop_index('ix_tasks_retry_ready', table_name='tasks')
@@ -0,0 +1,45 @@
+"""api_metrics_5m rollup table
+
+Tabla api_metrics_5m: agregados de api_metrics por (bucket de 5 minutos,
+method, path). La llena MetricsService.rollup_buckets desde el cron ARQ
+rollup_metrics; las estadísticas por endpoint leen los buckets completos de
+aquí y solo escanean api_metrics para el borde de la ventana y la cola aún
+no agregada. La tabla arranca vacía: el primer rollup procesa todo el
+histórico existente.
+
+Revision ID: c5d2e8a1f704
+Revises: b81f4c2e7a95
+Create Date: 2026-10-15 19:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d2e8a1f704'
+down_revision: Union[str, Sequence[str], None] = 'b81f4c2e7a95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('api_metrics_5m',
+    sa.Column('bucket', sa.DateTime(), nullable=False),
+    sa.Column('method', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('path', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('sum_ms', sa.Float(), nullable=False),
+    sa.Column('sum_sq_ms', sa.Float(), nullable=False),
+    sa.Column('errors', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('bucket', 'method', 'path')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('api_metrics_5m')
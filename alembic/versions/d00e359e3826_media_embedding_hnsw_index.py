@@ -0,0 +1,60 @@
+"""media embedding hnsw index
+
+Índice HNSW sobre media.embedding (solo PostgreSQL + pgvector).
+
+Si la tabla ya tiene filas se construye con CREATE INDEX CONCURRENTLY dentro
+de un autocommit_block para no bloquear escrituras; con la tabla vacía se
+construye directamente (más rápido). Se sube maintenance_work_mem y se
+habilitan workers paralelos (pgvector >= 0.6 construye HNSW en paralelo).
+
+Revision ID: d00e359e3826
+Revises: 76ffafb10bef
+Create Date: 2026-10-15 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd00e359e3826'
+down_revision: Union[str, Sequence[str], None] = '76ffafb10bef'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+HNSW_INDEX_SQL = """
+    CREATE INDEX {concurrently} IF NOT EXISTS idx_media_embedding_hnsw
+    ON media USING hnsw (embedding vector_l2_ops)
+    WITH (m = 16, ef_construction = 64)
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    has_rows = bind.execute(sa.text("SELECT EXISTS (SELECT 1 FROM media)")).scalar()
+
+    if not has_rows:
+        op.execute(HNSW_INDEX_SQL.format(concurrently=""))
+        return
+
+    # CONCURRENTLY no puede ejecutarse dentro de una transacción
+    with op.get_context().autocommit_block():
+        op.execute("SET maintenance_work_mem = '2GB'")
+        op.execute("SET max_parallel_maintenance_workers = 7")
+        op.execute(HNSW_INDEX_SQL.format(concurrently="CONCURRENTLY"))
+        op.execute("RESET max_parallel_maintenance_workers")
+        op.execute("RESET maintenance_work_mem")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_media_embedding_hnsw")
@@ -0,0 +1,39 @@
+"""duration_sketch on api_metrics_5m
+
+Columna api_metrics_5m.duration_sketch (JSONB en PostgreSQL): histograma
+logarítmico mergeable de las duraciones del bucket (DurationSketch). El
+resumen de /analytics mergea estos sketches para p50/p95/p99 en vez de
+ordenar las duraciones crudas de la ventana. Los buckets ya agregados quedan
+en NULL y el resumen usa los percentiles exactos mientras la ventana los
+incluya.
+
+Revision ID: d7a3f9b2c816
+Revises: c5d2e8a1f704
+Create Date: 2026-10-15 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7a3f9b2c816'
+down_revision: Union[str, Sequence[str], None] = 'c5d2e8a1f704'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'api_metrics_5m',
+        sa.Column('duration_sketch', sa.JSON().with_variant(postgresql.JSONB(), 'postgresql'), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('api_metrics_5m', 'duration_sketch')
@@ -0,0 +1,54 @@
+"""permissions.name generated column
+
+permissions.name pasa a ser una columna generada
+(action || ':' || resource) STORED: la BD mantiene el invariante y la app
+deja de concatenar el nombre en Python.
+
+Una columna existente no puede convertirse en generada, así que se borra y
+se vuelve a crear (los valores se recalculan a partir de action/resource).
+En SQLite se hace con batch mode (recrea la tabla).
+
+Revision ID: e5a9d3c7b214
+Revises: b7e2c4d91f30
+Create Date: 2026-10-15 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a9d3c7b214'
+down_revision: Union[str, Sequence[str], None] = 'b7e2c4d91f30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NAME_EXPRESSION = "action || ':' || resource"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index(op.f('ix_permissions_name'), table_name='permissions')
+    with op.batch_alter_table('permissions') as batch_op:
+        batch_op.drop_column('name')
+        batch_op.add_column(sa.Column(
+            'name', sa.String(), sa.Computed(NAME_EXPRESSION, persisted=True), nullable=False,
+        ))
+    op.create_index(op.f('ix_permissions_name'), 'permissions', ['name'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_permissions_name'), table_name='permissions')
+    with op.batch_alter_table('permissions') as batch_op:
+        batch_op.add_column(sa.Column('name_plain', sa.String(), nullable=True))
+    op.execute(f"UPDATE permissions SET name_plain = {NAME_EXPRESSION}")
+    with op.batch_alter_table('permissions') as batch_op:
+        batch_op.drop_column('name')
+        batch_op.alter_column(
+            'name_plain', new_column_name='name',
+            existing_type=sa.String(), nullable=False,
+        )
+    op.create_index(op.f('ix_permissions_name'), 'permissions', ['name'], unique=True)
@@ -0,0 +1,33 @@
+"""media.content_hash
+
+Columna media.content_hash: BLAKE2b-128 (hex) del contenido, calculado por
+POST /media/upload en la misma pasada por chunks que valida el tamaño. Los
+archivos existentes quedan en NULL (no se recalcula desde storage).
+
+Revision ID: e8b4c1d6f2a9
+Revises: d7a3f9b2c816
+Create Date: 2026-10-15 20:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b4c1d6f2a9'
+down_revision: Union[str, Sequence[str], None] = 'd7a3f9b2c816'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('media', sa.Column('content_hash', sqlmodel.sql.sqltypes.AutoString(length=32), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('media', 'content_hash')
@@ -0,0 +1,56 @@
+"""tasks json columns to jsonb
+
+tasks.task_data y tasks.result pasan de json (texto, re-parseado en cada
+lectura) a jsonb en PostgreSQL. En SQLite no hay jsonb y la migración no
+hace nada (el modelo usa JSON genérico en ese dialecto).
+
+ALTER COLUMN ... TYPE reescribe la tabla: en tablas grandes conviene
+correrla en una ventana de mantenimiento.
+
+Revision ID: f3c81a6e0d52
+Revises: e5a9d3c7b214
+Create Date: 2026-10-15 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c81a6e0d52'
+down_revision: Union[str, Sequence[str], None] = 'e5a9d3c7b214'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ('task_data', 'result')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for column in COLUMNS:
+        op.alter_column(
+            'tasks', column,
+            type_=postgresql.JSONB(),
+            existing_type=sa.JSON(),
+            existing_nullable=True,
+            postgresql_using=f'{column}::jsonb',
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for column in COLUMNS:
+        op.alter_column(
+            'tasks', column,
+            type_=sa.JSON(),
+            existing_type=postgresql.JSONB(),
+            existing_nullable=True,
+            postgresql_using=f'{column}::json',
+        )
@@ -1,123 +1,170 @@
-import os
+from functools import lru_cache
 from dotenv import load_dotenv
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
-# Load environment variables
+# Load .env into os.environ too (worker_config and setup routes still
+# read os.getenv directly)
 load_dotenv()
 
 
-class Settings:
-    """Application settings loaded from environment variables"""
+@lru_cache(maxsize=32)
+def _split_csv(value: str) -> tuple:
+    """Parse a comma-separated setting once per distinct value ("*" -> ("*",))."""
+    if value == "*":
+        return ("*",)
+    return tuple(item.strip() for item in value.split(",") if item.strip())
+
+
+class Settings(BaseSettings):
+    """
+    Application settings loaded from environment variables (and .env).
+    Types are parsed and validated once by pydantic-settings.
+    Not frozen: tests monkeypatch individual settings.
+    """
+
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
     # Database
-    DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./app.db")
-    SQL_ECHO: bool = os.getenv("SQL_ECHO", "False").lower() == "true"  # log de SQL (debug); OFF en prod
+    DATABASE_URL: str = "sqlite:///./app.db"
+    SQL_ECHO: bool = False  # log de SQL (debug); OFF en prod
+    DB_POOL_SIZE: int = 10  # conexiones persistentes del pool (no aplica a SQLite)
+    DB_MAX_OVERFLOW: int = 20  # conexiones extra en picos
+    # Hilos para handlers/dependencias sync (def) — 40 es el default de anyio.
+    # Dimensionar junto con DB_POOL_SIZE + DB_MAX_OVERFLOW: más hilos que
+    # conexiones solo esperan en el pool
+    THREADPOOL_SIZE: int = 40
+    METRICS_DATABASE_URL: str = ""  # Base dedicada para api_metrics (vacío = DATABASE_URL)
+    # Particiones mensuales de api_metrics (cron diario maintain_metrics_partitions)
+    METRICS_PARTITIONS_AHEAD: int = 3  # meses creados por adelantado
+    METRICS_RETENTION_MONTHS: int = 6  # meses completos conservados además del actual (0 = no borrar)
 
     # API Configuration
-    API_TITLE: str = os.getenv("API_TITLE", "FastAPI Base Template")
-    API_VERSION: str = os.getenv("API_VERSION", "1.0.0")
-    API_DESCRIPTION: str = os.getenv(
-        "API_DESCRIPTION",
-        "FastAPI template with SQLModel and authentication"
-    )
+    API_TITLE: str = "FastAPI Base Template"
+    API_VERSION: str = "1.0.0"
+    API_DESCRIPTION: str = "FastAPI template with SQLModel and authentication"
 
     # Server Configuration
-    HOST: str = os.getenv("HOST", "0.0.0.0")
-    PORT: int = int(os.getenv("PORT", "8000"))
-    RELOAD: bool = os.getenv("RELOAD", "True").lower() == "true"
+    HOST: str = "0.0.0.0"
+    PORT: int = 8000
+    RELOAD: bool = True
 
     # Security
-    SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-here-change-in-production")
+    SECRET_KEY: str = "your-secret-key-here-change-in-production"
 
     # OAuth (optional)
-    GOOGLE_CLIENT_ID: str = os.getenv("GOOGLE_CLIENT_ID", "")
-    GOOGLE_CLIENT_SECRET: str = os.getenv("GOOGLE_CLIENT_SECRET", "")
+    GOOGLE_CLIENT_ID: str = ""
+    GOOGLE_CLIENT_SECRET: str = ""
 
     # Storage Configuration
-    USE_S3: bool = os.getenv("USE_S3", "False").lower() == "true"
-    S3_ENDPOINT_URL: str = os.getenv("S3_ENDPOINT_URL", "")  # For MinIO, leave empty for AWS S3
-    S3_ACCESS_KEY: str = os.getenv("S3_ACCESS_KEY", "")
-    S3_SECRET_KEY: str = os.getenv("S3_SECRET_KEY", "")
-    S3_BUCKET_NAME: str = os.getenv("S3_BUCKET_NAME", "media")
-    S3_REGION: str = os.getenv("S3_REGION", "us-east-1")
+    USE_S3: bool = False
+    S3_ENDPOINT_URL: str = ""  # For MinIO, leave empty for AWS S3
+    S3_ACCESS_KEY: str = ""
+    S3_SECRET_KEY: str = ""
+    S3_BUCKET_NAME: str = "media"
+    S3_REGION: str = "us-east-1"
 
     # Local Storage (fallback)
-    MEDIA_FOLDER: str = os.getenv("MEDIA_FOLDER", "./media")
-    MAX_FILE_SIZE: int = int(os.getenv("MAX_FILE_SIZE", "10485760"))  # 10MB default
+    MEDIA_FOLDER: str = "./media"
+    MAX_FILE_SIZE: int = 10485760  # 10MB default
+    UPLOAD_CHUNK_SIZE: int = 1048576  # 1MB: tamaño de bloque al leer/copiar uploads
 
     # SMTP Email Configuration
-    SMTP_HOST: str = os.getenv("SMTP_HOST", "smtp.gmail.com")
-    SMTP_PORT: int = int(os.getenv("SMTP_PORT", "587"))
-    SMTP_USER: str = os.getenv("SMTP_USER", "")
-    SMTP_PASSWORD: str = os.getenv("SMTP_PASSWORD", "")
-    SMTP_FROM_EMAIL: str = os.getenv("SMTP_FROM_EMAIL", "")
-    SMTP_FROM_NAME: str = os.getenv("SMTP_FROM_NAME", "FastAPI Base")
-    SMTP_USE_TLS: bool = os.getenv("SMTP_USE_TLS", "True").lower() == "true"
+    SMTP_HOST: str = "smtp.gmail.com"
+    SMTP_PORT: int = 587
+    SMTP_USER: str = ""
+    SMTP_PASSWORD: str = ""
+    SMTP_FROM_EMAIL: str = ""
+    SMTP_FROM_NAME: str = "FastAPI Base"
+    SMTP_USE_TLS: bool = True
+    SMTP_POOL_SIZE: int = 4  # Conexiones SMTP persistentes por proceso (app y cada worker)
 
     # Email Templates
-    EMAIL_TEMPLATES_DIR: str = os.getenv("EMAIL_TEMPLATES_DIR", "app/templates/emails")
+    EMAIL_TEMPLATES_DIR: str = "app/templates/emails"
+    EMAIL_TEMPLATES_AUTO_RELOAD: bool = False  # True en desarrollo: re-lee templates editados (stat por render)
 
     # Redis Cache Configuration (Optional - cache disabled if not configured)
-    REDIS_HOST: str = os.getenv("REDIS_HOST", "localhost")
-    REDIS_PORT: int = int(os.getenv("REDIS_PORT", "6379"))
-    REDIS_DB: int = int(os.getenv("REDIS_DB", "0"))
-    REDIS_PASSWORD: str = os.getenv("REDIS_PASSWORD", "")
-    REDIS_ENABLED: bool = os.getenv("REDIS_ENABLED", "False").lower() == "true"
-    CACHE_TTL: int = int(os.getenv("CACHE_TTL", "300"))  # 5 minutes default
+    REDIS_HOST: str = "localhost"
+    REDIS_PORT: int = 6379
+    REDIS_DB: int = 0
+    REDIS_PASSWORD: str = ""
+    REDIS_ENABLED: bool = False
+    CACHE_TTL: int = 300  # 5 minutes default
+    COUNT_CACHE_TTL: int = 30  # Totales de listados paginados (COUNT(*))
 
     # CORS Configuration
-    CORS_ORIGINS: str = os.getenv("CORS_ORIGINS", "*")  # Comma-separated origins or "*"
-    CORS_CREDENTIALS: bool = os.getenv("CORS_CREDENTIALS", "True").lower() == "true"
-    CORS_METHODS: str = os.getenv("CORS_METHODS", "*")  # Comma-separated methods or "*"
-    CORS_HEADERS: str = os.getenv("CORS_HEADERS", "*")  # Comma-separated headers or "*"
+    CORS_ORIGINS: str = "*"  # Comma-separated origins or "*"
+    CORS_CREDENTIALS: bool = True
+    CORS_METHODS: str = "*"  # Comma-separated methods or "*"
+    CORS_HEADERS: str = "*"  # Comma-separated headers or "*"
 
     # Logging Configuration
-    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")  # DEBUG, INFO, WARNING, ERROR, CRITICAL
-    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json")  # json or text
-    LOG_FILE: str = os.getenv("LOG_FILE", "")  # Optional: path to log file (e.g., "logs/app.log")
+    LOG_LEVEL: str = "INFO"  # DEBUG, INFO, WARNING, ERROR, CRITICAL
+    LOG_FORMAT: str = "json"  # json or text
+    LOG_FILE: str = ""  # Optional: path to log file (e.g., "logs/app.log")
 
     # Auth tokens
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
-    REFRESH_TOKEN_EXPIRE_DAYS: int = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
-    INVITATION_EXPIRE_HOURS: int = int(os.getenv("INVITATION_EXPIRE_HOURS", "48"))
-    FRONTEND_URL: str = os.getenv("FRONTEND_URL", "http://localhost:5173")
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    INVITATION_EXPIRE_HOURS: int = 48
+    FRONTEND_URL: str = "http://localhost:5173"
 
     # Multi-tenancy
-    DEFAULT_PLAN: str = os.getenv("DEFAULT_PLAN", "free")
-    SYSTEM_ORG_SLUG: str = os.getenv("SYSTEM_ORG_SLUG", "system")
-    SYSTEM_ADMIN_EMAIL: str = os.getenv("SYSTEM_ADMIN_EMAIL", "")
-    SYSTEM_ADMIN_PASSWORD: str = os.getenv("SYSTEM_ADMIN_PASSWORD", "")
+    DEFAULT_PLAN: str = "free"
+    SYSTEM_ORG_SLUG: str = "system"
+    SYSTEM_ADMIN_EMAIL: str = ""
+    SYSTEM_ADMIN_PASSWORD: str = ""
 
     # SaaS Features
-    SOFT_DELETE_ENABLED: bool = os.getenv("SOFT_DELETE_ENABLED", "True").lower() == "true"
-    AUDIT_LOG_ENABLED: bool = os.getenv("AUDIT_LOG_ENABLED", "True").lower() == "true"
-    API_KEYS_ENABLED: bool = os.getenv("API_KEYS_ENABLED", "True").lower() == "true"
-    API_KEY_PREFIX: str = os.getenv("API_KEY_PREFIX", "sk_live_")
-    GDPR_EXPORT_ENABLED: bool = os.getenv("GDPR_EXPORT_ENABLED", "True").lower() == "true"
-    ACCOUNT_DELETION_GRACE_DAYS: int = int(os.getenv("ACCOUNT_DELETION_GRACE_DAYS", "30"))
+    SOFT_DELETE_ENABLED: bool = True
+    AUDIT_LOG_ENABLED: bool = True
+    API_KEYS_ENABLED: bool = True
+    API_KEY_PREFIX: str = "sk_live_"
+    GDPR_EXPORT_ENABLED: bool = True
+    ACCOUNT_DELETION_GRACE_DAYS: int = 30
 
     # Observability
-    SENTRY_DSN: str = os.getenv("SENTRY_DSN", "")
-    SENTRY_TRACES_SAMPLE_RATE: float = float(os.getenv("SENTRY_TRACES_SAMPLE_RATE", "0.1"))
-    ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
+    SENTRY_DSN: str = ""
+    SENTRY_TRACES_SAMPLE_RATE: float = 0.1
+    ENVIRONMENT: str = "development"
+
+    # Webhooks: gzip del body saliente desde este tamaño en bytes (0 = nunca).
+    # Solo activarlo si los receptores decodifican Content-Encoding en requests.
+    WEBHOOK_GZIP_MIN_BYTES: int = 0
 
     # Security
-    ENFORCE_STRONG_PASSWORDS: bool = os.getenv("ENFORCE_STRONG_PASSWORDS", "False").lower() == "true"
+    ENFORCE_STRONG_PASSWORDS: bool = False
+    # Respetar X-Forwarded-For solo detrás de un reverse proxy confiable
+    TRUST_PROXY_HEADERS: bool = False
 
     # Billing / Payment Gateways
-    ACTIVE_PAYMENT_GATEWAY: str = os.getenv("ACTIVE_PAYMENT_GATEWAY", "stripe")
-    STRIPE_SECRET_KEY: str = os.getenv("STRIPE_SECRET_KEY", "")
-    STRIPE_WEBHOOK_SECRET: str = os.getenv("STRIPE_WEBHOOK_SECRET", "")
-    MERCADOPAGO_ACCESS_TOKEN: str = os.getenv("MERCADOPAGO_ACCESS_TOKEN", "")
-    MERCADOPAGO_WEBHOOK_SECRET: str = os.getenv("MERCADOPAGO_WEBHOOK_SECRET", "")
-    POLAR_ACCESS_TOKEN: str = os.getenv("POLAR_ACCESS_TOKEN", "")
-    POLAR_WEBHOOK_SECRET: str = os.getenv("POLAR_WEBHOOK_SECRET", "")
+    ACTIVE_PAYMENT_GATEWAY: str = "stripe"
+    STRIPE_SECRET_KEY: str = ""
+    STRIPE_WEBHOOK_SECRET: str = ""
+    MERCADOPAGO_ACCESS_TOKEN: str = ""
+    MERCADOPAGO_WEBHOOK_SECRET: str = ""
+    POLAR_ACCESS_TOKEN: str = ""
+    POLAR_WEBHOOK_SECRET: str = ""
 
     @property
     def cors_origins_list(self) -> list:
-        """Convert CORS_ORIGINS string to list"""
-        if self.CORS_ORIGINS == "*":
-            return ["*"]
-        return [origin.strip() for origin in self.CORS_ORIGINS.split(",") if origin.strip()]
+        """Convert CORS_ORIGINS string to list (parsed once per value)"""
+        return list(_split_csv(self.CORS_ORIGINS))
+
+    @property
+    def cors_methods_list(self) -> list:
+        """Convert CORS_METHODS string to list (parsed once per value)"""
+        return list(_split_csv(self.CORS_METHODS))
+
+    @property
+    def cors_headers_list(self) -> list:
+        """Convert CORS_HEADERS string to list (parsed once per value)"""
+        return list(_split_csv(self.CORS_HEADERS))
+
+
+@lru_cache
+def get_settings() -> Settings:
+    """Singleton de settings (parseado una sola vez)."""
+    return Settings()
 
 
-settings = Settings()
+settings = get_settings()
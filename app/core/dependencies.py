@@ -8,28 +8,46 @@ from typing import Optional
 from dataclasses import dataclass
 
 from app.database import get_session
-from app.core.security import verify_token
+from app.core.security import verify_token, decode_access_token
 from app.services.user_service import user_service
 from app.models.user import UserRead
 from app.config import settings
+from app.utils.request import get_client_ip
 
 # HTTP Bearer token scheme
 security = HTTPBearer()
 
-
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    session: Session = Depends(get_session)
+# Excepciones estáticas reutilizadas en el camino de error (se relanzan con
+# with_traceback(None) para no acumular tracebacks entre requests).
+_CREDENTIALS_EXC = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+_INACTIVE_USER_EXC = HTTPException(
+    status_code=status.HTTP_400_BAD_REQUEST,
+    detail="Inactive user"
+)
+_UNVERIFIED_EMAIL_EXC = HTTPException(
+    status_code=status.HTTP_400_BAD_REQUEST,
+    detail="Email not verified"
+)
+
+
+async def _authenticate(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials,
+    session: Session,
 ) -> UserRead:
     """
     Autenticación dual: JWT token o API key.
     Detecta API keys por el prefijo configurado (ej. sk_live_).
+    Los claims del JWT quedan en request.state.token_claims para los guards RBAC.
+    El usuario resuelto se memoiza en request.state para el resto del request.
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+    cached_user = getattr(request.state, "current_user", None)
+    if cached_user is not None:
+        return cached_user
 
     token = credentials.credentials
 
@@ -39,26 +57,53 @@ async def get_current_user(
 
         api_key = api_key_service.verify_key(session, token)
         if api_key is None:
-            raise credentials_exception
+            raise _CREDENTIALS_EXC.with_traceback(None)
 
         user = user_service.get_by_id(session, api_key.user_id)
         if user is None:
-            raise credentials_exception
+            raise _CREDENTIALS_EXC.with_traceback(None)
 
-        return UserRead.model_validate(user)
+        user = UserRead.model_validate(user)
+    else:
+        # --- JWT auth ---
+        claims = decode_access_token(token)
 
-    # --- JWT auth ---
-    email = verify_token(token)
+        if claims is None:
+            raise _CREDENTIALS_EXC.with_traceback(None)
 
-    if email is None:
-        raise credentials_exception
+        request.state.token_claims = claims
+
+        user = user_service.get_user_read_by_email(session, claims["sub"])
+
+        if user is None:
+            raise _CREDENTIALS_EXC.with_traceback(None)
 
-    user = user_service.get_user_by_email(session, email)
+    request.state.current_user = user
+    return user
 
-    if user is None:
-        raise credentials_exception
 
-    return UserRead.model_validate(user)
+def _ensure_active(user: UserRead) -> UserRead:
+    if not user.is_active:
+        raise _INACTIVE_USER_EXC.with_traceback(None)
+    return user
+
+
+def _ensure_verified(user: UserRead) -> UserRead:
+    if not user.is_verified:
+        raise _UNVERIFIED_EMAIL_EXC.with_traceback(None)
+    return user
+
+
+async def get_current_user(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    session: Session = Depends(get_session)
+) -> UserRead:
+    """
+    Autenticación dual: JWT token o API key.
+    Detecta API keys por el prefijo configurado (ej. sk_live_).
+    """
+    return await _authenticate(request, credentials, session)
 
 
 @dataclass
@@ -70,55 +115,48 @@ class AuditContext:
 
 async def get_audit_context(request: Request) -> AuditContext:
     """Extrae IP y User-Agent del request para audit logs."""
-    ip = request.headers.get("x-forwarded-for", request.client.host if request.client else None)
+    ip = get_client_ip(request, default=None)
     ua = request.headers.get("user-agent")
     return AuditContext(ip_address=ip, user_agent=ua)
 
 
 async def get_current_active_user(
-    current_user: UserRead = Depends(get_current_user)
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    session: Session = Depends(get_session)
 ) -> UserRead:
     """
     Ensure current user is active.
 
-    Args:
-        current_user: Current authenticated user
+    Resolves token and user inline (no nested get_current_user dependency).
 
     Returns:
         UserRead: Current active user
 
     Raises:
-        HTTPException: If user is inactive
+        HTTPException: If credentials are invalid or user is inactive
     """
-    if not current_user.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Inactive user"
-        )
-    return current_user
+    return _ensure_active(await _authenticate(request, credentials, session))
 
 
 async def get_current_verified_user(
-    current_user: UserRead = Depends(get_current_active_user)
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    session: Session = Depends(get_session)
 ) -> UserRead:
     """
-    Ensure current user has verified email.
+    Ensure current user is active and has verified email.
 
-    Args:
-        current_user: Current active user
+    Single resolver: token verify + user fetch + active/verified checks.
 
     Returns:
         UserRead: Current verified user
 
     Raises:
-        HTTPException: If email is not verified
+        HTTPException: If credentials are invalid, user is inactive or email not verified
     """
-    if not current_user.is_verified:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email not verified"
-        )
-    return current_user
+    user = _ensure_active(await _authenticate(request, credentials, session))
+    return _ensure_verified(user)
 
 
 # Optional authentication (returns None if no token)
@@ -147,8 +185,7 @@ async def get_current_user_optional(
         if email is None:
             return None
 
-        user = user_service.get_user_by_email(session, email)
-        return UserRead.model_validate(user) if user else None
+        return user_service.get_user_read_by_email(session, email)
 
     except Exception:
         return None
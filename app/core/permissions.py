@@ -1,15 +1,54 @@
 """
 Permission-based authorization dependencies.
 Used to protect endpoints based on user roles and permissions.
+
+Access tokens issued at login/refresh embed the user's roles and permissions
+as claims; guards check those in memory and only fall back to the RBAC cache
+(Redis, then database) for tokens without RBAC claims (API keys,
+impersonation, legacy tokens). The fallback is loaded once per request and
+reused by every guard of the route.
 """
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from sqlmodel import Session
+from functools import lru_cache
 from typing import List
 
 from app.database import get_session
 from app.core.dependencies import get_current_active_user
 from app.models.user import UserRead
-from app.services.role_service import role_service
+from app.services.rbac_cache import rbac_cache
+
+
+@lru_cache(maxsize=256)
+def _forbidden(detail: str) -> HTTPException:
+    """403 reutilizable por mensaje (la lista de permisos/roles del sistema es acotada)."""
+    return HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=detail)
+
+
+def _rbac_claims(request: Request, session: Session, current_user: UserRead) -> dict:
+    """
+    Roles y permisos del usuario actual: claims del token si los trae; si no,
+    del RBAC cache, memoizados en request.state para el resto del request.
+    """
+    claims = getattr(request.state, "token_claims", None)
+    if claims and "perms" in claims and claims.get("uid") == current_user.id:
+        return claims
+
+    loaded = getattr(request.state, "rbac_claims", None)
+    if loaded is None or loaded["uid"] != current_user.id:
+        roles, perms = rbac_cache.get_user_rbac(session, current_user.id)
+        loaded = {"uid": current_user.id, "roles": roles, "perms": perms}
+        request.state.rbac_claims = loaded
+    return loaded
+
+
+def _claims_have_permission(claims: dict, action: str, resource: str) -> bool:
+    perms = claims["perms"]
+    return (
+        f"{action}:{resource}" in perms
+        or f"manage:{resource}" in perms
+        or "manage:all" in perms
+    )
 
 
 def require_permission(action: str, resource: str):
@@ -23,23 +62,17 @@ def require_permission(action: str, resource: str):
         ):
             ...
     """
+    denied = _forbidden(f"Permission denied. Required: {action}:{resource}")
+
     async def permission_checker(
+        request: Request,
         current_user: UserRead = Depends(get_current_active_user),
         session: Session = Depends(get_session)
     ) -> UserRead:
-        # Check if user has permission
-        has_permission = role_service.user_has_permission(
-            session,
-            current_user.id,
-            action,
-            resource
-        )
-
-        if not has_permission:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"Permission denied. Required: {action}:{resource}"
-            )
+        # Check if user has permission (token claims first, RBAC cache as fallback)
+        claims = _rbac_claims(request, session, current_user)
+        if not _claims_have_permission(claims, action, resource):
+            raise denied.with_traceback(None)
 
         return current_user
 
@@ -57,22 +90,17 @@ def require_role(role_name: str):
         ):
             ...
     """
+    denied = _forbidden(f"Role required: {role_name}")
+
     async def role_checker(
+        request: Request,
         current_user: UserRead = Depends(get_current_active_user),
         session: Session = Depends(get_session)
     ) -> UserRead:
-        # Check if user has role
-        has_role = role_service.user_has_role(
-            session,
-            current_user.id,
-            role_name
-        )
-
-        if not has_role:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"Role required: {role_name}"
-            )
+        # Check if user has role (token claims first, RBAC cache as fallback)
+        claims = _rbac_claims(request, session, current_user)
+        if role_name not in claims["roles"]:
+            raise denied.with_traceback(None)
 
         return current_user
 
@@ -90,19 +118,19 @@ def require_any_role(role_names: List[str]):
         ):
             ...
     """
+    denied = _forbidden(f"One of these roles required: {', '.join(role_names)}")
+
     async def role_checker(
+        request: Request,
         current_user: UserRead = Depends(get_current_active_user),
         session: Session = Depends(get_session)
     ) -> UserRead:
         # Check if user has any of the roles
-        for role_name in role_names:
-            if role_service.user_has_role(session, current_user.id, role_name):
-                return current_user
+        claims = _rbac_claims(request, session, current_user)
+        if any(role_name in claims["roles"] for role_name in role_names):
+            return current_user
 
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=f"One of these roles required: {', '.join(role_names)}"
-        )
+        raise denied.with_traceback(None)
 
     return role_checker
 
@@ -122,22 +150,14 @@ def require_all_permissions(permissions: List[tuple]):
             ...
     """
     async def permissions_checker(
+        request: Request,
         current_user: UserRead = Depends(get_current_active_user),
         session: Session = Depends(get_session)
     ) -> UserRead:
+        claims = _rbac_claims(request, session, current_user)
         for action, resource in permissions:
-            has_permission = role_service.user_has_permission(
-                session,
-                current_user.id,
-                action,
-                resource
-            )
-
-            if not has_permission:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail=f"Permission denied. Required: {action}:{resource}"
-                )
+            if not _claims_have_permission(claims, action, resource):
+                raise _forbidden(f"Permission denied. Required: {action}:{resource}").with_traceback(None)
 
         return current_user
 
@@ -150,13 +170,15 @@ require_admin = require_any_role(["superadmin", "admin"])
 require_moderator = require_any_role(["superadmin", "admin", "moderator"])
 
 
-# Resource-specific permission dependencies
-def require_users_create(): return require_permission("create", "users")
-def require_users_read(): return require_permission("read", "users")
-def require_users_update(): return require_permission("update", "users")
-def require_users_delete(): return require_permission("delete", "users")
-def require_users_manage(): return require_permission("manage", "users")
+# Resource-specific permission dependencies (built once; use as Depends(require_users_read))
+require_users_create = require_permission("create", "users")
+require_users_read = require_permission("read", "users")
+require_users_update = require_permission("update", "users")
+require_users_delete = require_permission("delete", "users")
+require_users_manage = require_permission("manage", "users")
 
-def require_roles_manage(): return require_permission("manage", "roles")
-def require_media_create(): return require_permission("create", "media")
-def require_media_delete(): return require_permission("delete", "media")
+require_roles_read = require_permission("read", "roles")
+require_roles_manage = require_permission("manage", "roles")
+require_permissions_read = require_permission("read", "permissions")
+require_media_create = require_permission("create", "media")
+require_media_delete = require_permission("delete", "media")
@@ -3,52 +3,266 @@ Security utilities for JWT authentication and password hashing.
 Supports JWT access/refresh tokens, purpose tokens (verify email, password reset),
 and OAuth providers.
 """
+import asyncio
+import base64
+import calendar
+import os
 import secrets
 import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional, Tuple
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+import bcrypt
+import orjson
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+import jwt
 from app.config import settings
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes nuevos: Argon2id (64 MB, t=2, p=1).
+# Hashes bcrypt legacy ($2a$/$2b$/$2y$) se siguen verificando y se re-hashean en login.
+password_hasher = PasswordHasher(time_cost=2, memory_cost=65536, parallelism=1, hash_len=32)
+BCRYPT_ROUNDS = 12
 
 # JWT Configuration
 ALGORITHM = "HS256"
 
 
+# Cache de verificaciones: digest HMAC(SECRET_KEY, plain:hash) -> (resultado, expira_en).
+# Nunca se guarda la contraseña en claro; los fallos viven poco para no
+# interferir con el bloqueo por intentos fallidos.
+_VERIFY_CACHE_MAXSIZE = 1024
+_VERIFY_CACHE_TTL_OK = 60.0
+_VERIFY_CACHE_TTL_FAIL = 2.0
+_verify_cache: "OrderedDict[bytes, Tuple[bool, float]]" = OrderedDict()
+_verify_cache_lock = threading.Lock()
+
+
+def _verify_cache_key(plain_password: str, hashed_password: str) -> bytes:
+    return _hmac_sha256(f"{plain_password}:{hashed_password}".encode())
+
+
+def clear_password_cache() -> None:
+    """Vacía la cache de verificaciones (p.ej. tras cambiar la contraseña)."""
+    with _verify_cache_lock:
+        _verify_cache.clear()
+
+
+def _is_bcrypt_hash(hashed_password: str) -> bool:
+    return hashed_password.startswith(("$2a$", "$2b$", "$2y$"))
+
+
+def _checkpw(plain_password: str, hashed_password: str) -> bool:
+    """Camino lento: Argon2id o bcrypt legacy. Hash malformado cuenta como no válido."""
+    if _is_bcrypt_hash(hashed_password):
+        try:
+            return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
+        except ValueError:
+            return False
+    try:
+        return password_hasher.verify(hashed_password, plain_password)
+    except (VerificationError, InvalidHashError):
+        return False
+
+
+def _cache_get(key: bytes, now: float) -> Optional[bool]:
+    with _verify_cache_lock:
+        cached = _verify_cache.get(key)
+        if cached is not None:
+            if cached[1] > now:
+                _verify_cache.move_to_end(key)
+                return cached[0]
+            del _verify_cache[key]
+    return None
+
+
+def _cache_put(key: bytes, result: bool, now: float) -> None:
+    ttl = _VERIFY_CACHE_TTL_OK if result else _VERIFY_CACHE_TTL_FAIL
+    with _verify_cache_lock:
+        _verify_cache[key] = (result, now + ttl)
+        _verify_cache.move_to_end(key)
+        while len(_verify_cache) > _VERIFY_CACHE_MAXSIZE:
+            _verify_cache.popitem(last=False)
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verifica si la contraseña plana coincide con el hash."""
-    return pwd_context.verify(plain_password, hashed_password)
+    """Verifica si la contraseña plana coincide con el hash (con cache TTL en memoria)."""
+    key = _verify_cache_key(plain_password, hashed_password)
+    now = time.monotonic()
+    cached = _cache_get(key, now)
+    if cached is not None:
+        return cached
+
+    result = _checkpw(plain_password, hashed_password)
+    _cache_put(key, result, now)
+    return result
 
 
 def get_password_hash(password: str) -> str:
-    """Genera hash bcrypt de la contraseña."""
-    return pwd_context.hash(password)
+    """Genera hash Argon2id de la contraseña."""
+    return password_hasher.hash(password)
+
+
+# Pool dedicado para hashing: argon2-cffi y bcrypt liberan el GIL, así que con
+# threads alcanza para sacar el trabajo del event loop y paralelizarlo (un
+# ProcessPool pagaría pickling/IPC por llamada). Acotado porque cada Argon2id
+# reserva 64 MB mientras corre.
+_HASH_WORKERS = min(8, os.cpu_count() or 1)
+_hash_pool = ThreadPoolExecutor(max_workers=_HASH_WORKERS, thread_name_prefix="pwhash")
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password sin bloquear el event loop (hits de cache se resuelven inline)."""
+    cached = _cache_get(_verify_cache_key(plain_password, hashed_password), time.monotonic())
+    if cached is not None:
+        return cached
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_pool, verify_password, plain_password, hashed_password)
+
+
+async def hash_password_async(password: str) -> str:
+    """get_password_hash sin bloquear el event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_pool, get_password_hash, password)
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True si el hash es bcrypt legacy o usa parámetros Argon2 distintos a los actuales."""
+    if _is_bcrypt_hash(hashed_password):
+        return True
+    try:
+        return password_hasher.check_needs_rehash(hashed_password)
+    except InvalidHashError:
+        return True
+
+
+# --- Firma JWT ---
+
+def _b64url(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+# Header constante para HS256: se serializa una sola vez.
+_HEADER_B64 = _b64url(b'{"alg":"HS256","typ":"JWT"}')
+_secret_cache: Tuple[str, bytes, "hmac.HMAC"] = ("", b"", hmac.new(b"", digestmod=hashlib.sha256))
+
+
+def _refresh_secret() -> Tuple[str, bytes, "hmac.HMAC"]:
+    """Recalcula la clave (y el HMAC ya inicializado con ella) solo si SECRET_KEY cambia."""
+    global _secret_cache
+    key = settings.SECRET_KEY
+    if _secret_cache[0] != key:
+        key_bytes = key.encode("utf-8")
+        _secret_cache = (key, key_bytes, hmac.new(key_bytes, digestmod=hashlib.sha256))
+    return _secret_cache
+
+
+def _secret_bytes() -> bytes:
+    """SECRET_KEY codificada a bytes."""
+    return _refresh_secret()[1]
+
+
+def _hmac_sha256(message: bytes) -> bytes:
+    """
+    HMAC-SHA256 con SECRET_KEY. Parte de una copia del HMAC con la clave ya
+    absorbida (ipad/opad), así cada firma se ahorra re-procesar la clave.
+    """
+    mac = _refresh_secret()[2].copy()
+    mac.update(message)
+    return mac.digest()
+
+
+def _numeric_date(value):
+    """datetime -> NumericDate (segundos UTC), como hace PyJWT con exp/iat/nbf."""
+    if isinstance(value, datetime):
+        return calendar.timegm(value.utctimetuple())
+    return value
+
+
+def _mint(payload: dict) -> str:
+    """Firma un JWT HS256 sin pasar por la librería (header precalculado)."""
+    if ALGORITHM != "HS256":
+        return jwt.encode(payload, _secret_bytes(), algorithm=ALGORITHM)
+    claims = {k: _numeric_date(v) for k, v in payload.items()}
+    payload_b64 = _b64url(orjson.dumps(claims))
+    signing_input = _HEADER_B64 + b"." + payload_b64
+    signature = _hmac_sha256(signing_input)
+    return (signing_input + b"." + _b64url(signature)).decode("ascii")
+
+
+def _b64url_decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+def _decode(token: str) -> Optional[dict]:
+    """
+    Verifica firma y expiración de un JWT propio y retorna el payload.
+    Camino rápido para tokens HS256 con nuestro header; el resto va por PyJWT.
+    Exige los claims exp y sub. None si el token no es válido.
+    """
+    try:
+        header_b64, payload_b64, signature_b64 = token.split(".")
+    except ValueError:
+        return None
+
+    if ALGORITHM != "HS256" or header_b64.encode("ascii", "ignore") != _HEADER_B64:
+        try:
+            return jwt.decode(
+                token, _secret_bytes(), algorithms=[ALGORITHM],
+                options={"require": ["exp", "sub"]},
+            )
+        except jwt.PyJWTError:
+            return None
+
+    try:
+        signing_input = f"{header_b64}.{payload_b64}".encode("ascii")
+        signature = _b64url_decode(signature_b64)
+        expected = _hmac_sha256(signing_input)
+        if not hmac.compare_digest(signature, expected):
+            return None
+        payload = orjson.loads(_b64url_decode(payload_b64))
+    except (ValueError, UnicodeEncodeError, orjson.JSONDecodeError):
+        return None
+
+    if not isinstance(payload, dict):
+        return None
+    exp = payload.get("exp")
+    if not isinstance(exp, (int, float)) or exp <= time.time():
+        return None
+    if not payload.get("sub"):
+        return None
+    return payload
 
 
 # --- Access tokens ---
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
-    """Crea JWT access token (vida corta, default desde settings)."""
+    """Crea JWT access token (vida corta, default desde settings). exp es un entero POSIX."""
     to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+    if expires_delta is not None:
+        lifetime = int(expires_delta.total_seconds())
     else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
+        lifetime = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    to_encode["exp"] = int(time.time()) + lifetime
+    return _mint(to_encode)
+
+
+def decode_access_token(token: str) -> Optional[dict]:
+    """Decodifica JWT y retorna el payload completo (sub, uid, roles, perms...). None si inválido."""
+    return _decode(token)
 
 
 def verify_token(token: str) -> Optional[str]:
     """Decodifica JWT y retorna email (sub). None si inválido."""
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        return email if email else None
-    except JWTError:
+    payload = _decode(token)
+    if payload is None:
         return None
+    email: str = payload.get("sub")
+    return email if email else None
 
 
 # --- Refresh tokens ---
@@ -74,18 +288,14 @@ def create_refresh_token() -> Tuple[str, str, datetime]:
 
 def create_verification_token(email: str) -> str:
     """JWT firmado con purpose='verify', expira en 24h."""
-    data = {"sub": email, "purpose": "verify"}
-    expire = datetime.utcnow() + timedelta(hours=24)
-    data["exp"] = expire
-    return jwt.encode(data, settings.SECRET_KEY, algorithm=ALGORITHM)
+    data = {"sub": email, "purpose": "verify", "exp": int(time.time()) + 24 * 3600}
+    return _mint(data)
 
 
 def create_password_reset_token(email: str) -> str:
     """JWT firmado con purpose='reset', expira en 1h."""
-    data = {"sub": email, "purpose": "reset"}
-    expire = datetime.utcnow() + timedelta(hours=1)
-    data["exp"] = expire
-    return jwt.encode(data, settings.SECRET_KEY, algorithm=ALGORITHM)
+    data = {"sub": email, "purpose": "reset", "exp": int(time.time()) + 3600}
+    return _mint(data)
 
 
 def verify_purpose_token(token: str, expected_purpose: str) -> Optional[str]:
@@ -93,12 +303,11 @@ def verify_purpose_token(token: str, expected_purpose: str) -> Optional[str]:
     Decodifica JWT y valida que el purpose coincida.
     Returns: email si válido, None si inválido o purpose incorrecto.
     """
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        purpose: str = payload.get("purpose")
-        if not email or purpose != expected_purpose:
-            return None
-        return email
-    except JWTError:
+    payload = _decode(token)
+    if payload is None:
+        return None
+    email: str = payload.get("sub")
+    purpose: str = payload.get("purpose")
+    if not email or purpose != expected_purpose:
         return None
+    return email
@@ -2,7 +2,8 @@
 Seed data for default roles and permissions.
 Run this script to initialize the database with default RBAC configuration.
 """
-from datetime import datetime
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlmodel import Session, select
 
 from app.database import engine
@@ -16,66 +17,129 @@ from app.core.security import get_password_hash
 from app.config import settings
 
 
+# Datos de seed inmutables a nivel de módulo (no se reconstruyen en cada llamada)
+# (name, action, resource, description)
+PERMISSIONS_DATA = (
+    # User permissions
+    ("create:users", "create", "users", "Create new users"),
+    ("read:users", "read", "users", "View user information"),
+    ("update:users", "update", "users", "Update user information"),
+    ("delete:users", "delete", "users", "Delete users"),
+    ("manage:users", "manage", "users", "Full user management"),
+
+    # Role permissions
+    ("create:roles", "create", "roles", "Create new roles"),
+    ("read:roles", "read", "roles", "View roles"),
+    ("update:roles", "update", "roles", "Update roles"),
+    ("delete:roles", "delete", "roles", "Delete roles"),
+    ("manage:roles", "manage", "roles", "Full role management"),
+
+    # Permission permissions
+    ("create:permissions", "create", "permissions", "Create new permissions"),
+    ("read:permissions", "read", "permissions", "View permissions"),
+    ("update:permissions", "update", "permissions", "Update permissions"),
+    ("delete:permissions", "delete", "permissions", "Delete permissions"),
+    ("manage:permissions", "manage", "permissions", "Full permission management"),
+
+    # Media permissions
+    ("create:media", "create", "media", "Upload media files"),
+    ("read:media", "read", "media", "View media files"),
+    ("update:media", "update", "media", "Update media information"),
+    ("delete:media", "delete", "media", "Delete media files"),
+    ("manage:media", "manage", "media", "Full media management"),
+
+    # Superadmin permission
+    ("manage:all", "manage", "all", "Full system access (superadmin)"),
+)
+
+# (role, display_name, description, permission names)
+ROLES_DATA = (
+    (
+        DefaultRole.SUPERADMIN,
+        "Super Administrator",
+        "Full system access with all permissions",
+        ("manage:all",)
+    ),
+    (
+        DefaultRole.ADMIN,
+        "Administrator",
+        "Administrative access to manage users, roles, and content",
+        (
+            "manage:users", "manage:roles", "manage:permissions",
+            "manage:media"
+        )
+    ),
+    (
+        DefaultRole.MODERATOR,
+        "Moderator",
+        "Can manage content and view users",
+        (
+            "read:users", "update:users",
+            "manage:media",
+            "read:roles"
+        )
+    ),
+    (
+        DefaultRole.USER,
+        "User",
+        "Standard user with basic access",
+        (
+            "read:users",  # Can view their own profile
+            "create:media", "read:media", "update:media", "delete:media"  # Own media only
+        )
+    ),
+    (
+        DefaultRole.GUEST,
+        "Guest",
+        "Limited read-only access",
+        (
+            "read:media",  # Public media only
+        )
+    ),
+)
+
+
+def _insert_ignore(session: Session, model):
+    """INSERT ... ON CONFLICT DO NOTHING según el dialecto (PostgreSQL / SQLite)."""
+    dialect = session.get_bind().dialect.name
+    insert_fn = sqlite_insert if dialect == "sqlite" else pg_insert
+    return insert_fn(model)
+
+
 def seed_permissions(session: Session) -> dict[str, Permission]:
     """
     Create default permissions.
     Returns a dict mapping permission names to Permission objects.
     """
-    permissions_data = [
-        # User permissions
-        ("create:users", "create", "users", "Create new users"),
-        ("read:users", "read", "users", "View user information"),
-        ("update:users", "update", "users", "Update user information"),
-        ("delete:users", "delete", "users", "Delete users"),
-        ("manage:users", "manage", "users", "Full user management"),
-
-        # Role permissions
-        ("create:roles", "create", "roles", "Create new roles"),
-        ("read:roles", "read", "roles", "View roles"),
-        ("update:roles", "update", "roles", "Update roles"),
-        ("delete:roles", "delete", "roles", "Delete roles"),
-        ("manage:roles", "manage", "roles", "Full role management"),
-
-        # Permission permissions
-        ("create:permissions", "create", "permissions", "Create new permissions"),
-        ("read:permissions", "read", "permissions", "View permissions"),
-        ("update:permissions", "update", "permissions", "Update permissions"),
-        ("delete:permissions", "delete", "permissions", "Delete permissions"),
-        ("manage:permissions", "manage", "permissions", "Full permission management"),
-
-        # Media permissions
-        ("create:media", "create", "media", "Upload media files"),
-        ("read:media", "read", "media", "View media files"),
-        ("update:media", "update", "media", "Update media information"),
-        ("delete:media", "delete", "media", "Delete media files"),
-        ("manage:media", "manage", "media", "Full media management"),
-
-        # Superadmin permission
-        ("manage:all", "manage", "all", "Full system access (superadmin)"),
+    # created_at lo asigna la BD (server_default) y name es columna generada
+    names = [name for name, _, _, _ in PERMISSIONS_DATA]
+    rows = [
+        dict(
+            action=action,
+            resource=resource,
+            description=description,
+        )
+        for _, action, resource, description in PERMISSIONS_DATA
     ]
 
-    permissions_map = {}
-
-    for name, action, resource, description in permissions_data:
-        # Check if permission already exists
-        stmt = select(Permission).where(Permission.name == name)
-        existing = session.exec(stmt).first()
-
-        if existing:
-            permissions_map[name] = existing
-            print(f"  [OK] Permission already exists: {name}")
-        else:
-            permission = Permission(
-                name=name,
-                action=action,
-                resource=resource,
-                description=description,
-                created_at=datetime.utcnow()
-            )
-            session.add(permission)
-            session.flush()  # Get the ID
-            permissions_map[name] = permission
-            print(f"  + Created permission: {name}")
+    # Upsert idempotente: el índice único de name descarta los existentes en el servidor
+    stmt = (
+        _insert_ignore(session, Permission)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=["name"])
+        .returning(Permission.name)
+    )
+    created = set(session.execute(stmt).scalars().all())
+
+    stmt = select(Permission).where(Permission.name.in_(names))
+    permissions_map = {p.name: p for p in session.exec(stmt).all()}
+
+    # Una línea por fase en vez de una por fila
+    new_names = [name for name in names if name in created]
+    if new_names:
+        print(f"  + Created {len(new_names)} permission(s): {', '.join(new_names)}")
+    if len(new_names) < len(names):
+        print(f"  [OK] {len(names) - len(new_names)} permission(s) already exist")
 
     return permissions_map
 
@@ -85,99 +149,57 @@ def seed_roles(session: Session, permissions_map: dict[str, Permission]) -> dict
     Create default roles and assign permissions.
     Returns a dict mapping role names to Role objects.
     """
-    roles_data = [
-        (
-            DefaultRole.SUPERADMIN,
-            "Super Administrator",
-            "Full system access with all permissions",
-            ["manage:all"]
-        ),
-        (
-            DefaultRole.ADMIN,
-            "Administrator",
-            "Administrative access to manage users, roles, and content",
-            [
-                "manage:users", "manage:roles", "manage:permissions",
-                "manage:media"
-            ]
-        ),
-        (
-            DefaultRole.MODERATOR,
-            "Moderator",
-            "Can manage content and view users",
-            [
-                "read:users", "update:users",
-                "manage:media",
-                "read:roles"
-            ]
-        ),
-        (
-            DefaultRole.USER,
-            "User",
-            "Standard user with basic access",
-            [
-                "read:users",  # Can view their own profile
-                "create:media", "read:media", "update:media", "delete:media"  # Own media only
-            ]
-        ),
-        (
-            DefaultRole.GUEST,
-            "Guest",
-            "Limited read-only access",
-            [
-                "read:media"  # Public media only
-            ]
-        ),
+    role_names = [role_name for role_name, _, _, _ in ROLES_DATA]
+    role_rows = [
+        dict(
+            name=role_name,
+            display_name=display_name,
+            description=description,
+            is_system=True,  # System roles cannot be deleted
+            is_active=True,
+        )
+        for role_name, display_name, description, _ in ROLES_DATA
     ]
 
-    roles_map = {}
-
-    for role_name, display_name, description, permission_names in roles_data:
-        # Check if role already exists
-        stmt = select(Role).where(Role.name == role_name)
-        existing_role = session.exec(stmt).first()
-
-        if existing_role:
-            role = existing_role
-            roles_map[role_name] = role
-            print(f"  [OK] Role already exists: {role_name}")
-        else:
-            role = Role(
-                name=role_name,
-                display_name=display_name,
-                description=description,
-                is_system=True,  # System roles cannot be deleted
-                is_active=True,
-                created_at=datetime.utcnow(),
-                updated_at=datetime.utcnow()
-            )
-            session.add(role)
-            session.flush()  # Get the ID
-            roles_map[role_name] = role
-            print(f"  + Created role: {role_name}")
-
-        # Assign permissions to role
+    stmt = (
+        _insert_ignore(session, Role)
+        .values(role_rows)
+        .on_conflict_do_nothing(index_elements=["name"])
+        .returning(Role.name)
+    )
+    created = set(session.execute(stmt).scalars().all())
+
+    stmt = select(Role).where(Role.name.in_(role_names))
+    roles_map = {role.name: role for role in session.exec(stmt).all()}
+
+    new_roles = [role_name for role_name in role_names if role_name in created]
+    if new_roles:
+        print(f"  + Created {len(new_roles)} role(s): {', '.join(new_roles)}")
+    if len(new_roles) < len(role_names):
+        print(f"  [OK] {len(role_names) - len(new_roles)} role(s) already exist")
+
+    # Asignaciones: ON CONFLICT sobre la PK (role_id, permission_id)
+    pairs = []
+    missing = []
+    for role_name, _, _, permission_names in ROLES_DATA:
+        role = roles_map[role_name]
         for perm_name in permission_names:
             if perm_name not in permissions_map:
-                print(f"  [WARNING] Permission '{perm_name}' not found for role '{role_name}'")
+                missing.append(f"{role_name}/{perm_name}")
                 continue
+            pairs.append({"role_id": role.id, "permission_id": permissions_map[perm_name].id})
 
-            permission = permissions_map[perm_name]
+    if missing:
+        print(f"  [WARNING] Permissions not found (role/permission): {', '.join(missing)}")
 
-            # Check if role-permission assignment already exists
-            stmt = select(RolePermission).where(
-                RolePermission.role_id == role.id,
-                RolePermission.permission_id == permission.id
-            )
-            existing_assignment = session.exec(stmt).first()
-
-            if not existing_assignment:
-                role_perm = RolePermission(
-                    role_id=role.id,
-                    permission_id=permission.id
-                )
-                session.add(role_perm)
-                print(f"    > Assigned permission: {perm_name}")
+    if pairs:
+        stmt = (
+            _insert_ignore(session, RolePermission)
+            .values(pairs)
+            .on_conflict_do_nothing(index_elements=["role_id", "permission_id"])
+        )
+        result = session.execute(stmt)
+        print(f"    > Assigned {result.rowcount} new permission(s) to roles")
 
     return roles_map
 
@@ -231,7 +253,6 @@ def seed_system_organization(session: Session) -> None:
             is_active=True,
         )
         session.add(system_org)
-        session.flush()
         print(f"  + Created system organization: {slug}")
 
     # Crear superadmin si está configurado
@@ -240,7 +261,9 @@ def seed_system_organization(session: Session) -> None:
 
     if admin_email and admin_password:
         stmt = select(User).where(User.email == admin_email)
-        existing_user = session.exec(stmt).first()
+        # Sin autoflush: la org pendiente se inserta en el flush único de abajo
+        with session.no_autoflush:
+            existing_user = session.exec(stmt).first()
 
         if existing_user:
             print(f"  [OK] System admin already exists: {admin_email}")
@@ -256,15 +279,19 @@ def seed_system_organization(session: Session) -> None:
                 is_superadmin=True,
             )
             session.add(admin_user)
-            session.flush()
             print(f"  + Created system admin: {admin_email}")
 
-        # Crear membership owner en la org sistema
-        stmt = select(Membership).where(
-            Membership.user_id == admin_user.id,
-            Membership.organization_id == system_org.id,
-        )
-        existing_membership = session.exec(stmt).first()
+        # Un solo flush para org + admin nuevos (asigna ambos IDs)
+        session.flush()
+
+        # Crear membership owner en la org sistema (si org o admin son nuevos no puede existir)
+        existing_membership = None
+        if existing and existing_user:
+            stmt = select(Membership).where(
+                Membership.user_id == admin_user.id,
+                Membership.organization_id == system_org.id,
+            )
+            existing_membership = session.exec(stmt).first()
 
         if not existing_membership:
             membership = Membership(
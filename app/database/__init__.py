@@ -1,6 +1,12 @@
-from .connection import engine, get_session, init_db, Base
+from .connection import (
+    engine, get_session, init_db, Base,
+    metrics_engine, get_metrics_session, init_metrics_db,
+)
 
 # Alias para compatibilidad con módulos que usan get_db
 get_db = get_session
 
-__all__ = ["engine", "get_session", "get_db", "init_db", "Base"]
+__all__ = [
+    "engine", "get_session", "get_db", "init_db", "Base",
+    "metrics_engine", "get_metrics_session", "init_metrics_db",
+]
@@ -1,26 +1,54 @@
-import os
 from sqlmodel import Session, SQLModel, create_engine
 from sqlalchemy.orm import declarative_base
-from dotenv import load_dotenv
+
+from app.config import settings
 
 # Base para modelos que usan SQLAlchemy pura (ej: webhook)
 Base = declarative_base()
 
-# Load environment variables
-load_dotenv()
+# Get database URL from settings (misma fuente que METRICS_DATABASE_URL)
+DATABASE_URL = settings.DATABASE_URL
+
+# SQL_ECHO loguea todas las sentencias SQL — útil en debug, ruidoso/lento en prod.
+# Por defecto OFF; activar con SQL_ECHO=True (settings: true/1/yes).
+SQL_ECHO = settings.SQL_ECHO
+
+# Pool de conexiones (settings.DB_POOL_SIZE / DB_MAX_OVERFLOW): el default de
+# SQLAlchemy (5 + 10 overflow) se queda corto con muchos requests concurrentes.
+# pool_pre_ping descarta conexiones muertas (reinicio de Postgres, timeouts del
+# proxy) antes de usarlas.
+
+
+def _create_engine(url: str):
+    """Create an engine with the project-wide echo/pool settings."""
+    # For SQLite, add check_same_thread=False.
+    # SQLite usa su propio pool por archivo y no acepta pool_size/max_overflow.
+    if url.startswith("sqlite"):
+        return create_engine(
+            url,
+            echo=SQL_ECHO,
+            connect_args={"check_same_thread": False},
+            pool_pre_ping=True,
+        )
+    return create_engine(
+        url,
+        echo=SQL_ECHO,
+        pool_pre_ping=True,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+    )
 
-# Get database URL from environment
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./app.db")
 
 # Create engine
-# For SQLite, add check_same_thread=False
-# For production with PostgreSQL/MySQL, remove connect_args
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
-# SQL_ECHO loguea todas las sentencias SQL — útil en debug, ruidoso/lento en prod.
-# Por defecto OFF; activar con SQL_ECHO=True.
-SQL_ECHO = os.getenv("SQL_ECHO", "False").lower() == "true"
-engine = create_engine(DATABASE_URL, echo=SQL_ECHO, connect_args=connect_args)
+engine = _create_engine(DATABASE_URL)
 
+# Métricas (api_metrics): append-only y de alto volumen. Con METRICS_DATABASE_URL
+# se escriben/consultan en otra base (ej: Postgres/TimescaleDB dedicado) para no
+# inflar el WAL ni desplazar páginas calientes de la base principal.
+METRICS_DATABASE_URL = settings.METRICS_DATABASE_URL or DATABASE_URL
+metrics_engine = (
+    engine if METRICS_DATABASE_URL == DATABASE_URL else _create_engine(METRICS_DATABASE_URL)
+)
 
 def init_db() -> None:
     """
@@ -59,3 +87,22 @@ def get_session():
     """
     with Session(engine) as session:
         yield session
+
+
+def _get_metrics_session():
+    """Session on the dedicated metrics database (METRICS_DATABASE_URL)."""
+    with Session(metrics_engine) as session:
+        yield session
+
+
+# Misma base: alias de get_session (los overrides de dependencias siguen aplicando)
+get_metrics_session = get_session if metrics_engine is engine else _get_metrics_session
+
+
+def init_metrics_db() -> None:
+    """Create the metrics tables on the dedicated metrics database if they are missing."""
+    if metrics_engine is engine:
+        return
+    from app.models.metric import ApiMetric, ApiMetricBucket
+    ApiMetric.__table__.create(metrics_engine, checkfirst=True)
+    ApiMetricBucket.__table__.create(metrics_engine, checkfirst=True)
@@ -0,0 +1,60 @@
+"""
+Dynamic CORS Middleware
+CORS con los origins de la BD (cors_service) en lugar de una lista fija al arrancar.
+"""
+from typing import Callable, Dict, FrozenSet, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware.cors import CORSMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class DynamicCORSMiddleware:
+    """
+    Delega en un CORSMiddleware de Starlette construido para el conjunto de
+    origins vigente. Los origins salen de una copia local por worker
+    (`cached_origins`, sin I/O); al expirar o ser invalidada vía pub/sub se
+    recargan con `load_origins` en el threadpool.
+
+    Un CORSMiddleware por conjunto de origins: cambiar de lista a "*" (o al
+    revés) recalcula correctamente los headers simples y de preflight.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        cached_origins: Callable[[], Optional[List[str]]],
+        load_origins: Callable[[], List[str]],
+        **cors_options,
+    ):
+        self.app = app
+        self.cached_origins = cached_origins
+        self.load_origins = load_origins
+        self.cors_options = cors_options
+        self._delegates: Dict[FrozenSet[str], CORSMiddleware] = {}
+
+    def _delegate(self, origins: List[str]) -> CORSMiddleware:
+        key = frozenset(origins)
+        delegate = self._delegates.get(key)
+        if delegate is None:
+            if len(self._delegates) >= 16:
+                self._delegates.clear()
+            delegate = CORSMiddleware(self.app, allow_origins=list(origins), **self.cors_options)
+            self._delegates[key] = delegate
+        return delegate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Requests sin Origin no necesitan CORS
+        if not any(name == b"origin" for name, _ in scope["headers"]):
+            await self.app(scope, receive, send)
+            return
+
+        origins = self.cached_origins()
+        if origins is None:
+            origins = await run_in_threadpool(self.load_origins)
+
+        await self._delegate(origins)(scope, receive, send)
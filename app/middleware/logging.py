@@ -7,12 +7,14 @@ Automatically logs all HTTP requests with:
 - Response details (status code, duration)
 - Context propagation (request_id available in all logs)
 """
+import logging
 import time
-import uuid
+from secrets import token_hex
 from fastapi import Request
 from starlette.middleware.base import BaseHTTPMiddleware
 
 from app.utils.logger import get_structured_logger, LogContext
+from app.utils.request import get_client_ip, get_header
 
 
 logger = get_structured_logger(__name__)
@@ -31,32 +33,51 @@ class LoggingMiddleware(BaseHTTPMiddleware):
     """
 
     # Paths to exclude from logging (too noisy)
-    EXCLUDED_PATHS = {
+    EXCLUDED_PATHS = frozenset({
         "/health",
         "/metrics",
         "/docs",
         "/redoc",
         "/openapi.json"
-    }
+    })
+    # Sub-paths excluded too (ej: /docs/oauth2-redirect, assets estáticos)
+    EXCLUDED_PREFIXES = ("/docs/", "/static/")
 
     async def dispatch(self, request: Request, call_next):
         """Process request with logging"""
 
+        # scope["path"] evita re-parsear la URL en cada acceso
+        path = request.scope["path"]
+
         # Skip excluded paths
-        if request.url.path in self.EXCLUDED_PATHS:
+        if path in self.EXCLUDED_PATHS or path.startswith(self.EXCLUDED_PREFIXES):
             return await call_next(request)
 
-        # Generate unique request ID
-        request_id = str(uuid.uuid4())
+        # Generate unique request ID (64 bits alcanzan para trazas; más barato que uuid4)
+        request_id = token_hex(8)
 
         # Store request_id in request state (accessible in endpoints)
         request.state.request_id = request_id
 
+        # Nivel por encima de INFO: no armar contexto ni logs de start/complete
+        if not logger.isEnabledFor(logging.INFO):
+            try:
+                response = await call_next(request)
+            except Exception as e:
+                logger.error(
+                    "Request failed",
+                    request_id=request_id,
+                    method=request.scope["method"],
+                    path=path,
+                    error_type=type(e).__name__,
+                    error_message=str(e),
+                )
+                raise
+            response.headers["X-Request-ID"] = request_id
+            return response
+
         # Get client info
-        client_ip = request.client.host if request.client else "unknown"
-        forwarded_for = request.headers.get("X-Forwarded-For")
-        if forwarded_for:
-            client_ip = forwarded_for.split(",")[0].strip()
+        client_ip = get_client_ip(request)
 
         # Get user info (if authenticated)
         user_id = getattr(request.state, "user_id", None)
@@ -68,15 +89,15 @@ class LoggingMiddleware(BaseHTTPMiddleware):
         # All logs within this context will include these fields
         with LogContext(
             request_id=request_id,
-            method=request.method,
-            path=request.url.path,
+            method=request.scope["method"],
+            path=path,
             client_ip=client_ip,
             user_id=user_id
         ):
             # Log request start
             logger.info(
                 "Request started",
-                user_agent=request.headers.get("user-agent", "unknown")[:100]
+                user_agent=(get_header(request, b"user-agent") or "unknown")[:100]
             )
 
             # Process request
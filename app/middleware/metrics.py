@@ -1,11 +1,90 @@
+import asyncio
 import time
-from typing import Callable
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
-from sqlmodel import Session
+from sqlalchemy import insert
 
 from app.models.metric import ApiMetric
-from app.database import engine
+from app.database import metrics_engine
+from app.utils.request import get_header
+
+# Las métricas se encolan en memoria y un task de fondo las inserta por lotes,
+# así el request no paga un round-trip a la BD.
+METRICS_QUEUE_MAXSIZE = 10000
+METRICS_BATCH_SIZE = 500
+METRICS_FLUSH_INTERVAL = 0.5  # segundos máximos que una métrica espera en cola
+
+_metric_queue: Optional[asyncio.Queue] = None
+_writer_task: Optional[asyncio.Task] = None
+
+
+def _flush_metrics(rows: List[Dict]) -> None:
+    """Insert a batch of metrics with a single executemany INSERT"""
+    # Core, sin Session: no hace falta unit-of-work para un insert fire-and-forget
+    with metrics_engine.begin() as conn:
+        conn.execute(insert(ApiMetric), rows)
+
+
+async def _metrics_writer(queue: asyncio.Queue) -> None:
+    """
+    Drain the queue, flushing up to METRICS_BATCH_SIZE rows at a time.
+
+    A None item is the shutdown sentinel: the current batch is flushed and
+    the writer exits.
+    """
+    loop = asyncio.get_running_loop()
+    running = True
+    while running:
+        row = await queue.get()
+        if row is None:
+            break
+        rows = [row]
+        deadline = loop.time() + METRICS_FLUSH_INTERVAL
+        while len(rows) < METRICS_BATCH_SIZE:
+            try:
+                row = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    row = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            if row is None:
+                running = False
+                break
+            rows.append(row)
+
+        try:
+            # El engine es síncrono: el INSERT corre en el threadpool
+            await loop.run_in_executor(None, _flush_metrics, rows)
+        except Exception as e:
+            print(f"[WARNING] Failed to store {len(rows)} metric(s): {e}")
+
+
+async def start_metrics_writer() -> None:
+    """Create the metrics queue and start the background writer (app startup)"""
+    global _metric_queue, _writer_task
+    if _writer_task is not None:
+        return
+    _metric_queue = asyncio.Queue(maxsize=METRICS_QUEUE_MAXSIZE)
+    _writer_task = asyncio.create_task(_metrics_writer(_metric_queue))
+
+
+async def stop_metrics_writer() -> None:
+    """Flush whatever is still queued and stop the background writer (app shutdown)"""
+    global _metric_queue, _writer_task
+    if _writer_task is None:
+        return
+    queue, task = _metric_queue, _writer_task
+    # Desde aquí los requests nuevos ya no encolan
+    _metric_queue = None
+    _writer_task = None
+    await queue.put(None)
+    await task
 
 
 class MetricsMiddleware(BaseHTTPMiddleware):
@@ -19,21 +98,27 @@ class MetricsMiddleware(BaseHTTPMiddleware):
     - User ID (if authenticated)
     - Error information (if failed)
 
-    Metrics are stored asynchronously to avoid impacting performance.
+    Metrics are queued in memory and written in batches by a background task
+    (see start_metrics_writer), so storing them never blocks the request.
     """
 
     # Paths to exclude from metrics (to avoid noise)
-    EXCLUDED_PATHS = {
+    EXCLUDED_PATHS = frozenset({
         "/metrics",  # Prometheus endpoint
         "/health",   # Health check
         "/docs",     # Swagger UI
         "/redoc",    # ReDoc
         "/openapi.json"  # OpenAPI schema
-    }
+    })
+    # Sub-paths (Swagger assets, archivos estáticos)
+    EXCLUDED_PREFIXES = ("/docs/", "/static/")
 
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        # scope["path"] evita re-parsear la URL en cada acceso
+        path = request.scope["path"]
+
         # Skip excluded paths
-        if request.url.path in self.EXCLUDED_PATHS:
+        if path in self.EXCLUDED_PATHS or path.startswith(self.EXCLUDED_PREFIXES):
             return await call_next(request)
 
         # Start timer
@@ -57,17 +142,18 @@ class MetricsMiddleware(BaseHTTPMiddleware):
             duration_ms = (time.time() - start_time) * 1000
 
             # Get client info
-            client_ip = request.client.host if request.client else None
-            user_agent = request.headers.get("user-agent")
+            client = request.scope.get("client")
+            client_ip = client[0] if client else None
+            user_agent = get_header(request, b"user-agent")
 
             # Get user ID if authenticated (from request.state if available)
             user_id = getattr(request.state, "user_id", None)
 
-            # Store metric in database (in background to avoid blocking)
+            # Queue metric for the background writer (never blocks)
             try:
                 self._store_metric(
-                    method=request.method,
-                    path=request.url.path,
+                    method=request.scope["method"],
+                    path=path,
                     status_code=status_code,
                     duration_ms=duration_ms,
                     client_ip=client_ip,
@@ -94,18 +180,26 @@ class MetricsMiddleware(BaseHTTPMiddleware):
         error_type: str = None,
         error_message: str = None
     ):
-        """Store metric in database"""
-        with Session(engine) as session:
-            metric = ApiMetric(
-                method=method,
-                path=path,
-                status_code=status_code,
-                duration_ms=duration_ms,
-                client_ip=client_ip,
-                user_agent=user_agent,
-                user_id=user_id,
-                error_type=error_type,
-                error_message=error_message
-            )
-            session.add(metric)
-            session.commit()
+        """
+        Queue metric for the background writer.
+
+        If the writer is not running (no app lifespan, e.g. scripts) or the
+        queue is full, the metric is dropped instead of blocking the request.
+        """
+        if _metric_queue is None:
+            return
+        try:
+            _metric_queue.put_nowait({
+                "method": method,
+                "path": path,
+                "status_code": status_code,
+                "duration_ms": duration_ms,
+                "client_ip": client_ip,
+                "user_agent": user_agent[:500] if user_agent else user_agent,
+                "user_id": user_id,
+                "error_type": error_type,
+                "error_message": error_message,
+                "timestamp": datetime.utcnow(),
+            })
+        except asyncio.QueueFull:
+            print("[WARNING] Metrics queue full, dropping metric")
@@ -6,12 +6,14 @@ Si el request incluye Bearer token y se puede resolver la organización,
 usa el `api_rate_limit` del plan; si no, usa el límite por IP.
 """
 import logging
+import orjson
 from fastapi import Request
 from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import JSONResponse
+from starlette.responses import Response
 
 from app.services.rate_limiter import rate_limiter
 from app.config import settings
+from app.utils.request import get_client_ip, get_header
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +39,8 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         self.default_limit = default_limit
         self.default_window = default_window
         self.exclude_paths = exclude_paths or ["/health", "/metrics", "/docs", "/openapi.json", "/redoc"]
+        # Tupla para str.startswith(tuple): una sola llamada en C
+        self._exclude_prefixes = tuple(self.exclude_paths)
 
         # Path-specific limits (más restrictivos para endpoints pesados y auth)
         self.path_limits = {
@@ -50,24 +54,28 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
             # Media
             "/media/upload": (30, 60),
         }
+        # Prefijo más largo primero (el más específico gana)
+        self._sorted_patterns = sorted(
+            self.path_limits.items(), key=lambda item: -len(item[0])
+        )
+        # path -> (limit, window) | None; el mapping es estático tras el init
+        self._limit_cache: dict = {}
+        # (limit, window) -> parte estática del body 429 ya serializada
+        self._429_cache: dict[tuple[int, int], bytes] = {}
 
     # ------------------------------------------------------------------ #
     # Helpers
     # ------------------------------------------------------------------ #
 
     def _get_client_ip(self, request: Request) -> str:
-        client_ip = request.client.host if request.client else "unknown"
-        forwarded_for = request.headers.get("X-Forwarded-For")
-        if forwarded_for:
-            client_ip = forwarded_for.split(",")[0].strip()
-        return client_ip
+        return get_client_ip(request)
 
     def _resolve_tenant_limit(self, request: Request):
         """
         Intenta resolver org_id y rate limit del plan desde el Bearer token.
         Retorna (rate_key_suffix, limit, window) o None si no aplica.
         """
-        auth_header = request.headers.get("authorization", "")
+        auth_header = get_header(request, b"authorization") or ""
         if not auth_header.lower().startswith("bearer "):
             return None
 
@@ -134,8 +142,10 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
     # ------------------------------------------------------------------ #
 
     async def dispatch(self, request: Request, call_next):
+        path = request.scope["path"]
+
         # Skip excluded paths
-        if any(request.url.path.startswith(path) for path in self.exclude_paths):
+        if path.startswith(self._exclude_prefixes):
             return await call_next(request)
 
         if not settings.REDIS_ENABLED:
@@ -144,10 +154,10 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         client_ip = self._get_client_ip(request)
 
         # 1. Path-specific limit
-        path_limit = self._get_limit_for_path(request.url.path)
+        path_limit = self._get_limit_for_path(path)
         if path_limit:
             limit, window = path_limit
-            rate_key = f"ip:{client_ip}:{request.url.path}"
+            rate_key = f"ip:{client_ip}:{path}"
         else:
             # 2. Per-tenant limit
             tenant_info = self._resolve_tenant_limit(request)
@@ -163,18 +173,15 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         allowed, info = await rate_limiter.check_rate_limit(
             key=rate_key, limit=limit, window=window
         )
+        # @rate_limit en el endpoint no vuelve a contar la misma key con el
+        # mismo límite (uno más estricto sí se aplica)
+        request.state.rate_limit_check = (rate_key, limit, window)
 
         if not allowed:
-            return JSONResponse(
+            return Response(
+                content=self._429_body(limit, window, info),
                 status_code=429,
-                content={
-                    "error": "Rate limit exceeded",
-                    "message": f"Too many requests. Limit: {limit} requests per {window} seconds",
-                    "limit": info["limit"],
-                    "current_usage": info["current_usage"],
-                    "retry_after": info["retry_after"],
-                    "reset_at": info["reset_at"],
-                },
+                media_type="application/json",
                 headers={
                     "X-RateLimit-Limit": str(info["limit"]),
                     "X-RateLimit-Remaining": "0",
@@ -192,11 +199,39 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
 
         return response
 
+    def _429_body(self, limit: int, window: int, info: dict) -> bytes:
+        """Body JSON del 429: prefijo estático cacheado + campos dinámicos."""
+        prefix = self._429_cache.get((limit, window))
+        if prefix is None:
+            static = orjson.dumps({
+                "error": "Rate limit exceeded",
+                "message": f"Too many requests. Limit: {limit} requests per {window} seconds",
+                "limit": info["limit"],
+            })
+            # Quitar la "}" final para concatenar los campos por request
+            prefix = static[:-1] + b","
+            self._429_cache[(limit, window)] = prefix
+        return prefix + b'"current_usage":%d,"retry_after":%d,"reset_at":%d}' % (
+            info["current_usage"], info["retry_after"], info["reset_at"]
+        )
+
+    _LIMIT_CACHE_MAXSIZE = 10_000
+
     def _get_limit_for_path(self, path: str):
         """Retorna (limit, window) si hay un path-specific limit, None si no."""
-        if path in self.path_limits:
-            return self.path_limits[path]
-        for pattern, limits in self.path_limits.items():
-            if path.startswith(pattern):
-                return limits
-        return None
+        try:
+            return self._limit_cache[path]
+        except KeyError:
+            pass
+
+        result = self.path_limits.get(path)
+        if result is None:
+            for pattern, limits in self._sorted_patterns:
+                if path.startswith(pattern):
+                    result = limits
+                    break
+
+        # Acotado: paths con IDs (/tasks/123) podrían crecer sin límite
+        if len(self._limit_cache) < self._LIMIT_CACHE_MAXSIZE:
+            self._limit_cache[path] = result
+        return result
@@ -3,8 +3,8 @@ from .organization import Organization, Membership
 from .refresh_token import RefreshToken
 from .invitation import Invitation
 from .cors_origin import CorsOrigin
-from .metric import ApiMetric
-from .task import Task
+from .metric import ApiMetric, ApiMetricBucket
+from .task import Task, TaskStatus
 from .webhook import WebhookSubscription, WebhookDelivery, WebhookEventType
 
 # Dominio de seguros
@@ -17,7 +17,7 @@ from .seguros import (
 __all__ = [
     "User", "Organization", "Membership",
     "RefreshToken", "Invitation",
-    "CorsOrigin", "ApiMetric", "Task",
+    "CorsOrigin", "ApiMetric", "ApiMetricBucket", "Task", "TaskStatus",
     "WebhookSubscription", "WebhookDelivery", "WebhookEventType",
     # Seguros
     "Client", "Vehicle", "Insurer", "Policy", "Installment",
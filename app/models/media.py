@@ -2,19 +2,43 @@
 Media model for storing multimedia files metadata.
 Actual files are stored in S3/MinIO or local filesystem.
 """
+from array import array
 from datetime import datetime
 from typing import Optional, List
 from sqlmodel import Field, SQLModel, Column
 from sqlalchemy import Text
+from sqlalchemy.types import TypeDecorator
 from app.models.mixins import SoftDeleteMixin
 
 # Conditional import for pgvector support
+# Embeddings are stored as halfvec (FP16): half the bytes per HNSW distance computation
 try:
-    from pgvector.sqlalchemy import Vector
+    from pgvector.sqlalchemy import HALFVEC
     PGVECTOR_AVAILABLE = True
 except ImportError:
     PGVECTOR_AVAILABLE = False
-    Vector = None
+    HALFVEC = None
+
+
+if PGVECTOR_AVAILABLE:
+    class CompactHalfVec(TypeDecorator):
+        """
+        HALFVEC que se carga como array('f') (float32 contiguo, ~2KB por vector
+        de 512) en lugar de una lista de 512 floats boxeados (~16KB).
+        Los schemas Pydantic (List[float]) lo aceptan tal cual.
+        """
+        impl = HALFVEC
+        cache_ok = True
+
+        def process_bind_param(self, value, dialect):
+            # pgvector acepta list o ndarray, no array.array
+            return list(value) if isinstance(value, array) else value
+
+        def process_result_value(self, value, dialect):
+            if value is None:
+                return None
+            # El result processor de HALFVEC devuelve HalfVector (no iterable)
+            return array("f", value.to_list() if hasattr(value, "to_list") else value)
 
 
 class Media(SoftDeleteMixin, SQLModel, table=True):
@@ -31,6 +55,9 @@ class Media(SoftDeleteMixin, SQLModel, table=True):
     storage_path: str = Field(unique=True, index=True)  # Path in storage (S3 key or local path)
     file_size: int  # File size in bytes
     mime_type: Optional[str] = None  # MIME type (e.g., image/jpeg)
+    # BLAKE2b-128 (hex) del contenido, calculado en la misma pasada que valida
+    # el tamaño al subir; NULL en archivos subidos antes de la columna
+    content_hash: Optional[str] = Field(default=None, max_length=32)
 
     # File type categorization
     file_type: str = Field(index=True)  # image, video, audio, document, other
@@ -47,7 +74,7 @@ class Media(SoftDeleteMixin, SQLModel, table=True):
     # - Audio embeddings (Resemblyzer, VGGish, etc.)
     embedding: Optional[List[float]] = Field(
         default=None,
-        sa_column=Column(Vector(512)) if PGVECTOR_AVAILABLE else Column(Text)
+        sa_column=Column(CompactHalfVec(512)) if PGVECTOR_AVAILABLE else Column(Text)
     )
 
     # Ownership
@@ -63,7 +90,7 @@ class Media(SoftDeleteMixin, SQLModel, table=True):
     # download_url: str (computed)
 
     # Status
-    is_public: bool = Field(default=False)  # Public access without authentication
+    is_public: bool = Field(default=False, index=True)  # Public access without authentication
     is_active: bool = Field(default=True)
 
     # Timestamps
@@ -77,6 +104,7 @@ class MediaCreate(SQLModel):
     storage_path: str
     file_size: int
     mime_type: Optional[str] = None
+    content_hash: Optional[str] = None
     file_type: str
     description: Optional[str] = None
     alt_text: Optional[str] = None
@@ -94,6 +122,7 @@ class MediaRead(SQLModel):
     storage_path: str
     file_size: int
     mime_type: Optional[str]
+    content_hash: Optional[str] = None
     file_type: str
     description: Optional[str]
     alt_text: Optional[str]
@@ -104,6 +133,7 @@ class MediaRead(SQLModel):
     is_public: bool
     is_active: bool
     created_at: datetime
+    updated_at: Optional[datetime] = None
 
     # URLs (computed, not in DB)
     url: Optional[str] = None
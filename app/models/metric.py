@@ -1,19 +1,32 @@
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, Optional
+from sqlalchemy import Column, Index
 from sqlmodel import Field, SQLModel
 
+from app.models.types import JSONBCompat
+
 
 class ApiMetric(SQLModel, table=True):
     """
     API metrics stored in database for historical analysis.
     Complementary to Prometheus for long-term analytics.
+
+    En PostgreSQL la migración 68ace68aecaf particiona la tabla por mes
+    (PK (id, timestamp)); ver MetricsService.ensure_partitions.
     """
     __tablename__ = "api_metrics"
+    __table_args__ = (
+        # WHERE timestamp >= ? GROUP BY path, method (index-only scan en Postgres)
+        Index(
+            "ix_metric_time_endpoint", "timestamp", "path", "method", "status_code",
+            postgresql_include=["duration_ms"],
+        ),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
 
     # Request information
-    method: str = Field(index=True, description="HTTP method (GET, POST, etc.)")
+    method: str = Field(description="HTTP method (GET, POST, etc.)")
     path: str = Field(index=True, description="Request path/endpoint")
     status_code: int = Field(index=True, description="HTTP status code")
 
@@ -39,6 +52,31 @@ class ApiMetric(SQLModel, table=True):
     )
 
 
+class ApiMetricBucket(SQLModel, table=True):
+    """
+    5-minute rollup of api_metrics per endpoint.
+
+    Filled by MetricsService.rollup_buckets (ARQ cron, every 5 minutes) with
+    only complete buckets; per-endpoint queries over windows of an hour or
+    more read these rows instead of scanning the raw metrics.
+
+    duration_sketch is a DurationSketch (app.utils.duration_sketch) of the
+    bucket's durations: summary percentiles merge these instead of sorting
+    raw durations. NULL for buckets rolled up before the column existed.
+    """
+    __tablename__ = "api_metrics_5m"
+
+    bucket: datetime = Field(primary_key=True, description="Bucket start (UTC, 5-minute aligned)")
+    method: str = Field(primary_key=True)
+    path: str = Field(primary_key=True)
+
+    count: int = Field(description="Requests in the bucket")
+    sum_ms: float = Field(description="Sum of duration_ms")
+    sum_sq_ms: float = Field(description="Sum of duration_ms squared (variance)")
+    errors: int = Field(description="Requests with status_code >= 400")
+    duration_sketch: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSONBCompat))
+
+
 # Pydantic schemas for API
 class ApiMetricRead(SQLModel):
     """Schema for reading metric data"""
@@ -4,6 +4,7 @@ Supports flexible role management with custom permissions.
 """
 from datetime import datetime
 from typing import Optional, List
+from sqlalchemy import Column, Computed, DateTime, String, func
 from sqlmodel import Field, SQLModel, Relationship
 from enum import Enum
 
@@ -15,7 +16,10 @@ class UserRole(SQLModel, table=True):
 
     user_id: int = Field(foreign_key="users.id", primary_key=True)
     role_id: int = Field(foreign_key="roles.id", primary_key=True)
-    assigned_at: datetime = Field(default_factory=datetime.utcnow)
+    assigned_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime(timezone=True), server_default=func.now(), nullable=False),
+    )
 
 
 class RolePermission(SQLModel, table=True):
@@ -71,12 +75,21 @@ class Role(SQLModel, table=True):
     is_system: bool = Field(default=False)
     is_active: bool = Field(default=True)
 
-    # Timestamps
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    # Timestamps (asignados por la BD)
+    created_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime(timezone=True), server_default=func.now(), nullable=False),
+    )
+    updated_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+        ),
+    )
 
     # Relationships (defined with strings to avoid circular imports)
-    # permissions: List["Permission"] = Relationship(back_populates="roles", link_model=RolePermission)
+    # Solo lectura eager (GET /roles/{id}); las asignaciones se hacen sobre RolePermission
+    permissions: List["Permission"] = Relationship(link_model=RolePermission)
 
 
 class Permission(SQLModel, table=True):
@@ -87,13 +100,24 @@ class Permission(SQLModel, table=True):
     __tablename__ = "permissions"
 
     id: Optional[int] = Field(default=None, primary_key=True)
-    name: str = Field(unique=True, index=True)  # e.g., "create:users", "read:media"
+    # e.g., "create:users", "read:media" — columna generada por la BD a partir
+    # de action y resource (nunca se asigna desde Python)
+    name: Optional[str] = Field(
+        default=None,
+        sa_column=Column(
+            String, Computed("action || ':' || resource", persisted=True),
+            unique=True, index=True, nullable=False,
+        ),
+    )
     action: str  # create, read, update, delete, manage
     resource: str  # users, roles, media, etc.
     description: Optional[str] = None
 
-    # Timestamps
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    # Timestamps (asignado por la BD)
+    created_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime(timezone=True), server_default=func.now(), nullable=False),
+    )
 
     # Relationships
     # roles: List[Role] = Relationship(back_populates="permissions", link_model=RolePermission)
@@ -164,3 +188,8 @@ class AssignPermissionsRequest(SQLModel):
     """Schema for assigning permissions to role"""
     role_id: int
     permission_ids: List[int]
+
+
+# PermissionRead se declara después de RoleReadWithPermissions: resolver la
+# referencia ahora y no en el primer request a /roles/{id}
+RoleReadWithPermissions.model_rebuild()
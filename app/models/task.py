@@ -1,11 +1,21 @@
 """
 Task model for tracking async job status
 """
+import enum
 from datetime import datetime
 from typing import Optional, Dict, Any
 from sqlmodel import SQLModel, Field, Column
-from sqlalchemy import JSON
+from sqlalchemy import DateTime, Enum as SQLEnum, Index, SmallInteger, func, text
 from app.models.mixins import SoftDeleteMixin
+from app.models.types import JSONBCompat
+
+
+class TaskStatus(str, enum.Enum):
+    """Task lifecycle states (tipo ENUM nativo task_status en Postgres)"""
+    PENDING = "pending"
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+    FAILED = "failed"
 
 
 class Task(SoftDeleteMixin, SQLModel, table=True):
@@ -22,6 +32,19 @@ class Task(SoftDeleteMixin, SQLModel, table=True):
     7. Backend sends WebSocket notification to user
     """
     __tablename__ = "tasks"
+    __table_args__ = (
+        # WHERE status = ? AND user_id = ? ORDER BY created_at (index-only scan en Postgres)
+        Index(
+            "ix_tasks_status_user_created", "status", "user_id", "created_at",
+            postgresql_include=["task_id", "progress"],
+        ),
+        # Solo tareas elegibles para despacho/reintento (índice parcial pequeño)
+        Index(
+            "ix_tasks_retry_ready", "created_at",
+            postgresql_where=text("status = 'pending' AND retry_count < max_retries"),
+            sqlite_where=text("status = 'pending' AND retry_count < max_retries"),
+        ),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
 
@@ -30,25 +53,35 @@ class Task(SoftDeleteMixin, SQLModel, table=True):
     task_type: str = Field(index=True)  # 'media_processing', 'email_sending', etc.
 
     # Task status
-    status: str = Field(default="pending", index=True)  # pending, processing, completed, failed
-    progress: int = Field(default=0)  # 0-100
+    status: TaskStatus = Field(
+        default=TaskStatus.PENDING,
+        sa_column=Column(
+            SQLEnum(TaskStatus, name="task_status", values_callable=lambda e: [m.value for m in e]),
+            nullable=False,
+            index=True,
+        ),
+    )
+    progress: int = Field(default=0, sa_column=Column(SmallInteger, nullable=False, default=0))  # 0-100
 
     # Task details
-    task_data: Dict[str, Any] = Field(default={}, sa_column=Column(JSON))  # Input parameters
-    result: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSON))  # Output result
+    task_data: Dict[str, Any] = Field(default={}, sa_column=Column(JSONBCompat))  # Input parameters
+    result: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSONBCompat))  # Output result
     error: Optional[str] = Field(default=None)  # Error message if failed
 
     # Ownership
     user_id: Optional[int] = Field(default=None, foreign_key="users.id", index=True)
 
     # Timestamps
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime(timezone=True), server_default=func.now(), nullable=False),
+    )
     started_at: Optional[datetime] = Field(default=None)
     completed_at: Optional[datetime] = Field(default=None)
 
-    # Retry management
-    retry_count: int = Field(default=0)
-    max_retries: int = Field(default=3)
+    # Retry management (SMALLINT: tasks es la tabla más caliente, filas más angostas)
+    retry_count: int = Field(default=0, sa_column=Column(SmallInteger, nullable=False, default=0))
+    max_retries: int = Field(default=3, sa_column=Column(SmallInteger, nullable=False, default=3))
 
 
 class TaskCreate(SQLModel):
@@ -64,7 +97,7 @@ class TaskRead(SQLModel):
     id: int
     task_id: str
     task_type: str
-    status: str
+    status: TaskStatus
     progress: int
     task_data: Dict[str, Any]
     result: Optional[Dict[str, Any]]
@@ -78,7 +111,7 @@ class TaskRead(SQLModel):
 
 class TaskUpdate(SQLModel):
     """Schema for updating task status"""
-    status: Optional[str] = None
+    status: Optional[TaskStatus] = None
     progress: Optional[int] = None
     result: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
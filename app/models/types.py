@@ -0,0 +1,9 @@
+"""
+Tipos de columna compartidos entre modelos.
+"""
+from sqlalchemy import JSON
+from sqlalchemy.dialects.postgresql import JSONB
+
+# JSONB en PostgreSQL (binario, parseado una vez al escribir e indexable con
+# GIN); JSON genérico en el resto de dialectos (SQLite en tests/dev)
+JSONBCompat = JSON().with_variant(JSONB(), "postgresql")
@@ -1,6 +1,7 @@
 from datetime import datetime
 from typing import Optional, List
 import re
+from sqlalchemy import Column, DateTime, func
 from sqlmodel import Field, SQLModel, Relationship
 from pydantic import field_validator
 from app.models.mixins import SoftDeleteMixin
@@ -33,10 +34,18 @@ class User(SoftDeleteMixin, SQLModel, table=True):
     is_verified: bool = Field(default=False)  # Email verification status
     is_superadmin: bool = Field(default=False)  # Acceso global al admin panel
 
-    # Timestamps
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
-    last_login: Optional[datetime] = None
+    # Timestamps (los asigna la BD: server_default/onupdate, TIMESTAMPTZ en Postgres)
+    created_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime(timezone=True), server_default=func.now(), nullable=False),
+    )
+    updated_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+        ),
+    )
+    last_login: Optional[datetime] = Field(default=None, sa_column=Column(DateTime(timezone=True)))
 
     # Relationships (commented to avoid circular imports, used in services)
     # roles: List["Role"] = Relationship(back_populates="users", link_model=UserRole)
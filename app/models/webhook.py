@@ -3,12 +3,13 @@ Webhook models for external integrations
 
 Allows external systems to subscribe to events in the application.
 """
-from sqlalchemy import Column, Integer, String, Boolean, JSON, DateTime, Text, Enum as SQLEnum
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Integer, String, Boolean, JSON, DateTime, Text, Index, Enum as SQLEnum
+from sqlalchemy.sql import func, text
 from datetime import datetime
 import enum
 
 from app.database import Base
+from app.models.types import JSONBCompat
 
 
 class WebhookEventType(str, enum.Enum):
@@ -51,6 +52,16 @@ class WebhookSubscription(Base):
     Stores webhook endpoints that should be called when specific events occur.
     """
     __tablename__ = "webhook_subscriptions"
+    __table_args__ = (
+        # Fan-out de eventos: solo suscripciones activas (índice parcial pequeño)
+        Index(
+            "ix_webhook_subscriptions_active", "active",
+            postgresql_where=text("active = true"),
+            sqlite_where=text("active = 1"),
+        ),
+        # WHERE events @> '["user.created"]' (contains) usa el GIN en Postgres
+        Index("ix_webhook_subscriptions_events_gin", "events", postgresql_using="gin"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -60,7 +71,7 @@ class WebhookSubscription(Base):
     url = Column(String(2048), nullable=False)  # Destination URL
 
     # Events to listen to
-    events = Column(JSON, nullable=False)  # List of event types: ["user.created", "task.completed"]
+    events = Column(JSONBCompat, nullable=False)  # List of event types: ["user.created", "task.completed"]
 
     # Security
     secret = Column(String(255), nullable=False)  # HMAC secret for signature
@@ -105,11 +116,15 @@ class WebhookDelivery(Base):
     id = Column(Integer, primary_key=True, index=True)
 
     # Reference
-    subscription_id = Column(Integer, nullable=False, index=True)
-    event_type = Column(String(100), nullable=False, index=True)
+    subscription_id = Column(Integer, nullable=False)  # ver ix_webhook_deliveries_subscription_created
+    event_type = Column(
+        SQLEnum(WebhookEventType, name="webhook_event_type", values_callable=lambda e: [m.value for m in e]),
+        nullable=False,
+        index=True,
+    )
 
     # Payload
-    payload = Column(JSON, nullable=False)  # The data sent
+    payload = Column(JSONBCompat, nullable=False)  # The data sent
 
     # Request details
     url = Column(String(2048), nullable=False)
@@ -137,3 +152,11 @@ class WebhookDelivery(Base):
     def __repr__(self):
         status = "✓" if self.success else "✗"
         return f"<WebhookDelivery(id={self.id}, subscription_id={self.subscription_id}, event='{self.event_type}', status={status})>"
+
+
+# Últimas entregas por suscripción: WHERE subscription_id = ? ORDER BY created_at DESC
+Index(
+    "ix_webhook_deliveries_subscription_created",
+    WebhookDelivery.subscription_id,
+    WebhookDelivery.created_at.desc(),
+)
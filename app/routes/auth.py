@@ -5,6 +5,7 @@ verificación de email, password reset, aceptar invitación.
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 from sqlmodel import Session, select
 from typing import Optional
 import logging
@@ -16,8 +17,9 @@ from app.models.refresh_token import RefreshToken
 from app.services.user_service import user_service
 from app.services.organization_service import organization_service
 from app.services.invitation_service import invitation_service
+from app.services.role_service import role_service
 from app.core.security import (
-    verify_password, get_password_hash, create_access_token,
+    verify_password_async, hash_password_async, password_needs_rehash, create_access_token,
     create_refresh_token, hash_token,
     create_verification_token, create_password_reset_token,
     verify_purpose_token,
@@ -56,6 +58,18 @@ class ResendVerificationRequest(BaseModel):
     email: str
 
 
+def _create_user_access_token(session: Session, user: User) -> str:
+    """Access token con roles/permisos/flags embebidos como claims."""
+    claims = role_service.get_user_token_claims(session, user)
+    return create_access_token(data={"sub": user.email, **claims})
+
+
+# Los handlers async (los que esperan hashing, email o broadcast) no tocan la
+# Session directamente: las consultas van al threadpool para no bloquear el
+# event loop. Los que sólo hacen I/O de BD son `def` y FastAPI ya los corre
+# en el threadpool.
+
+
 # --- Register ---
 
 @router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED)
@@ -67,19 +81,33 @@ async def register(
     Registra un usuario nuevo. Crea User + Organization + Membership(owner).
     Envía email de verificación si SMTP está configurado.
     """
-    existing_user = user_service.get_user_by_email(session, user_data.email)
+    existing_user = await run_in_threadpool(user_service.get_user_by_email, session, user_data.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered",
         )
 
+    hashed_password = await hash_password_async(user_data.password)
+    user_read = await run_in_threadpool(_create_local_account, session, user_data, hashed_password)
+
+    # Enviar email de verificación (encolado o directo)
+    await _send_verification_email(user_read.email, user_read.name)
+
+    # Broadcast via WebSocket (una sola validación para broadcast y respuesta)
+    await user_service.channel.broadcast_created(user_read.model_dump())
+
+    return user_read
+
+
+def _create_local_account(session: Session, user_data: UserRegister, hashed_password: str) -> UserRead:
+    """User + Organization + Membership(owner). Corre en el threadpool."""
     user = User(
         email=user_data.email,
         name=user_data.name,
         provider="local",
         provider_user_id=None,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=hashed_password,
         is_active=True,
         is_verified=False,
     )
@@ -100,14 +128,6 @@ async def register(
         session, name=org_name, slug=slug, owner_user_id=user.id
     )
     session.refresh(user)
-
-    # Enviar email de verificación (encolado o directo)
-    await _send_verification_email(user.email, user.name)
-
-    # Broadcast via WebSocket
-    user_dict = UserRead.model_validate(user).model_dump()
-    await user_service.channel.broadcast_created(user_dict)
-
     return UserRead.model_validate(user)
 
 
@@ -123,7 +143,7 @@ async def login(
     Login con email y password.
     Retorna access_token (corto) + refresh_token (30 días).
     """
-    user = user_service.get_user_by_email(session, credentials.email)
+    user = await run_in_threadpool(user_service.get_user_by_email, session, credentials.email)
 
     if not user:
         raise HTTPException(
@@ -138,7 +158,7 @@ async def login(
             detail=f"This account uses {user.provider} authentication.",
         )
 
-    if not verify_password(credentials.password, user.hashed_password):
+    if not await verify_password_async(credentials.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -151,12 +171,24 @@ async def login(
             detail="Inactive user account",
         )
 
-    # Access token
-    access_token = create_access_token(data={"sub": user.email})
+    new_hash = None
+    if password_needs_rehash(user.hashed_password):
+        new_hash = await hash_password_async(credentials.password)
+
+    return await run_in_threadpool(
+        _issue_login_tokens, session, user, request.headers.get("user-agent"), new_hash
+    )
+
+
+def _issue_login_tokens(
+    session: Session, user: User, user_agent: Optional[str], new_hash: Optional[str]
+) -> TokenPair:
+    """Tokens + last_login de un login ya verificado. Corre en el threadpool."""
+    # Access token (con claims RBAC)
+    access_token = _create_user_access_token(session, user)
 
     # Refresh token — persistir en BD
     raw_refresh, token_hash, expires_at = create_refresh_token()
-    user_agent = request.headers.get("user-agent")
     rt = RefreshToken(
         token_hash=token_hash,
         user_id=user.id,
@@ -165,15 +197,17 @@ async def login(
     )
     session.add(rt)
 
-    # Update last login
-    user.last_login = datetime.utcnow()
-    session.add(user)
-    session.commit()
-
-    # Organización principal del usuario (primera membresía) para el portal
+    # Organización principal del usuario (primera membresía) para el portal.
+    # Se resuelve antes del commit: después el objeto user queda expirado y
+    # cada acceso dispararía otro SELECT.
     orgs = organization_service.get_user_organizations(session, user.id)
     org_slug = orgs[0].slug if orgs else None
 
+    # last_login (y el rehash de hashes bcrypt legacy a Argon2id) en un solo
+    # UPDATE, en la misma transacción que el INSERT del refresh token
+    user_service.record_login(session, user.id, hashed_password=new_hash)
+    session.commit()
+
     return TokenPair(
         access_token=access_token,
         refresh_token=raw_refresh,
@@ -184,7 +218,7 @@ async def login(
 # --- Refresh ---
 
 @router.post("/refresh", response_model=TokenPair)
-async def refresh(
+def refresh(
     body: RefreshRequest,
     request: Request,
     session: Session = Depends(get_session),
@@ -215,8 +249,8 @@ async def refresh(
             detail="User not found or inactive",
         )
 
-    # Nuevo par
-    access_token = create_access_token(data={"sub": user.email})
+    # Nuevo par (re-emite claims RBAC: así se reflejan cambios de roles)
+    access_token = _create_user_access_token(session, user)
     raw_refresh, new_hash, expires_at = create_refresh_token()
     new_rt = RefreshToken(
         token_hash=new_hash,
@@ -236,7 +270,7 @@ async def refresh(
 # --- Logout ---
 
 @router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
-async def logout(
+def logout(
     body: RefreshRequest,
     session: Session = Depends(get_session),
 ):
@@ -251,7 +285,7 @@ async def logout(
 
 
 @router.post("/logout-all", status_code=status.HTTP_204_NO_CONTENT)
-async def logout_all(
+def logout_all(
     current_user: UserRead = Depends(get_current_active_user),
     session: Session = Depends(get_session),
 ):
@@ -285,7 +319,7 @@ async def resend_verification_email(
     session: Session = Depends(get_session),
 ):
     """Reenvía email de verificación."""
-    user = user_service.get_user_by_email(session, body.email)
+    user = await run_in_threadpool(user_service.get_user_by_email, session, body.email)
     if not user:
         # No revelar si el email existe
         return {"message": "Si el email está registrado, se envió un correo de verificación"}
@@ -298,7 +332,7 @@ async def resend_verification_email(
 
 
 @router.get("/verify-email/{token}")
-async def verify_email(
+def verify_email(
     token: str,
     session: Session = Depends(get_session),
 ):
@@ -331,7 +365,7 @@ async def forgot_password(
     session: Session = Depends(get_session),
 ):
     """Envía email con link de reset de contraseña."""
-    user = user_service.get_user_by_email(session, body.email)
+    user = await run_in_threadpool(user_service.get_user_by_email, session, body.email)
     # Siempre retornar el mismo mensaje para no revelar si el email existe
     if user and user.provider == "local":
         await _send_password_reset_email(user.email, user.name)
@@ -351,11 +385,18 @@ async def reset_password(
             detail="Token de reset inválido o expirado",
         )
 
-    user = user_service.get_user_by_email(session, email)
+    user = await run_in_threadpool(user_service.get_user_by_email, session, email)
     if not user:
         raise HTTPException(status_code=400, detail="Usuario no encontrado")
 
-    user.hashed_password = get_password_hash(body.new_password)
+    hashed_password = await hash_password_async(body.new_password)
+    await run_in_threadpool(_set_password_and_revoke_tokens, session, user, hashed_password)
+    return {"message": "Contraseña actualizada exitosamente"}
+
+
+def _set_password_and_revoke_tokens(session: Session, user: User, hashed_password: str) -> None:
+    """Nueva contraseña + revocación de refresh tokens. Corre en el threadpool."""
+    user.hashed_password = hashed_password
     session.add(user)
 
     # Revocar todos los refresh tokens (forzar re-login)
@@ -368,13 +409,12 @@ async def reset_password(
         session.add(rt)
 
     session.commit()
-    return {"message": "Contraseña actualizada exitosamente"}
 
 
 # --- Accept invitation ---
 
 @router.post("/accept-invitation/{token}")
-async def accept_invitation(
+def accept_invitation(
     token: str,
     current_user: UserRead = Depends(get_current_active_user),
     session: Session = Depends(get_session),
@@ -1,20 +1,40 @@
 """
 Email routes for sending emails.
 """
-from typing import List, Optional
-from fastapi import APIRouter, HTTPException
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, List, Optional
+import orjson
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Response, status
 from pydantic import BaseModel, EmailStr
 
+from app.config import settings
 from app.services.email_service import email_service
+from app.utils.logger import get_structured_logger
 
 
 router = APIRouter(prefix="/email", tags=["email"])
+logger = get_structured_logger(__name__)
+
+
+async def _deliver(send: Callable[..., Awaitable[bool]], endpoint: str, **kwargs: Any) -> None:
+    """
+    Runs a send after the 202 response has been returned.
+
+    The client no longer waits for SMTP, so a failed send can't become an
+    HTTP error: it is logged here (email_service logs the underlying cause).
+    """
+    if not await send(**kwargs):
+        logger.error("Background email send failed", endpoint=endpoint)
 
 
 # === Schemas ===
+# __slots__ = () drops the per-instance __weakref__ slot; field values still
+# live in the __dict__ Pydantic manages.
 
 class EmailRequest(BaseModel):
     """Schema for sending a basic email"""
+    __slots__ = ()
+
     to: List[EmailStr]
     subject: str
     html_content: str
@@ -25,6 +45,8 @@ class EmailRequest(BaseModel):
 
 class TemplateEmailRequest(BaseModel):
     """Schema for sending a template-based email"""
+    __slots__ = ()
+
     to: List[EmailStr]
     subject: str
     template_name: str
@@ -35,6 +57,8 @@ class TemplateEmailRequest(BaseModel):
 
 class WelcomeEmailRequest(BaseModel):
     """Schema for sending welcome email"""
+    __slots__ = ()
+
     to: EmailStr
     name: str
     verification_url: Optional[str] = None
@@ -42,6 +66,8 @@ class WelcomeEmailRequest(BaseModel):
 
 class VerificationEmailRequest(BaseModel):
     """Schema for sending verification email"""
+    __slots__ = ()
+
     to: EmailStr
     name: str
     verification_url: str
@@ -49,6 +75,8 @@ class VerificationEmailRequest(BaseModel):
 
 class PasswordResetEmailRequest(BaseModel):
     """Schema for sending password reset email"""
+    __slots__ = ()
+
     to: EmailStr
     name: str
     reset_url: str
@@ -56,6 +84,8 @@ class PasswordResetEmailRequest(BaseModel):
 
 class NotificationEmailRequest(BaseModel):
     """Schema for sending notification email"""
+    __slots__ = ()
+
     to: EmailStr
     name: str
     notification_title: str
@@ -64,8 +94,8 @@ class NotificationEmailRequest(BaseModel):
 
 # === Routes ===
 
-@router.post("/send")
-async def send_email(request: EmailRequest):
+@router.post("/send", status_code=status.HTTP_202_ACCEPTED)
+async def send_email(request: EmailRequest, background_tasks: BackgroundTasks):
     """
     Send a basic email with custom HTML content.
 
@@ -79,7 +109,8 @@ async def send_email(request: EmailRequest):
     }
     ```
     """
-    success = await email_service.send_email(
+    background_tasks.add_task(
+        _deliver, email_service.send_email, "send",
         to=request.to,
         subject=request.subject,
         html_content=request.html_content,
@@ -88,20 +119,14 @@ async def send_email(request: EmailRequest):
         bcc=request.bcc
     )
 
-    if not success:
-        raise HTTPException(
-            status_code=500,
-            detail="Failed to send email. Check SMTP configuration."
-        )
-
     return {
-        "message": "Email sent successfully",
+        "message": "Email queued for delivery",
         "recipients": request.to
     }
 
 
-@router.post("/send-template")
-async def send_template_email(request: TemplateEmailRequest):
+@router.post("/send-template", status_code=status.HTTP_202_ACCEPTED)
+async def send_template_email(request: TemplateEmailRequest, background_tasks: BackgroundTasks):
     """
     Send an email using a Jinja2 template.
 
@@ -118,30 +143,33 @@ async def send_template_email(request: TemplateEmailRequest):
     }
     ```
     """
-    success = await email_service.send_template_email(
+    # Render now so a missing/broken template is still reported to the client
+    try:
+        html_content = email_service.render_template(request.template_name, request.context)
+    except Exception as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Failed to render template {request.template_name}: {e}"
+        )
+
+    background_tasks.add_task(
+        _deliver, email_service.send_email, "send-template",
         to=request.to,
         subject=request.subject,
-        template_name=request.template_name,
-        context=request.context,
+        html_content=html_content,
         cc=request.cc,
         bcc=request.bcc
     )
 
-    if not success:
-        raise HTTPException(
-            status_code=500,
-            detail="Failed to send template email. Check template and SMTP configuration."
-        )
-
     return {
-        "message": "Template email sent successfully",
+        "message": "Template email queued for delivery",
         "recipients": request.to,
         "template": request.template_name
     }
 
 
-@router.post("/send-welcome")
-async def send_welcome_email(request: WelcomeEmailRequest):
+@router.post("/send-welcome", status_code=status.HTTP_202_ACCEPTED)
+async def send_welcome_email(request: WelcomeEmailRequest, background_tasks: BackgroundTasks):
     """
     Send welcome email to a new user.
 
@@ -154,26 +182,21 @@ async def send_welcome_email(request: WelcomeEmailRequest):
     }
     ```
     """
-    success = await email_service.send_welcome_email(
+    background_tasks.add_task(
+        _deliver, email_service.send_welcome_email, "send-welcome",
         to=request.to,
         name=request.name,
         verification_url=request.verification_url
     )
 
-    if not success:
-        raise HTTPException(
-            status_code=500,
-            detail="Failed to send welcome email"
-        )
-
     return {
-        "message": "Welcome email sent successfully",
+        "message": "Welcome email queued for delivery",
         "recipient": request.to
     }
 
 
-@router.post("/send-verification")
-async def send_verification_email(request: VerificationEmailRequest):
+@router.post("/send-verification", status_code=status.HTTP_202_ACCEPTED)
+async def send_verification_email(request: VerificationEmailRequest, background_tasks: BackgroundTasks):
     """
     Send email verification link.
 
@@ -186,26 +209,21 @@ async def send_verification_email(request: VerificationEmailRequest):
     }
     ```
     """
-    success = await email_service.send_verification_email(
+    background_tasks.add_task(
+        _deliver, email_service.send_verification_email, "send-verification",
         to=request.to,
         name=request.name,
         verification_url=request.verification_url
     )
 
-    if not success:
-        raise HTTPException(
-            status_code=500,
-            detail="Failed to send verification email"
-        )
-
     return {
-        "message": "Verification email sent successfully",
+        "message": "Verification email queued for delivery",
         "recipient": request.to
     }
 
 
-@router.post("/send-password-reset")
-async def send_password_reset_email(request: PasswordResetEmailRequest):
+@router.post("/send-password-reset", status_code=status.HTTP_202_ACCEPTED)
+async def send_password_reset_email(request: PasswordResetEmailRequest, background_tasks: BackgroundTasks):
     """
     Send password reset link.
 
@@ -218,26 +236,21 @@ async def send_password_reset_email(request: PasswordResetEmailRequest):
     }
     ```
     """
-    success = await email_service.send_password_reset_email(
+    background_tasks.add_task(
+        _deliver, email_service.send_password_reset_email, "send-password-reset",
         to=request.to,
         name=request.name,
         reset_url=request.reset_url
     )
 
-    if not success:
-        raise HTTPException(
-            status_code=500,
-            detail="Failed to send password reset email"
-        )
-
     return {
-        "message": "Password reset email sent successfully",
+        "message": "Password reset email queued for delivery",
         "recipient": request.to
     }
 
 
-@router.post("/send-notification")
-async def send_notification_email(request: NotificationEmailRequest):
+@router.post("/send-notification", status_code=status.HTTP_202_ACCEPTED)
+async def send_notification_email(request: NotificationEmailRequest, background_tasks: BackgroundTasks):
     """
     Send a notification email.
 
@@ -251,63 +264,58 @@ async def send_notification_email(request: NotificationEmailRequest):
     }
     ```
     """
-    success = await email_service.send_notification_email(
+    background_tasks.add_task(
+        _deliver, email_service.send_notification_email, "send-notification",
         to=request.to,
         name=request.name,
         notification_title=request.notification_title,
         notification_body=request.notification_body
     )
 
-    if not success:
-        raise HTTPException(
-            status_code=500,
-            detail="Failed to send notification email"
-        )
-
     return {
-        "message": "Notification email sent successfully",
+        "message": "Notification email queued for delivery",
         "recipient": request.to
     }
 
 
+# Lista estática: serializada una vez al importar el módulo
+_TEMPLATES_JSON = orjson.dumps({
+    "templates": [
+        {
+            "name": "welcome.html",
+            "description": "Welcome email for new users",
+            "variables": ["name", "verification_url", "app_name"]
+        },
+        {
+            "name": "verify_email.html",
+            "description": "Email verification link",
+            "variables": ["name", "verification_url", "app_name"]
+        },
+        {
+            "name": "password_reset.html",
+            "description": "Password reset link",
+            "variables": ["name", "reset_url", "app_name"]
+        },
+        {
+            "name": "notification.html",
+            "description": "Generic notification email",
+            "variables": ["name", "title", "body", "app_name"]
+        }
+    ]
+})
+
+
 @router.get("/templates")
 async def list_templates():
     """
     List available email templates.
     """
-    return {
-        "templates": [
-            {
-                "name": "welcome.html",
-                "description": "Welcome email for new users",
-                "variables": ["name", "verification_url", "app_name"]
-            },
-            {
-                "name": "verify_email.html",
-                "description": "Email verification link",
-                "variables": ["name", "verification_url", "app_name"]
-            },
-            {
-                "name": "password_reset.html",
-                "description": "Password reset link",
-                "variables": ["name", "reset_url", "app_name"]
-            },
-            {
-                "name": "notification.html",
-                "description": "Generic notification email",
-                "variables": ["name", "title", "body", "app_name"]
-            }
-        ]
-    }
+    return Response(content=_TEMPLATES_JSON, media_type="application/json")
 
 
-@router.get("/config")
-async def get_email_config():
-    """
-    Get current email configuration (without sensitive data).
-    """
-    from app.config import settings
-
+@lru_cache(maxsize=1)
+def _email_config() -> dict:
+    # settings no cambia después del arranque: el dict se arma una sola vez
     return {
         "smtp_host": settings.SMTP_HOST,
         "smtp_port": settings.SMTP_PORT,
@@ -316,3 +324,11 @@ async def get_email_config():
         "use_tls": settings.SMTP_USE_TLS,
         "configured": bool(settings.SMTP_USER and settings.SMTP_PASSWORD)
     }
+
+
+@router.get("/config")
+async def get_email_config():
+    """
+    Get current email configuration (without sensitive data).
+    """
+    return _email_config()
@@ -1,14 +1,18 @@
 """
 Media routes for file upload, download, and management.
 """
-from typing import List, Optional
-from fastapi import APIRouter, Depends, File, UploadFile, Form, HTTPException, status
+import hashlib
+from email.utils import format_datetime, parsedate_to_datetime
+from datetime import datetime, timezone
+from pathlib import PurePosixPath
+from typing import Iterable, List, Optional, Tuple
+from fastapi import APIRouter, Depends, File, UploadFile, Form, HTTPException, Request, Response, status
 from fastapi.responses import StreamingResponse
 from sqlmodel import Session
-from io import BytesIO
 
 from app.database import get_session
 from app.services.media_service import media_service
+from app.services.storage_service import storage_service
 from app.models.media import MediaRead, MediaUpdate, MediaUploadResponse
 from app.services.filters import QueryFilter
 from app.config import settings
@@ -17,6 +21,51 @@ from app.config import settings
 router = APIRouter(prefix="/media", tags=["media"])
 
 
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, comma-separated list or "*")."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def _not_modified_since(if_modified_since: Optional[str], last_modified: datetime) -> bool:
+    """If-Modified-Since check (HTTP dates have one-second resolution)."""
+    if not if_modified_since:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+
+def _conditional(request: Request, response: Response, body, media_list: Iterable[MediaRead]):
+    """
+    Weak ETag over (id, updated_at) of the media in a JSON response; returns
+    304 when the client's If-None-Match still matches.
+
+    Only with local storage: S3 responses carry pre-signed URLs that change
+    per request and expire, so a cached copy can't be declared still valid.
+    """
+    if storage_service.use_s3:
+        return body
+
+    digest = hashlib.blake2b(digest_size=8)
+    for media in media_list:
+        digest.update(f"{media.id}:{media.updated_at.isoformat() if media.updated_at else ''};".encode())
+    etag = f'W/"{digest.hexdigest()}"'
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return body
+
+
 @router.post("/upload", response_model=MediaUploadResponse, status_code=status.HTTP_201_CREATED)
 async def upload_file(
     file: UploadFile = File(...),
@@ -35,15 +84,19 @@ async def upload_file(
     - **user_id**: Optional owner user ID
     - **is_public**: Whether the file is publicly accessible
     """
-    # Validate file size
-    file_content = await file.read()
-    file_size = len(file_content)
-
-    if file_size > settings.MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail=f"File too large. Maximum size: {settings.MAX_FILE_SIZE} bytes"
-        )
+    # Validate file size by chunks: el multipart ya está en un
+    # SpooledTemporaryFile, no hace falta cargarlo entero en memoria.
+    # El hash de contenido se calcula en la misma pasada.
+    file_size = 0
+    hasher = hashlib.blake2b(digest_size=16)
+    while chunk := await file.read(settings.UPLOAD_CHUNK_SIZE):
+        file_size += len(chunk)
+        hasher.update(chunk)
+        if file_size > settings.MAX_FILE_SIZE:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"File too large. Maximum size: {settings.MAX_FILE_SIZE} bytes"
+            )
 
     # Reset file pointer
     await file.seek(0)
@@ -58,7 +111,8 @@ async def upload_file(
         alt_text=alt_text,
         user_id=user_id,
         is_public=is_public,
-        broadcast=True
+        broadcast=True,
+        content_hash=hasher.hexdigest()
     )
 
     # Generate URLs
@@ -77,17 +131,22 @@ async def upload_file(
 
 @router.get("/", response_model=List[MediaRead])
 def get_all_media(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     session: Session = Depends(get_session)
 ):
     """Get all media files with URLs"""
-    return media_service.get_all_with_urls(session, skip, limit)
+    media_list = media_service.get_all_with_urls(session, skip, limit)
+    return _conditional(request, response, media_list, media_list)
 
 
 @router.get("/{media_id}", response_model=MediaRead)
 def get_media(
     media_id: int,
+    request: Request,
+    response: Response,
     session: Session = Depends(get_session)
 ):
     """Get media by ID with URLs"""
@@ -97,27 +156,99 @@ def get_media(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Media {media_id} not found"
         )
-    return media
+    return _conditional(request, response, media, [media])
+
+
+def _parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range ``Range: bytes=...`` header into (start, end) inclusive.
+
+    Returns None (serve the whole file) for a missing, malformed or
+    multi-range header; raises 416 when the range is outside the file.
+    """
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+
+    first, _, last = range_header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            # bytes=-N: los últimos N bytes
+            start, end = max(size - int(last), 0), size - 1
+    except ValueError:
+        return None
+
+    if start > end or start >= size:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, min(end, size - 1)
 
 
 @router.get("/{media_id}/download")
 async def download_file(
     media_id: int,
+    request: Request,
     session: Session = Depends(get_session)
 ):
     """
     Download file content.
-    Returns the actual file for download.
+    Streams the actual file for download; supports single ``Range`` requests
+    (206 Partial Content) for resumable downloads and media seeking.
     """
+    media = media_service.get_by_id(session, media_id)
+    if not media:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Media {media_id} not found"
+        )
+
+    size = media.file_size
+    # El contenido no cambia tras el upload: ETag fuerte con el hash del
+    # contenido; archivos previos a content_hash usan el uuid de storage_path
+    etag = f'"{media.content_hash or PurePosixPath(media.storage_path).stem}"'
+    last_modified = media.created_at.replace(tzinfo=timezone.utc)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Last-Modified": format_datetime(last_modified, usegmt=True),
+    }
+
+    # If-None-Match tiene precedencia sobre If-Modified-Since (RFC 9110)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        not_modified = _etag_matches(if_none_match, etag)
+    else:
+        not_modified = _not_modified_since(request.headers.get("if-modified-since"), last_modified)
+    if not_modified:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    if size and (if_range is None or if_range == etag):
+        byte_range = _parse_range(request.headers.get("range"), size)
+
     try:
-        file_content, filename, mime_type = await media_service.download_file(session, media_id)
+        if byte_range:
+            start, end = byte_range
+            body = await media_service.open_stream(media, start, end)
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+            headers["Content-Length"] = str(end - start + 1)
+            status_code = status.HTTP_206_PARTIAL_CONTENT
+        else:
+            body = await media_service.open_stream(media)
+            headers["Content-Length"] = str(size)
+            headers["Content-Disposition"] = f'attachment; filename="{media.filename}"'
+            status_code = status.HTTP_200_OK
 
         return StreamingResponse(
-            BytesIO(file_content),
-            media_type=mime_type,
-            headers={
-                "Content-Disposition": f'attachment; filename="{filename}"'
-            }
+            body,
+            status_code=status_code,
+            media_type=media.mime_type or "application/octet-stream",
+            headers=headers
         )
     except FileNotFoundError:
         raise HTTPException(
@@ -172,26 +303,22 @@ async def delete_media(
 @router.get("/user/{user_id}", response_model=List[MediaRead])
 def get_media_by_user(
     user_id: int,
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     session: Session = Depends(get_session)
 ):
     """Get all media files for a specific user"""
     media_list = media_service.get_by_user(session, user_id, skip, limit)
-
-    # Add URLs to each media
-    result = []
-    for media in media_list:
-        media_read = MediaRead.model_validate(media)
-        media_read = media_service._add_urls_to_media(media_read)
-        result.append(media_read)
-
-    return result
+    return _conditional(request, response, media_list, media_list)
 
 
 @router.get("/type/{file_type}", response_model=List[MediaRead])
 def get_media_by_type(
     file_type: str,
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     session: Session = Depends(get_session)
@@ -201,34 +328,20 @@ def get_media_by_type(
     Types: image, video, audio, document, other
     """
     media_list = media_service.get_by_file_type(session, file_type, skip, limit)
-
-    # Add URLs to each media
-    result = []
-    for media in media_list:
-        media_read = MediaRead.model_validate(media)
-        media_read = media_service._add_urls_to_media(media_read)
-        result.append(media_read)
-
-    return result
+    return _conditional(request, response, media_list, media_list)
 
 
 @router.get("/public/list", response_model=List[MediaRead])
 def get_public_media(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     session: Session = Depends(get_session)
 ):
     """Get all public media files"""
     media_list = media_service.get_public_media(session, skip, limit)
-
-    # Add URLs to each media
-    result = []
-    for media in media_list:
-        media_read = MediaRead.model_validate(media)
-        media_read = media_service._add_urls_to_media(media_read)
-        result.append(media_read)
-
-    return result
+    return _conditional(request, response, media_list, media_list)
 
 
 @router.post("/filter", response_model=List[MediaRead])
@@ -240,16 +353,7 @@ def filter_media(
     Filter media with advanced queries.
     Supports complex conditions, ordering, and pagination.
     """
-    media_list = media_service.filter(session, filters)
-
-    # Add URLs to each media
-    result = []
-    for media in media_list:
-        media_read = MediaRead.model_validate(media)
-        media_read = media_service._add_urls_to_media(media_read)
-        result.append(media_read)
-
-    return result
+    return media_service.filter_with_urls(session, filters)
 
 
 @router.post("/filter/paginated")
@@ -260,23 +364,14 @@ def filter_media_paginated(
     """
     Filter media with pagination metadata.
     Returns: {data, total, limit, offset, has_more}
-    """
-    result = media_service.filter_paginated(session, filters)
 
-    # Add URLs to each media in data
-    media_with_urls = []
-    for media in result["data"]:
-        media_read = MediaRead.model_validate(media)
-        media_read = media_service._add_urls_to_media(media_read)
-        media_with_urls.append(media_read)
-
-    result["data"] = media_with_urls
-
-    return result
+    With `after_id` (keyset pagination, pass the previous `next_cursor`):
+    {data, limit, next_cursor, has_more}, without OFFSET or COUNT.
+    """
+    return media_service.filter_paginated_with_urls(session, filters)
 
 
 @router.get("/stats/info")
 def get_storage_info():
     """Get storage backend information"""
-    from app.services.storage_service import storage_service
     return storage_service.get_storage_info()
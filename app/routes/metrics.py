@@ -1,8 +1,9 @@
 from typing import List, Optional
 from fastapi import APIRouter, Depends, Query
+from fastapi.responses import ORJSONResponse
 from sqlmodel import Session
 
-from app.database import get_session
+from app.database import get_metrics_session
 from app.models.metric import (
     ApiMetricRead,
     MetricsSummary,
@@ -11,13 +12,19 @@ from app.models.metric import (
 )
 from app.services.metrics_service import metrics_service
 
-router = APIRouter(prefix="/analytics", tags=["Analytics & Metrics"])
+# Listas de métricas potencialmente grandes: orjson serializa varias veces
+# más rápido que json.dumps (misma salida para el cliente)
+router = APIRouter(
+    prefix="/analytics",
+    tags=["Analytics & Metrics"],
+    default_response_class=ORJSONResponse,
+)
 
 
 @router.get("/summary", response_model=MetricsSummary)
 def get_metrics_summary(
     hours: Optional[int] = Query(24, description="Time window in hours (default: 24h)"),
-    session: Session = Depends(get_session)
+    session: Session = Depends(get_metrics_session)
 ):
     """
     Get aggregated metrics summary.
@@ -50,7 +57,7 @@ def get_metrics_summary(
 def get_endpoint_stats(
     hours: Optional[int] = Query(24, description="Time window in hours"),
     limit: int = Query(20, description="Max number of endpoints to return"),
-    session: Session = Depends(get_session)
+    session: Session = Depends(get_metrics_session)
 ):
     """
     Get statistics per endpoint.
@@ -82,7 +89,7 @@ def get_endpoint_stats(
 def get_slowest_endpoints(
     hours: Optional[int] = Query(24, description="Time window in hours"),
     limit: int = Query(10, description="Max number of endpoints"),
-    session: Session = Depends(get_session)
+    session: Session = Depends(get_metrics_session)
 ):
     """
     Get slowest endpoints by average duration.
@@ -110,7 +117,7 @@ def get_slowest_endpoints(
 @router.get("/errors", response_model=List[ErrorStats])
 def get_error_stats(
     hours: Optional[int] = Query(24, description="Time window in hours"),
-    session: Session = Depends(get_session)
+    session: Session = Depends(get_metrics_session)
 ):
     """
     Get error statistics grouped by HTTP status code.
@@ -146,7 +153,7 @@ def get_error_stats(
 def get_recent_metrics(
     limit: int = Query(100, description="Number of recent metrics"),
     hours: Optional[int] = Query(None, description="Filter last N hours (optional)"),
-    session: Session = Depends(get_session)
+    session: Session = Depends(get_metrics_session)
 ):
     """
     Get recent API metrics (raw data).
@@ -176,7 +183,7 @@ def get_recent_metrics(
 
 
 @router.get("/health-check")
-def metrics_health_check(session: Session = Depends(get_session)):
+def metrics_health_check(session: Session = Depends(get_metrics_session)):
     """
     Check if metrics system is working.
 
@@ -14,7 +14,11 @@ from app.models.role import (
 )
 from app.models.user import UserRead
 from app.services.role_service import role_service, permission_service
-from app.core.permissions import require_admin, require_role, require_permission
+from app.core.permissions import (
+    require_admin, require_superadmin,
+    require_roles_read, require_permissions_read,
+    require_users_read, require_users_manage,
+)
 
 router = APIRouter(prefix="/roles", tags=["roles & permissions"])
 
@@ -48,7 +52,7 @@ async def get_all_roles(
     skip: int = 0,
     limit: int = 100,
     session: Session = Depends(get_session),
-    current_user: UserRead = Depends(require_permission("read", "roles"))
+    current_user: UserRead = Depends(require_roles_read)
 ):
     """
     Get all roles.
@@ -58,32 +62,39 @@ async def get_all_roles(
     return [RoleRead.model_validate(role) for role in roles]
 
 
+@router.get("/paginated/list")
+async def get_roles_paginated(
+    skip: int = 0,
+    limit: int = 100,
+    session: Session = Depends(get_session),
+    current_user: UserRead = Depends(require_roles_read)
+):
+    """
+    Get all roles with pagination metadata
+    ({data, total, limit, offset, has_more}, one query).
+    Requires read:roles permission.
+    """
+    return role_service.get_all_roles_paginated(session, skip, limit)
+
+
 @router.get("/{role_id}", response_model=RoleReadWithPermissions)
 async def get_role(
     role_id: int,
     session: Session = Depends(get_session),
-    current_user: UserRead = Depends(require_permission("read", "roles"))
+    current_user: UserRead = Depends(require_roles_read)
 ):
     """
     Get role by ID with its permissions.
     Requires read:roles permission.
     """
-    role = role_service.get_role_by_id(session, role_id)
+    role = role_service.get_role_by_id(session, role_id, load_permissions=True)
     if not role:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Role not found"
         )
 
-    # Get permissions for this role
-    permissions = role_service.get_role_permissions(session, role_id)
-
-    role_dict = RoleRead.model_validate(role).model_dump()
-    role_dict["permissions"] = [
-        PermissionRead.model_validate(perm) for perm in permissions
-    ]
-
-    return role_dict
+    return RoleReadWithPermissions.model_validate(role)
 
 
 @router.patch("/{role_id}", response_model=RoleRead)
@@ -124,7 +135,7 @@ async def update_role(
 async def delete_role(
     role_id: int,
     session: Session = Depends(get_session),
-    current_user: UserRead = Depends(require_role("superadmin"))
+    current_user: UserRead = Depends(require_superadmin)
 ):
     """
     Delete role.
@@ -175,7 +186,7 @@ async def get_all_permissions(
     skip: int = 0,
     limit: int = 100,
     session: Session = Depends(get_session),
-    current_user: UserRead = Depends(require_permission("read", "permissions"))
+    current_user: UserRead = Depends(require_permissions_read)
 ):
     """
     Get all permissions.
@@ -185,6 +196,21 @@ async def get_all_permissions(
     return [PermissionRead.model_validate(perm) for perm in permissions]
 
 
+@router.get("/permissions/paginated/list")
+async def get_permissions_paginated(
+    skip: int = 0,
+    limit: int = 100,
+    session: Session = Depends(get_session),
+    current_user: UserRead = Depends(require_permissions_read)
+):
+    """
+    Get all permissions with pagination metadata
+    ({data, total, limit, offset, has_more}, one query).
+    Requires read:permissions permission.
+    """
+    return permission_service.get_all_permissions_paginated(session, skip, limit)
+
+
 @router.delete("/permissions/{perm_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_permission(
     perm_id: int,
@@ -237,7 +263,7 @@ async def assign_permissions_to_role(
 async def assign_role_to_user(
     request: AssignRoleRequest,
     session: Session = Depends(get_session),
-    current_user: UserRead = Depends(require_permission("manage", "users"))
+    current_user: UserRead = Depends(require_users_manage)
 ):
     """
     Assign a role to a user.
@@ -262,7 +288,7 @@ async def assign_role_to_user(
 async def remove_role_from_user(
     request: AssignRoleRequest,
     session: Session = Depends(get_session),
-    current_user: UserRead = Depends(require_permission("manage", "users"))
+    current_user: UserRead = Depends(require_users_manage)
 ):
     """
     Remove a role from a user.
@@ -289,7 +315,7 @@ async def remove_role_from_user(
 async def get_user_roles(
     user_id: int,
     session: Session = Depends(get_session),
-    current_user: UserRead = Depends(require_permission("read", "users"))
+    current_user: UserRead = Depends(require_users_read)
 ):
     """
     Get all roles for a user.
@@ -303,7 +329,7 @@ async def get_user_roles(
 async def get_user_permissions(
     user_id: int,
     session: Session = Depends(get_session),
-    current_user: UserRead = Depends(require_permission("read", "users"))
+    current_user: UserRead = Depends(require_users_read)
 ):
     """
     Get all permissions for a user (through their roles).
@@ -6,15 +6,43 @@ Provides REST API to:
 - Cancel tasks
 - List user's tasks
 """
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Request
-from typing import Optional
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Query, Request
+from typing import Awaitable, Optional, TypeVar
 
 from app.services.queue_service import queue_service
 from app.services.task_notification_service import task_notification_service
-from app.utils.rate_limit_decorator import rate_limit
+from app.utils.rate_limit_decorator import token_bucket
+from app.utils.logger import get_structured_logger
 
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
+logger = get_structured_logger(__name__)
+
+T = TypeVar("T")
+
+
+async def _enqueue_with_subscription(subscribe: Optional[Awaitable], enqueue: Awaitable[T]) -> T:
+    """
+    Subscribe to the task's notification channel and enqueue the job concurrently
+
+    SUBSCRIBE goes through the dedicated Pub/Sub connection and enqueue_job
+    through the ARQ pool, so they can't share a MULTI; overlapping them
+    costs one round-trip instead of two. The subscribe is started first,
+    so it is on the wire before the worker can pick up the job.
+
+    A failed subscription only loses live notifications: the job is still
+    enqueued and its status can be polled.
+    """
+    if subscribe is None:
+        return await enqueue
+
+    subscribed, enqueued = await asyncio.gather(subscribe, enqueue, return_exceptions=True)
+    if isinstance(enqueued, BaseException):
+        raise enqueued
+    if isinstance(subscribed, BaseException):
+        logger.warning("Could not subscribe to task notifications", error=str(subscribed))
+    return enqueued
 
 
 @router.get("/{task_id}/status")
@@ -40,10 +68,6 @@ async def get_task_status(task_id: str):
             "start_time": "2025-01-15T10:30:05"
         }
     """
-    # Initialize queue service if not done
-    if not queue_service.initialized:
-        await queue_service.initialize()
-
     status = await queue_service.get_task_status(task_id)
 
     if not status:
@@ -66,9 +90,6 @@ async def cancel_task(task_id: str):
     Note:
         Can only cancel tasks that are still in queue (not started yet)
     """
-    if not queue_service.initialized:
-        await queue_service.initialize()
-
     cancelled = await queue_service.cancel_task(task_id)
 
     if not cancelled:
@@ -81,7 +102,7 @@ async def cancel_task(task_id: str):
 
 
 @router.post("/media/process")
-@rate_limit(limit=50, window=60)  # 50 media processing tasks per minute
+@token_bucket(capacity=50, refill_per_sec=50 / 60)  # 50 media processing tasks per minute
 async def enqueue_media_processing(
     request: Request,
     media_id: int,
@@ -114,16 +135,14 @@ async def enqueue_media_processing(
             "media_id": 123
         }
     """
-    if not queue_service.initialized:
-        await queue_service.initialize()
-
     # Subscribe to notifications for this media
-    await task_notification_service.subscribe_to_media_tasks(media_id)
-
-    task_id = await queue_service.enqueue_media_processing(
-        media_id=media_id,
-        file_path=file_path,
-        operations=operations
+    task_id = await _enqueue_with_subscription(
+        task_notification_service.subscribe_to_media_tasks(media_id),
+        queue_service.enqueue_media_processing(
+            media_id=media_id,
+            file_path=file_path,
+            operations=operations
+        )
     )
 
     return {
@@ -135,7 +154,7 @@ async def enqueue_media_processing(
 
 
 @router.post("/media/thumbnail")
-@rate_limit(limit=50, window=60)  # 50 thumbnail generations per minute
+@token_bucket(capacity=50, refill_per_sec=50 / 60)  # 50 thumbnail generations per minute
 async def enqueue_thumbnail_generation(
     request: Request,
     media_id: int,
@@ -153,15 +172,13 @@ async def enqueue_thumbnail_generation(
     Returns:
         Task ID
     """
-    if not queue_service.initialized:
-        await queue_service.initialize()
-
-    await task_notification_service.subscribe_to_media_tasks(media_id)
-
-    task_id = await queue_service.enqueue_thumbnail_generation(
-        media_id=media_id,
-        file_path=file_path,
-        thumbnail_size=tuple(thumbnail_size) if isinstance(thumbnail_size, list) else thumbnail_size
+    task_id = await _enqueue_with_subscription(
+        task_notification_service.subscribe_to_media_tasks(media_id),
+        queue_service.enqueue_thumbnail_generation(
+            media_id=media_id,
+            file_path=file_path,
+            thumbnail_size=tuple(thumbnail_size) if isinstance(thumbnail_size, list) else thumbnail_size
+        )
     )
 
     return {
@@ -172,7 +189,7 @@ async def enqueue_thumbnail_generation(
 
 
 @router.post("/email/send")
-@rate_limit(limit=30, window=60)  # 30 emails per minute
+@token_bucket(capacity=30, refill_per_sec=30 / 60)  # 30 emails per minute
 async def enqueue_email(
     request: Request,
     to_email: str,
@@ -203,18 +220,15 @@ async def enqueue_email(
             "user_id": 1
         }
     """
-    if not queue_service.initialized:
-        await queue_service.initialize()
-
-    if user_id:
-        await task_notification_service.subscribe_to_user_tasks(user_id)
-
-    task_id = await queue_service.enqueue_email(
-        to_email=to_email,
-        subject=subject,
-        body=body,
-        html_body=html_body,
-        user_id=user_id
+    task_id = await _enqueue_with_subscription(
+        task_notification_service.subscribe_to_user_tasks(user_id) if user_id else None,
+        queue_service.enqueue_email(
+            to_email=to_email,
+            subject=subject,
+            body=body,
+            html_body=html_body,
+            user_id=user_id
+        )
     )
 
     return {
@@ -225,11 +239,11 @@ async def enqueue_email(
 
 
 @router.post("/email/bulk")
-@rate_limit(limit=5, window=3600)  # 5 bulk email operations per hour
+@token_bucket(capacity=5, refill_per_sec=5 / 3600)  # 5 bulk email operations per hour
 async def enqueue_bulk_emails(
     request: Request,
     emails: list,
-    rate_limit_emails: int = 10,
+    rate_limit_emails: int = Query(10, ge=1),
     user_id: Optional[int] = None
 ):
     """
@@ -241,7 +255,7 @@ async def enqueue_bulk_emails(
         user_id: User who triggered this
 
     Returns:
-        Task ID
+        Group ID and one task ID per chunk (a minute's worth of emails each)
 
     Example:
         POST /tasks/email/bulk
@@ -262,20 +276,19 @@ async def enqueue_bulk_emails(
             "user_id": 1
         }
     """
-    if not queue_service.initialized:
-        await queue_service.initialize()
-
-    if user_id:
-        await task_notification_service.subscribe_to_user_tasks(user_id)
-
-    task_id = await queue_service.enqueue_bulk_emails(
-        emails=emails,
-        rate_limit=rate_limit_emails,
-        user_id=user_id
+    group = await _enqueue_with_subscription(
+        task_notification_service.subscribe_to_user_tasks(user_id) if user_id else None,
+        queue_service.enqueue_bulk_emails(
+            emails=emails,
+            rate_limit=rate_limit_emails,
+            user_id=user_id
+        )
     )
 
     return {
-        "task_id": task_id,
+        "group_id": group["group_id"],
+        "task_ids": group["task_ids"],
+        "chunk_count": len(group["task_ids"]),
         "message": "Bulk email task enqueued",
         "total_emails": len(emails),
         "rate_limit": rate_limit_emails,
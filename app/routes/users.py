@@ -198,6 +198,8 @@ def filter_users_paginated(
         "has_more": true
     }
     ```
+
+    With `after_id` (keyset pagination): {data, limit, next_cursor, has_more}.
     """
     result = user_service.filter_paginated(session, filters)
     return result
@@ -3,11 +3,13 @@ Webhook management endpoints
 
 Allows users to manage webhook subscriptions, view delivery logs, and test webhooks.
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
 from app.database import get_db
+from app.models.webhook import WebhookEventType
 from app.services.webhook_service import webhook_service
 from app.schemas.webhook import (
     WebhookSubscriptionCreate,
@@ -151,7 +153,7 @@ async def delete_webhook_subscription(
 @router.get("/deliveries", response_model=List[WebhookDeliveryResponse])
 async def list_webhook_deliveries(
     subscription_id: Optional[int] = Query(None, description="Filter by subscription ID"),
-    event_type: Optional[str] = Query(None, description="Filter by event type"),
+    event_type: Optional[WebhookEventType] = Query(None, description="Filter by event type"),
     success_only: Optional[bool] = Query(None, description="Filter by success status"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of results"),
     db: Session = Depends(get_db)
@@ -255,6 +257,46 @@ async def test_webhook(
 
 # Event types reference
 
+_EVENT_DESCRIPTIONS = {
+    "user.created": "Triggered when a new user is created",
+    "user.updated": "Triggered when a user is updated",
+    "user.deleted": "Triggered when a user is deleted",
+    "user.login": "Triggered when a user logs in",
+    "entity.created": "Triggered when any entity is created",
+    "entity.updated": "Triggered when any entity is updated",
+    "entity.deleted": "Triggered when any entity is deleted",
+    "task.completed": "Triggered when a background task completes successfully",
+    "task.failed": "Triggered when a background task fails",
+    "task.started": "Triggered when a background task starts",
+    "media.processed": "Triggered when media processing completes",
+    "media.failed": "Triggered when media processing fails",
+    "email.sent": "Triggered when an email is sent successfully",
+    "email.failed": "Triggered when an email fails to send",
+    "bulk_email.completed": "Triggered when a bulk email operation completes",
+    "permissions.updated": "Triggered when permissions are updated",
+    "role.created": "Triggered when a new role is created",
+    "role.updated": "Triggered when a role is updated",
+}
+
+
+def _get_event_description(event_type: str) -> str:
+    """Get human-readable description for event type"""
+    return _EVENT_DESCRIPTIONS.get(event_type, "No description available")
+
+
+# WebhookEventType es un enum estático: serializado una vez al importar el módulo
+_EVENTS_JSON = orjson.dumps({
+    "events": [
+        {
+            "type": event.value,
+            "category": event.value.split(".")[0],
+            "description": _get_event_description(event.value)
+        }
+        for event in WebhookEventType
+    ]
+})
+
+
 @router.get("/events")
 async def list_event_types():
     """
@@ -262,40 +304,4 @@ async def list_event_types():
 
     Returns a list of event types you can subscribe to.
     """
-    from app.models.webhook import WebhookEventType
-
-    return {
-        "events": [
-            {
-                "type": event.value,
-                "category": event.value.split(".")[0],
-                "description": _get_event_description(event.value)
-            }
-            for event in WebhookEventType
-        ]
-    }
-
-
-def _get_event_description(event_type: str) -> str:
-    """Get human-readable description for event type"""
-    descriptions = {
-        "user.created": "Triggered when a new user is created",
-        "user.updated": "Triggered when a user is updated",
-        "user.deleted": "Triggered when a user is deleted",
-        "user.login": "Triggered when a user logs in",
-        "entity.created": "Triggered when any entity is created",
-        "entity.updated": "Triggered when any entity is updated",
-        "entity.deleted": "Triggered when any entity is deleted",
-        "task.completed": "Triggered when a background task completes successfully",
-        "task.failed": "Triggered when a background task fails",
-        "task.started": "Triggered when a background task starts",
-        "media.processed": "Triggered when media processing completes",
-        "media.failed": "Triggered when media processing fails",
-        "email.sent": "Triggered when an email is sent successfully",
-        "email.failed": "Triggered when an email fails to send",
-        "bulk_email.completed": "Triggered when a bulk email operation completes",
-        "permissions.updated": "Triggered when permissions are updated",
-        "role.created": "Triggered when a new role is created",
-        "role.updated": "Triggered when a role is updated",
-    }
-    return descriptions.get(event_type, "No description available")
+    return Response(content=_EVENTS_JSON, media_type="application/json")
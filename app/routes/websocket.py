@@ -1,10 +1,51 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query
-from typing import Optional
+from typing import Awaitable, Callable, Dict, Optional
 import uuid
+import orjson
 
 from app.services.websocket import connection_manager
+from app.utils.logger import get_structured_logger
 
 router = APIRouter(prefix="/ws", tags=["websocket"])
+logger = get_structured_logger(__name__)
+
+VALID_CHANNELS = frozenset({"users", "media", "tasks"})  # Add more as you create them
+
+
+async def _handle_ping(websocket: WebSocket, data: dict) -> None:
+    # Respond to ping
+    await connection_manager.send_personal_message(
+        {"type": "pong", "message": "pong"},
+        websocket
+    )
+
+
+async def _handle_get_stats(websocket: WebSocket, data: dict) -> None:
+    # Send channel statistics
+    stats = connection_manager.get_stats()
+    await connection_manager.send_personal_message(
+        {"type": "stats", "data": stats},
+        websocket
+    )
+
+
+async def _handle_echo(websocket: WebSocket, data: dict) -> None:
+    # Echo back any other message (can be customized)
+    await connection_manager.send_personal_message(
+        {
+            "type": "echo",
+            "message": "Message received",
+            "original": data
+        },
+        websocket
+    )
+
+
+# Handlers por tipo de mensaje; los tipos desconocidos van a _handle_echo
+MESSAGE_HANDLERS: Dict[str, Callable[[WebSocket, dict], Awaitable[None]]] = {
+    "ping": _handle_ping,
+    "get_stats": _handle_get_stats,
+}
 
 
 @router.websocket("/{channel}")
@@ -34,8 +75,7 @@ async def websocket_endpoint(
         client_id = str(uuid.uuid4())
 
     # Validate channel
-    valid_channels = ["users", "media", "tasks"]  # Add more as you create them
-    if channel not in valid_channels:
+    if channel not in VALID_CHANNELS:
         await websocket.close(code=1008, reason=f"Invalid channel: {channel}")
         return
 
@@ -44,41 +84,18 @@ async def websocket_endpoint(
 
     try:
         while True:
-            # Receive messages from client
-            data = await websocket.receive_json()
+            # Receive messages from client (orjson en vez del json de Starlette)
+            data = orjson.loads(await websocket.receive_text())
 
             # Handle different message types
-            message_type = data.get("type", "message")
-
-            if message_type == "ping":
-                # Respond to ping
-                await connection_manager.send_personal_message(
-                    {"type": "pong", "message": "pong"},
-                    websocket
-                )
-            elif message_type == "get_stats":
-                # Send channel statistics
-                stats = connection_manager.get_stats()
-                await connection_manager.send_personal_message(
-                    {"type": "stats", "data": stats},
-                    websocket
-                )
-            else:
-                # Echo back any other message (can be customized)
-                await connection_manager.send_personal_message(
-                    {
-                        "type": "echo",
-                        "message": "Message received",
-                        "original": data
-                    },
-                    websocket
-                )
+            handler = MESSAGE_HANDLERS.get(data.get("type", "message"), _handle_echo)
+            await handler(websocket, data)
 
     except WebSocketDisconnect:
         connection_manager.disconnect(channel, client_id)
-        print(f"Client {client_id} disconnected from {channel}")
+        logger.debug("WebSocket client disconnected", client_id=client_id, channel=channel)
     except Exception as e:
-        print(f"Error in WebSocket connection for {client_id}: {e}")
+        logger.error("WebSocket connection error", client_id=client_id, channel=channel, error=str(e))
         connection_manager.disconnect(channel, client_id)
 
 
@@ -164,7 +164,6 @@ class AdminService:
         if not user:
             raise ValueError(f"Usuario {user_id} no encontrado")
         user.is_active = is_active
-        user.updated_at = datetime.utcnow()
         db.add(user)
         db.commit()
         db.refresh(user)
@@ -155,7 +155,9 @@ class BaseService(Generic[ModelType, CreateSchemaType, UpdateSchemaType, ReadSch
         count_statement = self._apply_tenant_filter(
             count_statement, organization_id=organization_id, include_shared=include_shared
         )
-        total = session.exec(count_statement).one()
+        total = self._cached_count(
+            session, count_statement, organization_id=organization_id, include_shared=include_shared
+        )
 
         # Data
         statement = select(self.model)
@@ -1,11 +1,20 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from sqlmodel import Session, select
 from datetime import datetime
+import asyncio
 import re
+import time
 
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+
+from app.database import engine
 from app.models.cors_origin import CorsOrigin, CorsOriginCreate, CorsOriginUpdate, CorsOriginRead
 from app.services.cache_service import cache_service
 from app.config import settings
+from app.utils.logger import get_structured_logger
+
+logger = get_structured_logger(__name__)
 
 
 class CorsService:
@@ -15,12 +24,19 @@ class CorsService:
     Features:
     - Get active origins from database
     - Fallback to "*" if database is empty
-    - Cache origins for performance
+    - Cache origins for performance (Redis compartido + copia local por worker)
+    - Invalidation broadcast to every worker via Redis pub/sub
     - Validate origin URLs
     """
 
     CACHE_KEY = "cors:origins"
     CACHE_TTL = 3600  # 1 hour (CORS doesn't change frequently)
+    INVALIDATE_CHANNEL = "cors:invalidate"
+    LOCAL_TTL = 60  # red de seguridad si un worker pierde un mensaje pub/sub
+
+    def __init__(self):
+        # (origins, expira_en) — lo consulta el CORS middleware en cada request
+        self._local: Optional[Tuple[List[str], float]] = None
 
     def get_active_origins(self, session: Session) -> List[str]:
         """
@@ -53,6 +69,60 @@ class CorsService:
 
         return result
 
+    def cached_origins(self) -> Optional[List[str]]:
+        """Copia local de los origins si sigue vigente (sin I/O)."""
+        local = self._local
+        if local is not None and local[1] > time.monotonic():
+            return local[0]
+        return None
+
+    def load_origins(self) -> List[str]:
+        """
+        Origins para el CORS middleware: copia local -> Redis -> BD.
+        Si la BD no responde se usan los origins de settings (CORS_ORIGINS).
+        """
+        origins = self.cached_origins()
+        if origins is not None:
+            return origins
+
+        try:
+            with Session(engine) as session:
+                origins = self.get_active_origins(session)
+        except Exception as e:
+            logger.warning("Could not load CORS origins from DB, falling back to environment", error=str(e))
+            origins = settings.cors_origins_list
+
+        self._local = (origins, time.monotonic() + self.LOCAL_TTL)
+        return origins
+
+    def clear_local_cache(self) -> None:
+        """Descarta la copia local (la próxima request recarga desde Redis/BD)."""
+        self._local = None
+
+    async def listen_for_invalidations(self) -> None:
+        """
+        Suscriptor pub/sub: cuando cualquier worker invalida los origins,
+        todos descartan su copia local. Se lanza desde el lifespan.
+        """
+        client = aioredis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+            password=settings.REDIS_PASSWORD or None,
+        )
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(self.INVALIDATE_CHANNEL)
+            async for _ in pubsub.listen():
+                self.clear_local_cache()
+        except asyncio.CancelledError:
+            raise
+        except RedisError as e:
+            logger.warning("CORS invalidation listener stopped", error=str(e))
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
+
     def get_all(self, session: Session, include_inactive: bool = False) -> List[CorsOrigin]:
         """
         Get all CORS origins (for admin panel).
@@ -101,8 +171,8 @@ class CorsService:
         session.commit()
         session.refresh(origin)
 
-        # Invalidate cache
-        cache_service.delete(self.CACHE_KEY)
+        # Invalidate cache (todos los workers)
+        self.invalidate_cache()
 
         return origin
 
@@ -139,8 +209,8 @@ class CorsService:
         session.commit()
         session.refresh(origin)
 
-        # Invalidate cache
-        cache_service.delete(self.CACHE_KEY)
+        # Invalidate cache (todos los workers)
+        self.invalidate_cache()
 
         return origin
 
@@ -162,8 +232,8 @@ class CorsService:
         session.delete(origin)
         session.commit()
 
-        # Invalidate cache
-        cache_service.delete(self.CACHE_KEY)
+        # Invalidate cache (todos los workers)
+        self.invalidate_cache()
 
         return True
 
@@ -198,8 +268,14 @@ class CorsService:
             )
 
     def invalidate_cache(self) -> None:
-        """Manually invalidate CORS origins cache"""
+        """Invalidate CORS origins cache: Redis, this worker and (via pub/sub) the rest"""
         cache_service.delete(self.CACHE_KEY)
+        self.clear_local_cache()
+        if cache_service.enabled and cache_service.client:
+            try:
+                cache_service.client.publish(self.INVALIDATE_CHANNEL, "1")
+            except RedisError as e:
+                logger.warning("CORS invalidation publish error", error=str(e))
 
 
 # Singleton instance
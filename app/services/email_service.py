@@ -3,21 +3,33 @@ Email service para envío de correos con SMTP + Jinja2.
 Soporta envío directo y encolado via ARQ para delivery en background.
 """
 import logging
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Optional, Dict, Any
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.application import MIMEApplication
 
-import aiosmtplib
 from jinja2 import Environment, FileSystemLoader, select_autoescape
 from email_validator import validate_email, EmailNotValidError
 
 from app.config import settings
+from app.services.smtp_pool import SMTPPool
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=4096)
+def _is_valid_email(email: str) -> bool:
+    """Validación sintáctica (sin lookups DNS/MX); los destinatarios se repiten
+    mucho entre envíos, así que el resultado se cachea."""
+    try:
+        validate_email(email, check_deliverability=False)
+        return True
+    except EmailNotValidError:
+        return False
+
+
 class EmailService:
     """
     Servicio de email con soporte de templates y cola ARQ.
@@ -36,12 +48,26 @@ class EmailService:
         self.from_name = settings.SMTP_FROM_NAME
         self.use_tls = settings.SMTP_USE_TLS
 
-        # Jinja2 templates
+        # Conexiones SMTP reutilizadas entre envíos (handshake + AUTH una vez)
+        self.smtp_pool = SMTPPool(
+            hostname=self.smtp_host,
+            port=self.smtp_port,
+            username=self.smtp_user,
+            password=self.smtp_password,
+            use_tls=self.use_tls,
+            size=settings.SMTP_POOL_SIZE,
+        )
+
+        # Jinja2 templates: un Environment por proceso; cada template se compila
+        # una vez y queda en su cache LRU. Sin auto_reload no se hace stat()
+        # del archivo en cada get_template.
         templates_dir = Path(settings.EMAIL_TEMPLATES_DIR)
         if templates_dir.exists():
             self.jinja_env = Environment(
                 loader=FileSystemLoader(str(templates_dir)),
-                autoescape=select_autoescape(['html', 'xml'])
+                autoescape=select_autoescape(['html', 'xml']),
+                auto_reload=settings.EMAIL_TEMPLATES_AUTO_RELOAD,
+                cache_size=400,
             )
         else:
             self.jinja_env = None
@@ -50,11 +76,7 @@ class EmailService:
     # ---- Validación ----
 
     def _validate_email(self, email: str) -> bool:
-        try:
-            validate_email(email, check_deliverability=False)
-            return True
-        except EmailNotValidError:
-            return False
+        return _is_valid_email(email)
 
     # ---- Construcción de mensaje MIME ----
 
@@ -101,9 +123,15 @@ class EmailService:
         bcc: Optional[List[str]] = None,
         attachments: Optional[List[tuple]] = None,
     ) -> bool:
-        """Envía email directamente via SMTP (síncrono en el request)."""
-        all_emails = to + (cc or []) + (bcc or [])
-        for email in all_emails:
+        """
+        Envía email directamente via SMTP (síncrono en el request).
+
+        Todos los destinatarios (to + cc + bcc) van en un único sobre: un
+        MAIL FROM, un RCPT TO por dirección única y un solo DATA.
+        """
+        # Sin duplicados: cada RCPT TO es un round trip y una entrega extra
+        recipients = list(dict.fromkeys(to + (cc or []) + (bcc or [])))
+        for email in recipients:
             if not self._validate_email(email):
                 logger.warning(f"Invalid email address: {email}")
                 return False
@@ -117,17 +145,7 @@ class EmailService:
                 to=to, subject=subject, html_content=html_content,
                 text_content=text_content, cc=cc, bcc=bcc, attachments=attachments,
             )
-            recipients = to + (cc or []) + (bcc or [])
-
-            await aiosmtplib.send(
-                message,
-                hostname=self.smtp_host,
-                port=self.smtp_port,
-                username=self.smtp_user,
-                password=self.smtp_password,
-                use_tls=self.use_tls,
-                recipients=recipients,
-            )
+            await self.smtp_pool.send_message(message, recipients=recipients)
 
             logger.info(f"Email sent to: {', '.join(to)}")
             return True
@@ -136,6 +154,10 @@ class EmailService:
             logger.error(f"Error sending email: {e}")
             return False
 
+    async def close(self) -> None:
+        """Cierra las conexiones SMTP del pool (shutdown)."""
+        await self.smtp_pool.close()
+
     # ---- Rendering de templates ----
 
     def render_template(self, template_name: str, context: Dict[str, Any]) -> str:
@@ -7,7 +7,8 @@ para cualquier modelo que herede de BaseService.
 
 from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List, Any, Union
-from sqlmodel import select
+from sqlmodel import func, select
+from app.config import settings
 from app.services.cache_service import cache_service
 import hashlib
 import json
@@ -84,6 +85,9 @@ class QueryFilter(BaseModel):
     order_direction: Optional[str] = Field(default="asc", pattern="^(asc|desc)$")
     limit: Optional[int] = Field(default=100, ge=1, le=1000)
     offset: Optional[int] = Field(default=0, ge=0)
+    # Paginación keyset: filas con id > after_id ordenadas por id (ignora
+    # order_by/offset). Índice de PK en lugar de recorrer `offset` filas
+    after_id: Optional[int] = Field(default=None, ge=0)
 
     class Config:
         use_enum_values = True
@@ -113,13 +117,16 @@ class QueryBuilder:
         if filters.conditions:
             self._apply_conditions(filters.conditions, filters.operator)
 
-        if filters.order_by:
+        if filters.after_id is not None:
+            id_column = self.model_class.id
+            self.query = self.query.where(id_column > filters.after_id).order_by(asc(id_column))
+        elif filters.order_by:
             self._apply_ordering(filters.order_by, filters.order_direction)
 
         if filters.limit is not None:
             self.query = self.query.limit(filters.limit)
 
-        if filters.offset is not None:
+        if filters.offset is not None and filters.after_id is None:
             self.query = self.query.offset(filters.offset)
 
         return self
@@ -295,16 +302,18 @@ class FilterMixin:
             logger.error(f"Error ejecutando filtro: {e}")
             raise
 
-    def count_filtered(self, session, filters: QueryFilter) -> int:
+    def count_filtered(self, session, filters: QueryFilter, *, organization_id=None, include_shared: bool = False) -> int:
         """
         Cuenta registros que coinciden con los filtros (sin paginación).
 
         Args:
             session: Sesión de base de datos
             filters: Objeto QueryFilter (solo usa conditions, ignora limit/offset)
+            organization_id: Filtrar por tenant (opcional)
+            include_shared: Incluir datos de org sistema (opcional)
 
         Returns:
-            Número de registros que coinciden
+            Número de registros que coinciden (cacheado, ver _cached_count)
         """
         try:
             # Crear filtro sin paginación
@@ -328,14 +337,46 @@ class FilterMixin:
             if hasattr(self, '_apply_soft_delete_filter'):
                 query = self._apply_soft_delete_filter(query)
 
-            results = session.exec(query).all()
+            # Mismo filtro de tenant que filter(): el total debe ser el de las filas visibles
+            if organization_id and hasattr(self.model, "organization_id"):
+                query = self._apply_tenant_filter(
+                    query, organization_id=organization_id, include_shared=include_shared
+                )
 
-            return len(results)
+            # Key sin limit/offset/orden: todas las páginas comparten el COUNT
+            conditions_json = json.dumps(
+                count_filters.model_dump(include={"conditions", "operator"}), sort_keys=True, default=str
+            )
+            return self._cached_count(
+                session,
+                select(func.count()).select_from(query.subquery()),
+                hash=hashlib.md5(conditions_json.encode()).hexdigest()[:8],
+                organization_id=organization_id,
+                include_shared=include_shared,
+            )
 
         except Exception as e:
             logger.error(f"Error contando registros filtrados: {e}")
             return 0
 
+    def _cached_count(self, session, count_statement, **key_params) -> int:
+        """
+        Ejecuta un SELECT COUNT(*) y cachea el resultado COUNT_CACHE_TTL
+        segundos. Las escrituras lo invalidan con el resto del cache del
+        recurso (invalidate_all), así que el TTL solo acota lo desactualizado
+        que puede quedar ante cambios hechos por fuera del servicio.
+        """
+        cache_prefix = f"{self.cache_prefix}:count"
+        # _generate_key usa json.dumps sin default: organization_id puede ser UUID
+        key_params = {key: str(value) for key, value in key_params.items()}
+        cached = cache_service.get(cache_prefix, **key_params)
+        if cached is not None:
+            return cached
+
+        total = session.exec(count_statement).one()
+        cache_service.set(cache_prefix, total, ttl=settings.COUNT_CACHE_TTL, **key_params)
+        return total
+
     def filter_paginated(self, session, filters: QueryFilter, *, organization_id=None, include_shared: bool = False) -> dict:
         """
         Filtra registros y retorna resultado paginado con metadata.
@@ -347,7 +388,8 @@ class FilterMixin:
             include_shared: Incluir datos de org sistema (opcional)
 
         Returns:
-            Dict con 'data', 'total', 'limit', 'offset', 'has_more'
+            Dict con 'data', 'total', 'limit', 'offset', 'has_more'; con
+            filters.after_id (keyset): 'data', 'limit', 'next_cursor', 'has_more'
         """
         # Generate cache key for paginated result
         cache_prefix = f"{self.cache_prefix}:filter:paginated"
@@ -363,19 +405,54 @@ class FilterMixin:
                 return cached
 
         # Not in cache, execute queries
-        total = self.count_filtered(session, filters)
-        data = self.filter(session, filters, organization_id=organization_id, include_shared=include_shared)
-
-        result = {
-            "data": data,
-            "total": total,
-            "limit": filters.limit,
-            "offset": filters.offset,
-            "has_more": (filters.offset + len(data)) < total
-        }
+        if filters.after_id is not None:
+            result = self._filter_keyset(
+                session, filters, organization_id=organization_id, include_shared=include_shared
+            )
+        else:
+            total = self.count_filtered(
+                session, filters, organization_id=organization_id, include_shared=include_shared
+            )
+            # Offset más allá del total: no hay página que leer
+            if filters.offset >= total:
+                data = []
+            else:
+                data = self.filter(session, filters, organization_id=organization_id, include_shared=include_shared)
+
+            result = {
+                "data": data,
+                "total": total,
+                "limit": filters.limit,
+                "offset": filters.offset,
+                "has_more": (filters.offset + len(data)) < total
+            }
 
         # Store in cache (solo sin filtro de tenant)
         if not organization_id:
             cache_service.set(cache_prefix, result, hash=filters_hash)
 
         return result
+
+    def _filter_keyset(self, session, filters: QueryFilter, *, organization_id=None, include_shared: bool = False) -> dict:
+        """
+        Página keyset (id > after_id): sin COUNT ni OFFSET. Pide limit + 1
+        filas para saber si hay más sin consultar el total.
+        """
+        probe = filters.model_copy(update={"limit": filters.limit + 1})
+        rows = self.filter(session, probe, organization_id=organization_id, include_shared=include_shared)
+
+        has_more = len(rows) > filters.limit
+        data = rows[:filters.limit]
+        if data:
+            # filter() devuelve dicts cuando la página viene del cache
+            last = data[-1]
+            next_cursor = last["id"] if isinstance(last, dict) else last.id
+        else:
+            next_cursor = None
+
+        return {
+            "data": data,
+            "limit": filters.limit,
+            "next_cursor": next_cursor if has_more else None,
+            "has_more": has_more
+        }
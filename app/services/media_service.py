@@ -2,14 +2,21 @@
 Media service for handling multimedia files.
 Integrates with StorageService for file storage and BaseService for CRUD operations.
 """
-from typing import BinaryIO, Optional
+from array import array
+from typing import BinaryIO, Iterable, Iterator, Optional
 from sqlmodel import Session, select
 
 from app.services.base_service import BaseService
+from app.services.filters import QueryFilter
 from app.services.storage_service import storage_service
 from app.models.media import Media, MediaCreate, MediaUpdate, MediaRead
 from app.config import settings
 
+# Columnas de Media expuestas en MediaRead (url/download_url se calculan aparte)
+_MEDIA_READ_COLUMNS = tuple(
+    name for name in MediaRead.model_fields if name not in ("url", "download_url")
+)
+
 
 class MediaService(BaseService[Media, MediaCreate, MediaUpdate, MediaRead]):
     """
@@ -63,7 +70,8 @@ class MediaService(BaseService[Media, MediaCreate, MediaUpdate, MediaRead]):
         alt_text: Optional[str] = None,
         user_id: Optional[int] = None,
         is_public: bool = False,
-        broadcast: bool = True
+        broadcast: bool = True,
+        content_hash: Optional[str] = None
     ) -> Media:
         """
         Upload a file and create media record.
@@ -78,6 +86,7 @@ class MediaService(BaseService[Media, MediaCreate, MediaUpdate, MediaRead]):
             user_id: Owner user ID
             is_public: Public access flag
             broadcast: Whether to broadcast via WebSocket
+            content_hash: Content hash computed by the caller while reading the upload
 
         Returns:
             Created Media object
@@ -98,6 +107,7 @@ class MediaService(BaseService[Media, MediaCreate, MediaUpdate, MediaRead]):
             storage_path=storage_path,
             file_size=file_size,
             mime_type=mime_type,
+            content_hash=content_hash,
             file_type=file_type,
             description=description,
             alt_text=alt_text,
@@ -111,7 +121,7 @@ class MediaService(BaseService[Media, MediaCreate, MediaUpdate, MediaRead]):
 
         return media
 
-    async def get_media_with_urls(
+    def get_media_with_urls(
         self,
         session: Session,
         media_id: int,
@@ -160,13 +170,48 @@ class MediaService(BaseService[Media, MediaCreate, MediaUpdate, MediaRead]):
             List of MediaRead with URLs
         """
         media_list = self.get_all(session, skip, limit)
+        return self.add_urls_to_many(media_list, generate_presigned)
+
+    def add_urls_to_many(
+        self,
+        media_list: Iterable[Media],
+        generate_presigned: bool = True
+    ) -> list[MediaRead]:
+        """
+        Convert media records to MediaRead with access URLs.
+
+        Same result as _add_urls_to_media per item, but the backend checks are
+        resolved once for the whole list instead of per row. Rows loaded from
+        the database already satisfy MediaRead, so they are built with
+        model_construct (no validation); anything else is validated.
+
+        Args:
+            media_list: Media records
+            generate_presigned: Generate pre-signed URLs for S3
+
+        Returns:
+            List of MediaRead with URLs
+        """
+        presign = storage_service.get_presigned_url if storage_service.use_s3 and generate_presigned else None
+        construct = MediaRead.model_construct
 
-        # Convert to read schema and add URLs
         result = []
         for media in media_list:
-            media_read = MediaRead.model_validate(media)
-            media_read = self._add_urls_to_media(media_read, generate_presigned)
-            result.append(media_read)
+            if not isinstance(media, Media):
+                media_read = MediaRead.model_validate(media)
+                download_url = f"/media/{media_read.id}/download"
+                media_read.download_url = download_url
+                media_read.url = (presign and presign(media_read.storage_path)) or download_url
+                result.append(media_read)
+                continue
+
+            values = {name: getattr(media, name) for name in _MEDIA_READ_COLUMNS}
+            if isinstance(values["embedding"], array):  # CompactHalfVec devuelve array('f')
+                values["embedding"] = values["embedding"].tolist()
+            download_url = f"/media/{media.id}/download"
+            values["download_url"] = download_url
+            values["url"] = (presign and presign(media.storage_path)) or download_url
+            result.append(construct(**values))
 
         return result
 
@@ -191,25 +236,24 @@ class MediaService(BaseService[Media, MediaCreate, MediaUpdate, MediaRead]):
 
         return media
 
-    async def download_file(self, session: Session, media_id: int) -> tuple[bytes, str, str]:
+    async def open_stream(
+        self,
+        media: Media,
+        start: int = 0,
+        end: Optional[int] = None
+    ) -> Iterator[bytes]:
         """
-        Download file content.
+        Open file content for streaming, without loading it in memory.
 
         Args:
-            session: Database session
-            media_id: Media ID
+            media: Media record
+            start: First byte to return
+            end: Last byte to return (inclusive), None for end of file
 
         Returns:
-            Tuple of (file_content, filename, mime_type)
+            Iterator of file chunks
         """
-        media = self.get_by_id(session, media_id)
-        if not media:
-            raise FileNotFoundError(f"Media {media_id} not found")
-
-        # Download file from storage
-        file_content = await storage_service.download_file(media.storage_path)
-
-        return file_content, media.filename, media.mime_type or "application/octet-stream"
+        return await storage_service.open_stream(media.storage_path, start, end)
 
     async def delete_media(
         self,
@@ -243,47 +287,70 @@ class MediaService(BaseService[Media, MediaCreate, MediaUpdate, MediaRead]):
         session: Session,
         user_id: int,
         skip: int = 0,
-        limit: int = 100
-    ) -> list[Media]:
-        """Get all media files for a specific user"""
+        limit: int = 100,
+        generate_presigned: bool = True
+    ) -> list[MediaRead]:
+        """Get all media files for a specific user, with access URLs"""
         statement = (
             select(self.model)
             .where(self.model.user_id == user_id)
             .offset(skip)
             .limit(limit)
         )
-        return list(session.exec(statement).all())
+        return self.add_urls_to_many(session.exec(statement), generate_presigned)
 
     def get_by_file_type(
         self,
         session: Session,
         file_type: str,
         skip: int = 0,
-        limit: int = 100
-    ) -> list[Media]:
-        """Get all media files of a specific type (image, video, audio, document, other)"""
+        limit: int = 100,
+        generate_presigned: bool = True
+    ) -> list[MediaRead]:
+        """Get all media files of a specific type (image, video, audio, document, other), with access URLs"""
         statement = (
             select(self.model)
             .where(self.model.file_type == file_type)
             .offset(skip)
             .limit(limit)
         )
-        return list(session.exec(statement).all())
+        return self.add_urls_to_many(session.exec(statement), generate_presigned)
 
     def get_public_media(
         self,
         session: Session,
         skip: int = 0,
-        limit: int = 100
-    ) -> list[Media]:
-        """Get all public media files"""
+        limit: int = 100,
+        generate_presigned: bool = True
+    ) -> list[MediaRead]:
+        """Get all public media files, with access URLs"""
         statement = (
             select(self.model)
             .where(self.model.is_public == True)
             .offset(skip)
             .limit(limit)
         )
-        return list(session.exec(statement).all())
+        return self.add_urls_to_many(session.exec(statement), generate_presigned)
+
+    def filter_with_urls(
+        self,
+        session: Session,
+        filters: QueryFilter,
+        generate_presigned: bool = True
+    ) -> list[MediaRead]:
+        """filter() with access URLs"""
+        return self.add_urls_to_many(self.filter(session, filters), generate_presigned)
+
+    def filter_paginated_with_urls(
+        self,
+        session: Session,
+        filters: QueryFilter,
+        generate_presigned: bool = True
+    ) -> dict:
+        """filter_paginated() with access URLs: {data, total, limit, offset, has_more}"""
+        result = self.filter_paginated(session, filters)
+        # Copia: el dict puede venir del cache y no debe mutarse
+        return {**result, "data": self.add_urls_to_many(result["data"], generate_presigned)}
 
 
 # Singleton instance
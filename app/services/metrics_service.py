@@ -1,15 +1,35 @@
-from datetime import datetime, timedelta
+import re
+from datetime import date, datetime, timedelta
 from typing import List, Optional
 from sqlmodel import Session, select, func
-from sqlalchemy import and_
+from sqlalchemy import (
+    DateTime, and_, bindparam, case, insert, literal_column, or_, text, type_coerce, union_all, update
+)
 
+from app.config import settings
 from app.models.metric import (
     ApiMetric,
+    ApiMetricBucket,
     ApiMetricRead,
     MetricsSummary,
     EndpointStats,
     ErrorStats
 )
+from app.services.cache_service import cache_service
+from app.utils.duration_sketch import DurationSketch
+
+# Rollup api_metrics -> api_metrics_5m
+ROLLUP_BUCKET = timedelta(minutes=5)
+ROLLUP_GRACE = timedelta(minutes=1)  # margen para métricas aún en la cola del writer
+
+
+def _floor_bucket(ts: datetime) -> datetime:
+    return ts - timedelta(minutes=ts.minute % 5, seconds=ts.second, microseconds=ts.microsecond)
+
+
+def _ceil_bucket(ts: datetime) -> datetime:
+    floor = _floor_bucket(ts)
+    return floor if floor == ts else floor + ROLLUP_BUCKET
 
 
 class MetricsService:
@@ -17,8 +37,15 @@ class MetricsService:
     Service for querying and aggregating API metrics.
 
     Provides analytics and statistics from stored metrics.
+
+    The aggregates (summary, per-endpoint, errors, slowest) are cached in
+    Redis for CACHE_TTL seconds per (hours, limit): dashboards polling them
+    run the aggregation at most once per TTL. No-op if Redis is disabled.
     """
 
+    CACHE_PREFIX = "analytics"
+    CACHE_TTL = 60  # Ventanas de horas: un minuto de atraso es aceptable
+
     def get_recent_metrics(
         self,
         session: Session,
@@ -59,55 +86,43 @@ class MetricsService:
         Returns:
             Summary with totals, averages, and percentiles
         """
+        cached = cache_service.get(f"{self.CACHE_PREFIX}:summary", hours=hours)
+        if cached is not None:
+            return MetricsSummary.model_validate(cached)
+
         # Build query with time filter
         filters = []
         if hours:
             cutoff = datetime.utcnow() - timedelta(hours=hours)
             filters.append(ApiMetric.timestamp >= cutoff)
 
-        # Total requests
-        total_query = select(func.count(ApiMetric.id))
-        if filters:
-            total_query = total_query.where(and_(*filters))
-        total_requests = session.exec(total_query).one()
-
-        # Successful requests (2xx and 3xx)
-        success_query = select(func.count(ApiMetric.id)).where(
-            ApiMetric.status_code < 400
-        )
-        if filters:
-            success_query = success_query.where(and_(*filters))
-        successful_requests = session.exec(success_query).one()
-
-        # Failed requests (4xx and 5xx)
-        failed_requests = total_requests - successful_requests
-
-        # Duration stats
-        duration_query = select(
+        # Totals and duration stats in a single pass
+        stats_query = select(
+            func.count(ApiMetric.id),
+            # Successful requests (2xx and 3xx)
+            func.count(case((ApiMetric.status_code < 400, 1))),
             func.avg(ApiMetric.duration_ms),
             func.min(ApiMetric.duration_ms),
             func.max(ApiMetric.duration_ms)
         )
         if filters:
-            duration_query = duration_query.where(and_(*filters))
-
-        result = session.exec(duration_query).one()
-        avg_duration, min_duration, max_duration = result
+            stats_query = stats_query.where(and_(*filters))
 
-        # Percentiles (p50, p95, p99) - requires getting all durations
-        # For large datasets, this should be optimized with sampling
-        durations_query = select(ApiMetric.duration_ms)
-        if filters:
-            durations_query = durations_query.where(and_(*filters))
-        durations_query = durations_query.order_by(ApiMetric.duration_ms)
+        total_requests, successful_requests, avg_duration, min_duration, max_duration = (
+            session.exec(stats_query).one()
+        )
 
-        durations = list(session.exec(durations_query).all())
+        # Failed requests (4xx and 5xx)
+        failed_requests = total_requests - successful_requests
 
-        p50 = self._percentile(durations, 50) if durations else None
-        p95 = self._percentile(durations, 95) if durations else None
-        p99 = self._percentile(durations, 99) if durations else None
+        # Percentiles (p50, p95, p99): merged from the rollup sketches when the
+        # window is covered by them, otherwise computed by the database
+        percentiles = self._sketch_percentiles(session, hours) if total_requests else None
+        if percentiles is None:
+            percentiles = self._duration_percentiles(session, filters, total_requests)
+        p50, p95, p99 = percentiles
 
-        return MetricsSummary(
+        summary = MetricsSummary(
             total_requests=total_requests,
             successful_requests=successful_requests,
             failed_requests=failed_requests,
@@ -118,6 +133,8 @@ class MetricsService:
             p95_duration_ms=round(p95, 2) if p95 else None,
             p99_duration_ms=round(p99, 2) if p99 else None
         )
+        cache_service.set(f"{self.CACHE_PREFIX}:summary", summary.model_dump(), ttl=self.CACHE_TTL, hours=hours)
+        return summary
 
     def get_endpoint_stats(
         self,
@@ -136,42 +153,29 @@ class MetricsService:
         Returns:
             List of endpoint statistics ordered by request count
         """
-        cutoff = datetime.utcnow() - timedelta(hours=hours) if hours else None
+        cached = cache_service.get(f"{self.CACHE_PREFIX}:endpoints", hours=hours, limit=limit)
+        if cached is not None:
+            return [EndpointStats.model_validate(item) for item in cached]
 
-        # Query grouped by endpoint and method
-        total_requests_col = func.count(ApiMetric.id).label("total_requests")
-        avg_duration_col = func.avg(ApiMetric.duration_ms).label("avg_duration")
+        totals = self._endpoint_totals(session, hours)
+        total_requests_col = func.sum(totals.c.total).label("total_requests")
 
         query = select(
-            ApiMetric.path,
-            ApiMetric.method,
+            totals.c.path,
+            totals.c.method,
             total_requests_col,
-            avg_duration_col
-        ).group_by(ApiMetric.path, ApiMetric.method)
-
-        if cutoff:
-            query = query.where(ApiMetric.timestamp >= cutoff)
-
+            func.sum(totals.c.sum_ms),
+            func.sum(totals.c.errors)
+        ).group_by(totals.c.path, totals.c.method)
         query = query.order_by(total_requests_col.desc()).limit(limit)
 
         results = session.exec(query).all()
 
         stats = []
-        for row in results:
-            path, method, total, avg_dur = row
-
-            # Count errors separately for this endpoint
-            error_query = select(func.count(ApiMetric.id)).where(
-                and_(
-                    ApiMetric.path == path,
-                    ApiMetric.method == method,
-                    ApiMetric.status_code >= 400
-                )
-            )
-            if cutoff:
-                error_query = error_query.where(ApiMetric.timestamp >= cutoff)
-
-            errors = session.exec(error_query).one()
+        for path, method, total, sum_ms, errors in results:
+            # SUM(count) es numeric en Postgres (Decimal): normalizar tipos
+            total, sum_ms, errors = int(total), float(sum_ms or 0), int(errors)
+            avg_dur = sum_ms / total if total else None
             error_rate = (errors / total * 100) if total > 0 else 0
             success_rate = 100 - error_rate
 
@@ -184,6 +188,7 @@ class MetricsService:
                 success_rate=round(success_rate, 2)
             ))
 
+        self._cache_list("endpoints", stats, hours=hours, limit=limit)
         return stats
 
     def get_error_stats(
@@ -201,6 +206,10 @@ class MetricsService:
         Returns:
             List of error statistics
         """
+        cached = cache_service.get(f"{self.CACHE_PREFIX}:errors", hours=hours)
+        if cached is not None:
+            return [ErrorStats.model_validate(item) for item in cached]
+
         cutoff = datetime.utcnow() - timedelta(hours=hours) if hours else None
 
         # Get total requests for percentage calculation
@@ -252,6 +261,7 @@ class MetricsService:
                 most_common_path=most_common_path
             ))
 
+        self._cache_list("errors", stats, hours=hours)
         return stats
 
     def get_slowest_endpoints(
@@ -271,23 +281,23 @@ class MetricsService:
         Returns:
             List of endpoints ordered by average duration (slowest first)
         """
-        cutoff = datetime.utcnow() - timedelta(hours=hours) if hours else None
+        cached = cache_service.get(f"{self.CACHE_PREFIX}:slowest", hours=hours, limit=limit)
+        if cached is not None:
+            return [EndpointStats.model_validate(item) for item in cached]
 
-        total_requests_col = func.count(ApiMetric.id).label("total_requests")
-        avg_duration_col = func.avg(ApiMetric.duration_ms).label("avg_duration")
+        totals = self._endpoint_totals(session, hours)
+        total_requests_col = func.sum(totals.c.total).label("total_requests")
+        avg_duration_col = (func.sum(totals.c.sum_ms) / total_requests_col).label("avg_duration")
 
         query = select(
-            ApiMetric.path,
-            ApiMetric.method,
+            totals.c.path,
+            totals.c.method,
             total_requests_col,
             avg_duration_col
-        ).group_by(ApiMetric.path, ApiMetric.method)
-
-        if cutoff:
-            query = query.where(ApiMetric.timestamp >= cutoff)
+        ).group_by(totals.c.path, totals.c.method)
 
         # Only consider endpoints with at least 10 requests (avoid outliers)
-        query = query.having(func.count(ApiMetric.id) >= 10)
+        query = query.having(func.sum(totals.c.total) >= 10)
         query = query.order_by(avg_duration_col.desc()).limit(limit)
 
         results = session.exec(query).all()
@@ -297,30 +307,365 @@ class MetricsService:
             stats.append(EndpointStats(
                 endpoint=path,
                 method=method,
-                total_requests=total,
-                avg_duration_ms=round(avg_dur, 2) if avg_dur else 0.0,
+                total_requests=int(total),
+                avg_duration_ms=round(float(avg_dur), 2) if avg_dur else 0.0,
                 error_rate=0.0,  # Not calculated for this query
                 success_rate=0.0
             ))
 
+        self._cache_list("slowest", stats, hours=hours, limit=limit)
         return stats
 
-    def _percentile(self, data: List[float], percentile: int) -> Optional[float]:
-        """Calculate percentile from sorted data"""
-        if not data:
+    def _cache_list(self, name: str, items: list, **params) -> None:
+        cache_service.set(
+            f"{self.CACHE_PREFIX}:{name}",
+            [item.model_dump() for item in items],
+            ttl=self.CACHE_TTL,
+            **params
+        )
+
+    PERCENTILES = (50, 95, 99)
+
+    def _duration_percentiles(
+        self,
+        session: Session,
+        filters: list,
+        total: int
+    ) -> List[Optional[float]]:
+        """
+        p50/p95/p99 of duration_ms with linear interpolation (percentile_cont).
+
+        PostgreSQL computes them with percentile_cont in one aggregate query.
+        Other dialects (SQLite) have no ordered-set aggregates: each percentile
+        fetches only the (at most) two sorted rows it interpolates between,
+        via ORDER BY ... LIMIT 2 OFFSET k.
+        """
+        if not total:
+            return [None] * len(self.PERCENTILES)
+
+        if session.get_bind().dialect.name == "postgresql":
+            query = select(*(
+                func.percentile_cont(p / 100).within_group(ApiMetric.duration_ms)
+                for p in self.PERCENTILES
+            ))
+            if filters:
+                query = query.where(and_(*filters))
+            return list(session.exec(query).one())
+
+        result = []
+        for p in self.PERCENTILES:
+            k = (total - 1) * (p / 100)
+            f = int(k)
+            query = select(ApiMetric.duration_ms).order_by(ApiMetric.duration_ms).offset(f).limit(2)
+            if filters:
+                query = query.where(and_(*filters))
+            rows = list(session.exec(query).all())
+            if not rows:
+                result.append(None)
+                continue
+            low = rows[0]
+            high = rows[1] if len(rows) > 1 else low
+            result.append(low + (high - low) * (k - f))
+        return result
+
+    def _sketch_percentiles(
+        self,
+        session: Session,
+        hours: Optional[int]
+    ) -> Optional[List[Optional[float]]]:
+        """
+        Approximate p50/p95/p99 (relative error <= 1%) from the rollup sketches.
+
+        Merges the duration_sketch of every complete bucket in the window and
+        adds the raw durations of the partial bucket at the start and of the
+        not-yet-rolled tail. Returns None (caller falls back to the exact
+        percentiles) if there is no time window, nothing rolled up inside it,
+        or a bucket predates the duration_sketch column.
+        """
+        if not hours:
+            return None
+
+        cutoff = datetime.utcnow() - timedelta(hours=hours)
+        head_end = _ceil_bucket(cutoff)
+        rolled_until = self._rolled_until(session)
+        if rolled_until is None or rolled_until <= head_end:
             return None
 
-        k = (len(data) - 1) * (percentile / 100)
-        f = int(k)
-        c = f + 1 if f + 1 < len(data) else f
+        sketch = DurationSketch()
+        bucket_sketches = session.exec(
+            select(ApiMetricBucket.duration_sketch).where(
+                ApiMetricBucket.bucket >= head_end,
+                ApiMetricBucket.bucket < rolled_until
+            )
+        )
+        for data in bucket_sketches:
+            if data is None:
+                return None
+            sketch.merge(DurationSketch.from_dict(data))
+
+        sketch.update(session.exec(
+            select(ApiMetric.duration_ms).where(
+                ApiMetric.timestamp >= cutoff,
+                or_(ApiMetric.timestamp < head_end, ApiMetric.timestamp >= rolled_until)
+            )
+        ))
+        return [sketch.quantile(p / 100) for p in self.PERCENTILES]
+
+    # ------------------------------------------------------------------ #
+    # Rollup en buckets de 5 minutos (api_metrics_5m)
+    # ------------------------------------------------------------------ #
+
+    def _endpoint_totals(self, session: Session, hours: Optional[int]):
+        """
+        Subquery of (path, method, total, sum_ms, errors) for the window.
+
+        Rows may repeat per endpoint (outer query sums them): complete 5-minute
+        buckets already rolled up are read from api_metrics_5m, and only the
+        partial bucket at the start of the window plus the not-yet-rolled tail
+        are scanned from api_metrics.
+        """
+        raw = select(
+            ApiMetric.path,
+            ApiMetric.method,
+            func.count(ApiMetric.id).label("total"),
+            func.sum(ApiMetric.duration_ms).label("sum_ms"),
+            func.count(case((ApiMetric.status_code >= 400, 1))).label("errors")
+        ).group_by(ApiMetric.path, ApiMetric.method)
+
+        if not hours:
+            return raw.subquery()
+
+        cutoff = datetime.utcnow() - timedelta(hours=hours)
+        head_end = _ceil_bucket(cutoff)
+        rolled_until = self._rolled_until(session)
+
+        if rolled_until is None or rolled_until <= head_end:
+            return raw.where(ApiMetric.timestamp >= cutoff).subquery()
+
+        raw = raw.where(
+            ApiMetric.timestamp >= cutoff,
+            or_(ApiMetric.timestamp < head_end, ApiMetric.timestamp >= rolled_until)
+        )
+        rolled = select(
+            ApiMetricBucket.path,
+            ApiMetricBucket.method,
+            func.sum(ApiMetricBucket.count).label("total"),
+            func.sum(ApiMetricBucket.sum_ms).label("sum_ms"),
+            func.sum(ApiMetricBucket.errors).label("errors")
+        ).where(
+            ApiMetricBucket.bucket >= head_end,
+            ApiMetricBucket.bucket < rolled_until
+        ).group_by(ApiMetricBucket.path, ApiMetricBucket.method)
+
+        return union_all(raw, rolled).subquery()
+
+    def _rolled_until(self, session: Session) -> Optional[datetime]:
+        """End of the last rolled-up bucket (None if nothing rolled up yet)."""
+        last = session.exec(select(func.max(ApiMetricBucket.bucket))).one()
+        return last + ROLLUP_BUCKET if last else None
+
+    @staticmethod
+    def _bucket_expr(session: Session):
+        """SQL expression flooring api_metrics.timestamp to its 5-minute bucket."""
+        if session.get_bind().dialect.name == "postgresql":
+            return func.date_bin(
+                literal_column("INTERVAL '5 minutes'"),
+                ApiMetric.timestamp,
+                literal_column("TIMESTAMP '2000-01-01'")
+            )
+        # SQLite: epoch redondeado, en el mismo formato de texto que usa
+        # SQLAlchemy para DateTime (así las comparaciones de strings coinciden)
+        epoch = func.strftime("%s", ApiMetric.timestamp)
+        return func.strftime("%Y-%m-%d %H:%M:%S.000000", epoch - epoch % 300, "unixepoch")
+
+    def rollup_buckets(self, session: Session, now: Optional[datetime] = None) -> int:
+        """
+        Aggregate complete 5-minute buckets of api_metrics into api_metrics_5m.
 
-        if f == c:
-            return data[f]
+        Picks up where the last rollup stopped and only closes buckets that
+        ended at least ROLLUP_GRACE ago, so each bucket is written once.
+        Counters are aggregated by the database (INSERT ... SELECT); the
+        duration sketches need one pass over the bucket's raw durations.
 
-        # Linear interpolation
-        d0 = data[f] * (c - k)
-        d1 = data[c] * (k - f)
-        return d0 + d1
+        Returns:
+            Number of (bucket, method, path) rows inserted
+        """
+        end = _floor_bucket((now or datetime.utcnow()) - ROLLUP_GRACE)
+        start = self._rolled_until(session)
+        if start is None:
+            oldest = session.exec(select(func.min(ApiMetric.timestamp))).one()
+            if oldest is None:
+                return 0
+            start = _floor_bucket(oldest)
+        if start >= end:
+            return 0
+
+        bucket = self._bucket_expr(session)
+        rows = select(
+            bucket,
+            ApiMetric.method,
+            ApiMetric.path,
+            func.count(ApiMetric.id),
+            func.sum(ApiMetric.duration_ms),
+            func.sum(ApiMetric.duration_ms * ApiMetric.duration_ms),
+            func.count(case((ApiMetric.status_code >= 400, 1)))
+        ).where(
+            ApiMetric.timestamp >= start,
+            ApiMetric.timestamp < end
+        ).group_by(bucket, ApiMetric.method, ApiMetric.path)
+
+        result = session.execute(
+            insert(ApiMetricBucket).from_select(
+                ["bucket", "method", "path", "count", "sum_ms", "sum_sq_ms", "errors"],
+                rows
+            )
+        )
+        self._write_sketches(session, bucket, start, end)
+        session.commit()
+        return result.rowcount
+
+    @staticmethod
+    def _write_sketches(session: Session, bucket, start: datetime, end: datetime) -> None:
+        """Fill duration_sketch for the buckets in [start, end)."""
+        sketches = {}
+        durations = session.execute(
+            select(
+                # SQLite devuelve el bucket como texto: parsearlo a datetime
+                type_coerce(bucket, DateTime),
+                ApiMetric.method,
+                ApiMetric.path,
+                ApiMetric.duration_ms
+            ).where(
+                ApiMetric.timestamp >= start,
+                ApiMetric.timestamp < end
+            ).execution_options(yield_per=10_000)
+        )
+        for key_bucket, method, path, duration in durations:
+            key = (key_bucket, method, path)
+            sketch = sketches.get(key)
+            if sketch is None:
+                sketch = sketches[key] = DurationSketch()
+            sketch.add(duration)
+
+        if not sketches:
+            return
+
+        table = ApiMetricBucket.__table__
+        session.execute(
+            update(table).where(
+                table.c.bucket == bindparam("b_bucket"),
+                table.c.method == bindparam("b_method"),
+                table.c.path == bindparam("b_path")
+            ).values(duration_sketch=bindparam("b_sketch")),
+            [
+                {"b_bucket": b, "b_method": m, "b_path": p, "b_sketch": sketch.to_dict()}
+                for (b, m, p), sketch in sketches.items()
+            ]
+        )
+
+    # ------------------------------------------------------------------ #
+    # Particiones mensuales (PostgreSQL, ver migración 68ace68aecaf)
+    # ------------------------------------------------------------------ #
+
+    _PARTITION_RE = re.compile(r"^api_metrics_y(\d{4})m(\d{2})$")
+
+    @staticmethod
+    def _add_months(d: date, months: int) -> date:
+        total = d.year * 12 + (d.month - 1) + months
+        return date(total // 12, total % 12 + 1, 1)
+
+    def _is_partitioned(self, session: Session) -> bool:
+        if session.get_bind().dialect.name != "postgresql":
+            return False
+        return bool(session.execute(text("""
+            SELECT EXISTS (
+                SELECT 1 FROM pg_partitioned_table pt
+                JOIN pg_class c ON c.oid = pt.partrelid
+                WHERE c.relname = 'api_metrics'
+            )
+        """)).scalar())
+
+    def ensure_partitions(self, session: Session, months_ahead: Optional[int] = None) -> List[str]:
+        """
+        Create monthly api_metrics partitions from the current month up to
+        `months_ahead` months ahead (default METRICS_PARTITIONS_AHEAD). Safe
+        to run repeatedly (app startup and the daily
+        maintain_metrics_partitions cron).
+
+        Rows that already landed in api_metrics_default for a new month are
+        moved into its partition before it is attached, since Postgres
+        refuses to create a partition whose range has rows in DEFAULT.
+
+        No-op unless api_metrics is a partitioned PostgreSQL table.
+
+        Returns:
+            Names of the partitions that were checked/created
+        """
+        if not self._is_partitioned(session):
+            return []
+        if months_ahead is None:
+            months_ahead = settings.METRICS_PARTITIONS_AHEAD
+
+        has_default = session.execute(text("SELECT to_regclass('api_metrics_default')")).scalar() is not None
+        current = date.today().replace(day=1)
+        names = []
+        for offset in range(months_ahead + 1):
+            start = self._add_months(current, offset)
+            end = self._add_months(start, 1)
+            name = f"api_metrics_y{start.year}m{start.month:02d}"
+            names.append(name)
+            if session.execute(text(f"SELECT to_regclass('{name}')")).scalar() is not None:
+                continue
+
+            # Tabla suelta + filas del DEFAULT + ATTACH, todo en la misma transacción
+            session.execute(text(
+                f"CREATE TABLE {name} (LIKE api_metrics INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            ))
+            if has_default:
+                session.execute(text(f"""
+                    WITH moved AS (
+                        DELETE FROM api_metrics_default
+                        WHERE timestamp >= :start AND timestamp < :end
+                        RETURNING *
+                    )
+                    INSERT INTO {name} SELECT * FROM moved
+                """), {"start": start, "end": end})
+            session.execute(text(
+                f"ALTER TABLE api_metrics ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ('{start}') TO ('{end}')"
+            ))
+        session.commit()
+        return names
+
+    def drop_partitions_before(self, session: Session, before: datetime) -> List[str]:
+        """
+        Retention: drop monthly partitions that end on or before `before`.
+        DROP TABLE is O(1) compared to DELETE ... WHERE timestamp < ?.
+
+        Returns:
+            Names of the dropped partitions
+        """
+        if not self._is_partitioned(session):
+            return []
+
+        partitions = session.execute(text("""
+            SELECT c.relname FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            JOIN pg_class p ON p.oid = i.inhparent
+            WHERE p.relname = 'api_metrics'
+        """)).scalars().all()
+
+        dropped = []
+        for name in partitions:
+            match = self._PARTITION_RE.match(name)
+            if not match:
+                continue  # api_metrics_default
+            start = date(int(match.group(1)), int(match.group(2)), 1)
+            if datetime.combine(self._add_months(start, 1), datetime.min.time()) <= before:
+                session.execute(text(f"DROP TABLE {name}"))
+                dropped.append(name)
+        session.commit()
+        return dropped
 
 
 # Singleton instance
@@ -8,6 +8,7 @@ from typing import Dict, Any, Optional
 from datetime import datetime
 import uuid
 
+import orjson
 from arq import create_pool
 from arq.connections import ArqRedis
 from redis.asyncio import Redis
@@ -17,6 +18,9 @@ from app.utils.logger import get_structured_logger
 
 logger = get_structured_logger(__name__)
 
+# Chunks de un envío masivo pendientes; send_bulk_emails encola el siguiente
+BULK_EMAIL_CHUNKS_KEY = "bulk_emails:{group_id}"
+
 
 class QueueService:
     """
@@ -218,9 +222,17 @@ class QueueService:
         emails: list,
         rate_limit: int = 10,
         user_id: int = None
-    ) -> str:
+    ) -> Dict[str, Any]:
         """
-        Enqueue bulk email sending task
+        Enqueue bulk email sending as a chain of one job per minute of sending
+
+        The list is split into chunks of `rate_limit` emails. Only the first
+        chunk is enqueued here; the rest are stored under
+        bulk_emails:{group_id} and each job enqueues the next one when it
+        finishes, so chunks never overlap (the rate holds even if a job runs
+        late or is retried) and only the last one publishes the group's
+        bulk_email_completed. Each job stays small, well under the worker's
+        job_timeout, and a retry only resends its own chunk.
 
         Args:
             emails: List of dicts with email data
@@ -228,23 +240,41 @@ class QueueService:
             user_id: User who triggered this
 
         Returns:
-            Task ID
+            Dict with group_id and task_ids ("{group_id}:{index}" per chunk;
+            later chunks get their job as the previous one completes)
         """
         if not self.initialized:
             await self.initialize()
 
-        job = await self.redis.enqueue_job(
-            'send_bulk_emails',
-            emails,
-            rate_limit,
-            user_id
-        )
+        group_id = uuid.uuid4().hex
+        chunks = [emails[i:i + rate_limit] for i in range(0, len(emails), rate_limit)]
+        task_ids = [f"{group_id}:{index}" for index in range(len(chunks))]
+
+        if len(chunks) > 1:
+            # Un día de margen por encima del tiempo total de envío
+            key = BULK_EMAIL_CHUNKS_KEY.format(group_id=group_id)
+            await self.redis.rpush(key, *(orjson.dumps(chunk) for chunk in chunks))
+            await self.redis.expire(key, len(chunks) * 60 + 86400)
+
+        if chunks:
+            await self.redis.enqueue_job(
+                'send_bulk_emails',
+                chunks[0],
+                rate_limit,
+                user_id,
+                group_id=group_id,
+                chunk_index=0,
+                chunk_count=len(chunks),
+                group_results={"total": len(emails), "sent": 0, "failed": 0, "errors": []},
+                _job_id=task_ids[0]
+            )
 
         logger.info("Enqueued bulk emails task",
                    email_count=len(emails),
-                   job_id=job.job_id,
+                   group_id=group_id,
+                   chunk_count=len(chunks),
                    rate_limit=rate_limit)
-        return job.job_id
+        return {"group_id": group_id, "task_ids": task_ids}
 
     # Webhook Tasks
 
@@ -2,8 +2,10 @@
 Rate Limiter Service using Redis
 
 Implements sliding window rate limiting to protect API endpoints
-from abuse and ensure fair usage.
+from abuse and ensure fair usage, plus a token bucket for endpoints
+that should tolerate short bursts.
 """
+import math
 import time
 from typing import Optional, Tuple
 from redis.asyncio import Redis
@@ -11,16 +13,66 @@ from redis.asyncio import Redis
 from app.config import settings
 
 
+# Sliding window counter atómico en un solo round-trip (EVALSHA).
+# KEYS = contador de la ventana fija actual y de la anterior; ARGV = limit,
+# peso de la ventana anterior (fracción que aún cae dentro de la ventana
+# deslizante) y TTL en ms (2 ventanas). Solo incrementa si el estimado
+# prev * peso + actual entra en el límite. Retorna {allowed, actual, anterior}.
+SLIDING_COUNTER_LUA = """
+local curr = tonumber(redis.call('GET', KEYS[1]) or '0')
+local prev = tonumber(redis.call('GET', KEYS[2]) or '0')
+if prev * tonumber(ARGV[2]) + curr < tonumber(ARGV[1]) then
+    redis.call('INCR', KEYS[1])
+    redis.call('PEXPIRE', KEYS[1], ARGV[3])
+    return {1, curr, prev}
+end
+return {0, curr, prev}
+"""
+
+
+# Token bucket atómico (EVALSHA). KEYS = hash {tokens, ts}; ARGV = capacidad,
+# recarga por segundo, ahora (s) y TTL en ms (tiempo de recarga completa:
+# después el bucket está lleno y equivale a no tener key). Solo escribe si
+# consume un token. Los tokens vuelven como string: Lua trunca los floats
+# al convertirlos en reply de Redis. Retorna {allowed, tokens restantes}.
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1]) or capacity
+local ts = tonumber(data[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+if tokens >= 1 then
+    tokens = tokens - 1
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('PEXPIRE', KEYS[1], ARGV[4])
+    return {1, tostring(tokens)}
+end
+return {0, tostring(tokens)}
+"""
+
+
+def _window_keys(key: str, window: int, now: float) -> Tuple[str, str, float]:
+    """(key actual, key anterior, segundos transcurridos de la ventana actual)."""
+    bucket = int(now // window)
+    # Hash tag {key}: ambos contadores en el mismo slot de Redis Cluster
+    base = f"rate_limit:{{{key}}}:{window}"
+    return f"{base}:{bucket}", f"{base}:{bucket - 1}", now - bucket * window
+
+
 class RateLimiter:
     """
-    Redis-based rate limiter using sliding window algorithm
+    Redis-based rate limiter using the sliding window counter algorithm
 
     Features:
-    - Sliding window (more accurate than fixed window)
+    - Sliding window counter: two fixed-window counters per key, the
+      previous one weighted by how much of it still overlaps the sliding
+      window (no per-request entries: constant memory per key)
     - Per-IP or per-user rate limiting
     - Configurable limits per endpoint
     - Returns remaining requests info
-    - Automatic cleanup of old entries
+    - Counters expire on their own after two windows
 
     Example:
         limiter = RateLimiter(redis_client)
@@ -40,6 +92,8 @@ class RateLimiter:
         """
         self.redis = redis
         self.enabled = settings.REDIS_ENABLED
+        self._sliding_counter = None
+        self._token_bucket = None
 
     async def initialize(self):
         """Initialize Redis connection if not provided"""
@@ -55,6 +109,10 @@ class RateLimiter:
                 decode_responses=True
             )
 
+        # register_script usa EVALSHA y cae a EVAL si el script no está cargado
+        self._sliding_counter = self.redis.register_script(SLIDING_COUNTER_LUA)
+        self._token_bucket = self.redis.register_script(TOKEN_BUCKET_LUA)
+
     async def check_rate_limit(
         self,
         key: str,
@@ -97,47 +155,102 @@ class RateLimiter:
                 "retry_after": 0
             }
 
-        if not self.redis:
+        if self._sliding_counter is None:
             await self.initialize()
 
         now = time.time()
-        rate_limit_key = f"rate_limit:{key}"
+        curr_key, prev_key, elapsed = _window_keys(key, window, now)
+        weight = (window - elapsed) / window
+
+        # Lectura de ambos contadores + incremento (si entra) en un solo script
+        allowed, curr, prev = await self._sliding_counter(
+            keys=[curr_key, prev_key],
+            args=[limit, weight, window * 2000]
+        )
+        allowed, curr, prev = bool(allowed), int(curr), int(prev)
+        estimate = prev * weight + curr  # Requests en la ventana, antes de este
 
-        # Use pipeline for atomic operations
-        pipe = self.redis.pipeline()
+        if allowed:
+            remaining = max(0, math.floor(limit - estimate - 1))
+            retry_after = 0
+        else:
+            remaining = 0
+            retry_after = max(1, math.ceil(self._seconds_until_free(limit, window, elapsed, curr, prev)))
 
-        # Remove requests outside the current window
-        pipe.zremrangebyscore(rate_limit_key, 0, now - window)
+        info = {
+            "limit": limit,
+            "remaining": remaining,
+            "reset_at": int(now - elapsed + window),  # fin de la ventana fija actual
+            "retry_after": retry_after,
+            "current_usage": math.ceil(estimate) + (1 if allowed else 0)
+        }
+
+        return allowed, info
+
+    async def check_token_bucket(
+        self,
+        key: str,
+        capacity: int,
+        refill_per_sec: float
+    ) -> Tuple[bool, dict]:
+        """
+        Consume one token from the key's bucket
 
-        # Count requests in current window
-        pipe.zcard(rate_limit_key)
+        Unlike the sliding window, a client that stayed idle can spend its
+        whole capacity at once, and then gets one request every
+        1 / refill_per_sec seconds; there is no window boundary at which
+        the full limit becomes available again.
 
-        # Add current request
-        pipe.zadd(rate_limit_key, {str(now): now})
+        Args:
+            key: Unique identifier (e.g., "ip:192.168.1.1" or "user:123")
+            capacity: Maximum burst size (bucket size)
+            refill_per_sec: Tokens added back per second
 
-        # Set expiration (cleanup old keys)
-        pipe.expire(rate_limit_key, window + 10)
+        Returns:
+            Tuple of (allowed: bool, info: dict) with the same fields as
+            check_rate_limit(); reset_at is when the bucket is full again
+        """
+        now = time.time()
+        if not self.enabled:
+            return True, {
+                "limit": capacity,
+                "remaining": capacity,
+                "reset_at": int(now),
+                "retry_after": 0
+            }
 
-        # Execute pipeline
-        results = await pipe.execute()
-        request_count = results[1]  # Count before adding current
+        if self._token_bucket is None:
+            await self.initialize()
 
-        # Calculate info
-        allowed = request_count < limit
-        remaining = max(0, limit - request_count - 1)
-        reset_at = int(now + window)
-        retry_after = 0 if allowed else window
+        allowed, tokens = await self._token_bucket(
+            keys=[f"token_bucket:{{{key}}}"],
+            args=[capacity, refill_per_sec, now, math.ceil(capacity / refill_per_sec * 1000)]
+        )
+        allowed, tokens = bool(allowed), float(tokens)
 
         info = {
-            "limit": limit,
-            "remaining": remaining,
-            "reset_at": reset_at,
-            "retry_after": retry_after,
-            "current_usage": request_count + 1
+            "limit": capacity,
+            "remaining": math.floor(tokens),
+            "reset_at": math.ceil(now + (capacity - tokens) / refill_per_sec),
+            "retry_after": 0 if allowed else max(1, math.ceil((1 - tokens) / refill_per_sec)),
+            "current_usage": capacity - math.floor(tokens)
         }
 
         return allowed, info
 
+    @staticmethod
+    def _seconds_until_free(limit: int, window: int, elapsed: float, curr: int, prev: int) -> float:
+        """
+        Seconds until prev * weight + curr drops below the limit again,
+        assuming no further requests are accepted meanwhile.
+        """
+        if curr < limit and prev:
+            # Basta con que baje el peso de la ventana anterior en esta ventana
+            return window * (1 - (limit - curr) / prev) - elapsed
+        # La ventana actual ya está llena: en la siguiente pasa a ser la
+        # anterior y hay que esperar a que su peso baje lo suficiente
+        return (window - elapsed) + window * max(0.0, 1 - limit / curr)
+
     async def reset_limit(self, key: str):
         """
         Reset rate limit for a specific key
@@ -153,8 +266,9 @@ class RateLimiter:
         if not self.enabled or not self.redis:
             return
 
-        rate_limit_key = f"rate_limit:{key}"
-        await self.redis.delete(rate_limit_key)
+        # Contadores de todas las ventanas (window forma parte de la key)
+        keys = [k async for k in self.redis.scan_iter(match=f"rate_limit:{{{key}}}:*")]
+        await self.redis.delete(f"token_bucket:{{{key}}}", *keys)
 
     async def get_remaining(self, key: str, limit: int, window: int) -> dict:
         """
@@ -179,22 +293,16 @@ class RateLimiter:
             await self.initialize()
 
         now = time.time()
-        rate_limit_key = f"rate_limit:{key}"
-
-        # Remove old entries
-        await self.redis.zremrangebyscore(rate_limit_key, 0, now - window)
+        curr_key, prev_key, elapsed = _window_keys(key, window, now)
 
-        # Count current requests
-        count = await self.redis.zcard(rate_limit_key)
-
-        remaining = max(0, limit - count)
-        reset_at = int(now + window)
+        curr, prev = await self.redis.mget(curr_key, prev_key)
+        estimate = int(prev or 0) * (window - elapsed) / window + int(curr or 0)
 
         return {
             "limit": limit,
-            "remaining": remaining,
-            "reset_at": reset_at,
-            "current_usage": count
+            "remaining": max(0, math.floor(limit - estimate)),
+            "reset_at": int(now - elapsed + window),
+            "current_usage": math.ceil(estimate)
         }
 
 
@@ -0,0 +1,123 @@
+"""
+RBAC cache: user_id -> {roles, permissions} materializado en Redis.
+
+Los chequeos de roles/permisos dejan de hacer JOINs por request: en un miss
+se cargan roles y permisos del usuario con una sola consulta y se guardan
+como dos sets (`auth:user:{id}:roles`, `auth:user:{id}:perms`). La capa de
+servicio invalida las claves al cambiar asignaciones usuario-rol o rol-permiso.
+
+Sin Redis (REDIS_ENABLED=False o caído) cae directo a la consulta SQL.
+"""
+from typing import FrozenSet, Tuple
+
+from redis.exceptions import RedisError
+from sqlmodel import Session, select
+
+from app.models.role import Permission, Role, RolePermission, UserRole
+from app.services.cache_service import cache_service
+from app.utils.logger import get_structured_logger
+
+logger = get_structured_logger(__name__)
+
+RBAC_CACHE_TTL = 300  # segundos; la invalidación explícita es la vía principal
+
+# Miembro centinela: distingue "usuario sin roles/permisos" de "no cacheado"
+_LOADED = ""
+
+
+def _roles_key(user_id: int) -> str:
+    return f"auth:user:{user_id}:roles"
+
+
+def _perms_key(user_id: int) -> str:
+    return f"auth:user:{user_id}:perms"
+
+
+class RBACCache:
+    """Cache de roles y permisos por usuario (Redis sets con fallback a SQL)."""
+
+    def __init__(self, cache=None):
+        self._cache = cache or cache_service
+
+    @property
+    def client(self):
+        return self._cache.client if self._cache.enabled else None
+
+    def _load(self, session: Session, user_id: int) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+        """Roles y permisos del usuario en una sola consulta."""
+        statement = (
+            select(Role.name, Permission.name)
+            .select_from(UserRole)
+            .join(Role, Role.id == UserRole.role_id)
+            .outerjoin(RolePermission, RolePermission.role_id == UserRole.role_id)
+            .outerjoin(Permission, Permission.id == RolePermission.permission_id)
+            .where(UserRole.user_id == user_id)
+        )
+        rows = session.exec(statement).all()
+        roles = frozenset(role for role, _ in rows)
+        perms = frozenset(perm for _, perm in rows if perm)
+        return roles, perms
+
+    def get_user_rbac(self, session: Session, user_id: int) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+        """Return (role names, permission names) for a user."""
+        client = self.client
+        if client is None:
+            return self._load(session, user_id)
+
+        roles_key, perms_key = _roles_key(user_id), _perms_key(user_id)
+        try:
+            pipe = client.pipeline(transaction=False)
+            pipe.smembers(roles_key)
+            pipe.smembers(perms_key)
+            cached_roles, cached_perms = pipe.execute()
+            if cached_roles and cached_perms:
+                return (
+                    frozenset(cached_roles - {_LOADED}),
+                    frozenset(cached_perms - {_LOADED}),
+                )
+        except RedisError as e:
+            logger.warning("RBAC cache GET error", error=str(e), user_id=user_id)
+            return self._load(session, user_id)
+
+        roles, perms = self._load(session, user_id)
+        try:
+            pipe = client.pipeline()
+            pipe.delete(roles_key, perms_key)
+            pipe.sadd(roles_key, _LOADED, *roles)
+            pipe.sadd(perms_key, _LOADED, *perms)
+            pipe.expire(roles_key, RBAC_CACHE_TTL)
+            pipe.expire(perms_key, RBAC_CACHE_TTL)
+            pipe.execute()
+        except RedisError as e:
+            logger.warning("RBAC cache SET error", error=str(e), user_id=user_id)
+        return roles, perms
+
+    def get_user_permissions(self, session: Session, user_id: int) -> FrozenSet[str]:
+        """Permission names held by the user through any of their roles."""
+        return self.get_user_rbac(session, user_id)[1]
+
+    def get_user_roles(self, session: Session, user_id: int) -> FrozenSet[str]:
+        """Role names assigned to the user."""
+        return self.get_user_rbac(session, user_id)[0]
+
+    def invalidate_users(self, *user_ids: int) -> None:
+        """Drop cached RBAC data for the given users."""
+        client = self.client
+        if client is None or not user_ids:
+            return
+        keys = [key for uid in user_ids for key in (_roles_key(uid), _perms_key(uid))]
+        try:
+            client.delete(*keys)
+        except RedisError as e:
+            logger.warning("RBAC cache DELETE error", error=str(e))
+
+    def role_user_ids(self, session: Session, *role_ids: int) -> list:
+        """IDs of users holding any of the roles (to invalidate after a role change)."""
+        if self.client is None or not role_ids:
+            return []
+        statement = select(UserRole.user_id).where(UserRole.role_id.in_(role_ids)).distinct()
+        return list(session.exec(statement).all())
+
+
+# Singleton instance
+rbac_cache = RBACCache()
@@ -1,15 +1,46 @@
 """
 Service for managing roles and permissions (RBAC).
 """
-from typing import List, Optional
-from sqlmodel import Session, select, or_
-from datetime import datetime
+from typing import Any, Dict, List, Optional
+from sqlalchemy.orm import joinedload
+from sqlmodel import Session, func, select
 
 from app.models.role import (
     Role, Permission, RolePermission, UserRole,
     RoleCreate, PermissionCreate, RoleRead, PermissionRead
 )
 from app.models.user import User
+from app.services.rbac_cache import rbac_cache
+
+
+def _paginate(session: Session, statement, skip: int, limit: int, read_schema) -> Dict[str, Any]:
+    """
+    Page of `statement` with pagination metadata in a single query.
+
+    COUNT(*) OVER () is evaluated before OFFSET/LIMIT, so every returned row
+    carries the total of the unpaginated result. Only a page past the end
+    (no rows to carry it) needs a separate COUNT.
+    """
+    # session.execute: con add_columns, session.exec (SelectOfScalar) devolvería
+    # solo la entidad; hacen falta filas (obj, total)
+    rows = session.execute(
+        statement.add_columns(func.count().over()).offset(skip).limit(limit)
+    ).all()
+
+    if rows:
+        total = rows[0][1]
+    elif skip:
+        total = session.exec(select(func.count()).select_from(statement.subquery())).one()
+    else:
+        total = 0
+
+    return {
+        "data": [read_schema.model_validate(obj).model_dump() for obj, _ in rows],
+        "total": total,
+        "limit": limit,
+        "offset": skip,
+        "has_more": (skip + len(rows)) < total
+    }
 
 
 class RoleService:
@@ -45,9 +76,27 @@ class RoleService:
 
         return role
 
-    def get_role_by_id(self, session: Session, role_id: int) -> Optional[Role]:
-        """Get role by ID"""
-        return session.get(Role, role_id)
+    def get_role_by_id(
+        self,
+        session: Session,
+        role_id: int,
+        load_permissions: bool = False
+    ) -> Optional[Role]:
+        """
+        Get role by ID.
+
+        With load_permissions=True, role.permissions is loaded in the same
+        query (LEFT JOIN over role_permissions).
+        """
+        if not load_permissions:
+            return session.get(Role, role_id)
+
+        statement = (
+            select(Role)
+            .where(Role.id == role_id)
+            .options(joinedload(Role.permissions))
+        )
+        return session.exec(statement).unique().one_or_none()
 
     def get_role_by_name(self, session: Session, name: str) -> Optional[Role]:
         """Get role by name"""
@@ -69,6 +118,21 @@ class RoleService:
 
         return list(session.exec(statement).all())
 
+    def get_all_roles_paginated(
+        self,
+        session: Session,
+        skip: int = 0,
+        limit: int = 100,
+        include_inactive: bool = False
+    ) -> Dict[str, Any]:
+        """Get all roles with pagination metadata (data, total, limit, offset, has_more)"""
+        statement = select(Role)
+
+        if not include_inactive:
+            statement = statement.where(Role.is_active == True)
+
+        return _paginate(session, statement, skip, limit, RoleRead)
+
     def update_role(
         self,
         session: Session,
@@ -88,11 +152,13 @@ class RoleService:
             if value is not None and hasattr(role, key):
                 setattr(role, key, value)
 
-        role.updated_at = datetime.utcnow()
         session.add(role)
         session.commit()
         session.refresh(role)
 
+        # El nombre del rol forma parte del cache RBAC de sus usuarios
+        rbac_cache.invalidate_users(*rbac_cache.role_user_ids(session, role_id))
+
         return role
 
     def delete_role(self, session: Session, role_id: int) -> bool:
@@ -108,6 +174,7 @@ class RoleService:
         # Remove all user-role assignments
         statement = select(UserRole).where(UserRole.role_id == role_id)
         user_roles = session.exec(statement).all()
+        affected_users = [user_role.user_id for user_role in user_roles]
         for user_role in user_roles:
             session.delete(user_role)
 
@@ -119,6 +186,7 @@ class RoleService:
 
         session.delete(role)
         session.commit()
+        rbac_cache.invalidate_users(*affected_users)
 
         return True
 
@@ -154,6 +222,7 @@ class RoleService:
             session.add(role_perm)
 
         session.commit()
+        rbac_cache.invalidate_users(*rbac_cache.role_user_ids(session, role_id))
         return True
 
     def assign_role_to_user(
@@ -187,6 +256,7 @@ class RoleService:
         user_role = UserRole(user_id=user_id, role_id=role_id)
         session.add(user_role)
         session.commit()
+        rbac_cache.invalidate_users(user_id)
 
         return True
 
@@ -208,6 +278,7 @@ class RoleService:
 
         session.delete(user_role)
         session.commit()
+        rbac_cache.invalidate_users(user_id)
 
         return True
 
@@ -231,6 +302,20 @@ class RoleService:
         )
         return list(session.exec(statement).all())
 
+    def get_user_token_claims(self, session: Session, user) -> dict:
+        """
+        Claims RBAC para embeber en el access token.
+        Evita consultar roles/permisos en cada request protegido.
+        """
+        roles, perms = rbac_cache.get_user_rbac(session, user.id)
+        return {
+            "uid": user.id,
+            "roles": sorted(roles),
+            "perms": sorted(perms),
+            "act": user.is_active,
+            "ver": user.is_verified,
+        }
+
     def user_has_permission(
         self,
         session: Session,
@@ -239,26 +324,13 @@ class RoleService:
         resource: str
     ) -> bool:
         """Check if user has a specific permission"""
-        permission_name = f"{action}:{resource}"
-
-        # Check for exact permission
-        statement = (
-            select(Permission)
-            .join(RolePermission)
-            .join(UserRole, UserRole.role_id == RolePermission.role_id)
-            .where(
-                UserRole.user_id == user_id,
-                or_(
-                    Permission.name == permission_name,
-                    Permission.name == f"manage:{resource}",
-                    Permission.name == "manage:all"
-                )
-            )
+        perms = rbac_cache.get_user_permissions(session, user_id)
+        return (
+            f"{action}:{resource}" in perms
+            or f"manage:{resource}" in perms
+            or "manage:all" in perms
         )
 
-        permission = session.exec(statement).first()
-        return permission is not None
-
     def user_has_role(
         self,
         session: Session,
@@ -266,17 +338,7 @@ class RoleService:
         role_name: str
     ) -> bool:
         """Check if user has a specific role"""
-        statement = (
-            select(Role)
-            .join(UserRole)
-            .where(
-                UserRole.user_id == user_id,
-                Role.name == role_name
-            )
-        )
-
-        role = session.exec(statement).first()
-        return role is not None
+        return role_name in rbac_cache.get_user_roles(session, user_id)
 
 
 class PermissionService:
@@ -288,11 +350,8 @@ class PermissionService:
         perm_data: PermissionCreate
     ) -> Permission:
         """Create a new permission"""
-        # Generate name from action:resource
-        name = f"{perm_data.action}:{perm_data.resource}"
-
+        # name ("action:resource") lo genera la BD
         permission = Permission(
-            name=name,
             action=perm_data.action,
             resource=perm_data.resource,
             description=perm_data.description
@@ -323,6 +382,15 @@ class PermissionService:
         statement = select(Permission).offset(skip).limit(limit)
         return list(session.exec(statement).all())
 
+    def get_all_permissions_paginated(
+        self,
+        session: Session,
+        skip: int = 0,
+        limit: int = 100
+    ) -> Dict[str, Any]:
+        """Get all permissions with pagination metadata (data, total, limit, offset, has_more)"""
+        return _paginate(session, select(Permission), skip, limit, PermissionRead)
+
     def delete_permission(self, session: Session, perm_id: int) -> bool:
         """Delete permission"""
         permission = self.get_permission_by_id(session, perm_id)
@@ -332,11 +400,13 @@ class PermissionService:
         # Remove from all roles
         statement = select(RolePermission).where(RolePermission.permission_id == perm_id)
         role_perms = session.exec(statement).all()
+        affected_users = rbac_cache.role_user_ids(session, *{rp.role_id for rp in role_perms})
         for rp in role_perms:
             session.delete(rp)
 
         session.delete(permission)
         session.commit()
+        rbac_cache.invalidate_users(*affected_users)
 
         return True
 
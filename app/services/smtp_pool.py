@@ -0,0 +1,121 @@
+"""
+Pool de conexiones SMTP persistentes.
+
+Cada envío con aiosmtplib.send() abre una sesión nueva (TCP + TLS + EHLO +
+AUTH) y la cierra con QUIT. El pool mantiene hasta `size` sesiones ya
+autenticadas y las reutiliza: un envío solo paga MAIL FROM / RCPT / DATA.
+"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional, Sequence
+
+import aiosmtplib
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPPool:
+    """
+    Pool acotado de clientes aiosmtplib.SMTP conectados y autenticados.
+
+    Las conexiones se abren bajo demanda (hasta `size` simultáneas) y vuelven
+    al pool tras un envío exitoso; ante cualquier error se descartan, así una
+    sesión en estado dudoso nunca se reutiliza.
+    """
+
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: bool = False,
+        size: int = 4,
+    ):
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.size = size
+
+        self._idle: List[aiosmtplib.SMTP] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _bind_loop(self) -> None:
+        # Las conexiones pertenecen al event loop que las abrió (app, worker
+        # ARQ, tests): en un loop nuevo se empieza con el pool vacío.
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.size)
+            self._idle = []
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        client = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            use_tls=self.use_tls,
+        )
+        await client.connect()
+        if self.username:
+            await client.login(self.username, self.password or "")
+        return client
+
+    @staticmethod
+    def _discard(client: aiosmtplib.SMTP) -> None:
+        if client.is_connected:
+            client.close()
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[aiosmtplib.SMTP]:
+        """
+        Toma una conexión del pool (o abre una nueva si no hay libres).
+
+        Uso:
+            async with smtp_pool.acquire() as smtp:
+                await smtp.send_message(message)
+        """
+        self._bind_loop()
+        async with self._slots:
+            client = self._idle.pop() if self._idle else None
+            if client is None or not client.is_connected:
+                client = await self._connect()
+
+            try:
+                yield client
+            except BaseException:
+                self._discard(client)
+                raise
+            else:
+                self._idle.append(client)
+
+    async def send_message(self, message, recipients: Sequence[str]) -> None:
+        """
+        Envía un mensaje por una conexión del pool.
+
+        Una conexión ociosa puede haber sido cerrada por el servidor (timeout
+        de inactividad); en ese caso las demás ociosas probablemente también,
+        así que se descartan y se reintenta una vez con una conexión nueva.
+        """
+        try:
+            async with self.acquire() as smtp:
+                await smtp.send_message(message, recipients=recipients)
+        except aiosmtplib.SMTPServerDisconnected:
+            logger.info("Pooled SMTP connection was closed by the server, reconnecting")
+            idle, self._idle = self._idle, []
+            for client in idle:
+                self._discard(client)
+            async with self.acquire() as smtp:
+                await smtp.send_message(message, recipients=recipients)
+
+    async def close(self) -> None:
+        """Cierra (QUIT) todas las conexiones ociosas."""
+        idle, self._idle = self._idle, []
+        for client in idle:
+            try:
+                await client.quit()
+            except Exception:
+                self._discard(client)
@@ -6,11 +6,16 @@ import os
 import uuid
 import shutil
 from pathlib import Path
-from typing import BinaryIO, Optional, Tuple
+from typing import BinaryIO, Iterator, Optional, Tuple
 from datetime import datetime, timedelta
 
+from starlette.concurrency import run_in_threadpool
+
 from app.config import settings
 
+# Tamaño de bloque al servir descargas en streaming
+STREAM_CHUNK_SIZE = 64 * 1024
+
 
 class StorageService:
     """
@@ -115,8 +120,10 @@ class StorageService:
         """
         Upload a file to storage.
 
+        The content is streamed from ``file`` in chunks, never loaded whole.
+
         Args:
-            file: File-like object (file content)
+            file: Seekable binary file-like object (file content)
             original_filename: Original filename
             content_type: MIME type (optional)
 
@@ -129,19 +136,20 @@ class StorageService:
         # Generate storage path
         storage_path = self._generate_file_path(safe_filename)
 
-        # Read file content
-        file_content = await file.read()
-        file_size = len(file_content)
+        # Measure size without reading the content
+        file.seek(0, os.SEEK_END)
+        file_size = file.tell()
+        file.seek(0)
 
         if self.use_s3:
-            return await self._upload_to_s3(storage_path, file_content, content_type, file_size)
+            return await self._upload_to_s3(storage_path, file, content_type, file_size)
         else:
-            return await self._upload_to_local(storage_path, file_content, file_size)
+            return await self._upload_to_local(storage_path, file, file_size)
 
     async def _upload_to_s3(
         self,
         storage_path: str,
-        file_content: bytes,
+        file: BinaryIO,
         content_type: Optional[str],
         file_size: int
     ) -> Tuple[str, int]:
@@ -151,11 +159,13 @@ class StorageService:
             if content_type:
                 extra_args['ContentType'] = content_type
 
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=storage_path,
-                Body=file_content,
-                **extra_args
+            # upload_fileobj lee por partes (multipart para archivos grandes)
+            await run_in_threadpool(
+                self.s3_client.upload_fileobj,
+                file,
+                self.bucket_name,
+                storage_path,
+                ExtraArgs=extra_args or None,
             )
 
             print(f"Uploaded to S3: {storage_path}")
@@ -167,7 +177,7 @@ class StorageService:
     async def _upload_to_local(
         self,
         storage_path: str,
-        file_content: bytes,
+        file: BinaryIO,
         file_size: int
     ) -> Tuple[str, int]:
         """Upload file to local filesystem"""
@@ -177,9 +187,8 @@ class StorageService:
             # Create directory if it doesn't exist
             full_path.parent.mkdir(parents=True, exist_ok=True)
 
-            # Write file
-            with open(full_path, 'wb') as f:
-                f.write(file_content)
+            # Write file (copia por bloques, fuera del event loop)
+            await run_in_threadpool(self._copy_to_path, file, full_path)
 
             print(f"Uploaded locally: {storage_path}")
             return storage_path, file_size
@@ -187,6 +196,11 @@ class StorageService:
         except Exception as e:
             raise Exception(f"Failed to upload to local storage: {e}")
 
+    @staticmethod
+    def _copy_to_path(file: BinaryIO, full_path: Path) -> None:
+        with open(full_path, 'wb') as f:
+            shutil.copyfileobj(file, f, settings.UPLOAD_CHUNK_SIZE)
+
     async def download_file(self, file_path: str) -> bytes:
         """
         Download a file from storage.
@@ -202,6 +216,70 @@ class StorageService:
         else:
             return await self._download_from_local(file_path)
 
+    async def open_stream(
+        self,
+        file_path: str,
+        start: int = 0,
+        end: Optional[int] = None
+    ) -> Iterator[bytes]:
+        """
+        Open a file for streaming, optionally limited to a byte range.
+
+        The file is opened (and a missing file reported) before returning;
+        the iterator then yields STREAM_CHUNK_SIZE blocks with blocking
+        reads, so it should be consumed in a threadpool (StreamingResponse
+        does this for sync iterators).
+
+        Args:
+            file_path: Path to the file in storage
+            start: First byte to return
+            end: Last byte to return (inclusive), None for end of file
+
+        Returns:
+            Iterator of file chunks
+        """
+        if self.use_s3:
+            return await run_in_threadpool(self._open_s3_stream, file_path, start, end)
+        else:
+            return await run_in_threadpool(self._open_local_stream, file_path, start, end)
+
+    def _open_s3_stream(self, file_path: str, start: int, end: Optional[int]) -> Iterator[bytes]:
+        """Open S3/MinIO object body (Range request when partial)"""
+        extra_args = {}
+        if start or end is not None:
+            extra_args['Range'] = f"bytes={start}-{'' if end is None else end}"
+        try:
+            response = self.s3_client.get_object(
+                Bucket=self.bucket_name,
+                Key=file_path,
+                **extra_args
+            )
+        except Exception as e:
+            raise Exception(f"Failed to download from S3: {e}")
+        return response['Body'].iter_chunks(STREAM_CHUNK_SIZE)
+
+    def _open_local_stream(self, file_path: str, start: int, end: Optional[int]) -> Iterator[bytes]:
+        """Open local file positioned at start"""
+        full_path = self.media_folder / file_path
+        if not full_path.exists():
+            raise FileNotFoundError(f"File not found: {file_path}")
+
+        f = open(full_path, 'rb')
+        f.seek(start)
+        return self._iter_file(f, None if end is None else end - start + 1)
+
+    @staticmethod
+    def _iter_file(f: BinaryIO, remaining: Optional[int]) -> Iterator[bytes]:
+        with f:
+            while remaining is None or remaining > 0:
+                size = STREAM_CHUNK_SIZE if remaining is None else min(STREAM_CHUNK_SIZE, remaining)
+                chunk = f.read(size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
     async def _download_from_s3(self, file_path: str) -> bytes:
         """Download file from S3/MinIO"""
         try:
@@ -1,10 +1,40 @@
-from datetime import datetime
+import threading
 from typing import Optional
+from cachetools import TTLCache
+from sqlalchemy import event, func, inspect, update
 from sqlmodel import Session, select
 from app.models.user import User, UserCreate, UserUpdate, UserRead
 from app.services.base_service import BaseService
 from app.services.websocket import users_channel
 
+# Cache en proceso email -> UserRead para las dependencias de autenticación.
+# TTL corto; se invalida en cualquier insert/update/delete ORM de User.
+_auth_user_cache: TTLCache = TTLCache(maxsize=10_000, ttl=15)
+_auth_user_cache_lock = threading.Lock()
+
+
+def invalidate_cached_user(email: Optional[str]) -> None:
+    """Elimina un usuario de la cache de autenticación."""
+    if email:
+        with _auth_user_cache_lock:
+            _auth_user_cache.pop(email, None)
+
+
+def clear_user_cache() -> None:
+    """Vacía la cache de autenticación."""
+    with _auth_user_cache_lock:
+        _auth_user_cache.clear()
+
+
+@event.listens_for(User, "after_insert")
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user_on_write(mapper, connection, target):
+    invalidate_cached_user(target.email)
+    # Si cambió el email, invalidar también el anterior
+    for old_email in inspect(target).attrs.email.history.deleted or ():
+        invalidate_cached_user(old_email)
+
 
 class UserService(BaseService[User, UserCreate, UserUpdate, UserRead]):
     """
@@ -42,6 +72,33 @@ class UserService(BaseService[User, UserCreate, UserUpdate, UserRead]):
         statement = select(User).where(User.email == email)
         return session.exec(statement).first()
 
+    def get_user_read_by_email(self, session: Session, email: str) -> Optional[UserRead]:
+        """
+        Get a user (as UserRead) by email, served from a short-TTL in-memory cache.
+
+        Used by the authentication dependencies on every request.
+
+        Args:
+            session: Database session
+            email: User email address
+
+        Returns:
+            UserRead if found, None otherwise
+        """
+        with _auth_user_cache_lock:
+            cached = _auth_user_cache.get(email)
+        if cached is not None:
+            return cached
+
+        user = self.get_user_by_email(session, email)
+        if user is None:
+            return None
+
+        user_read = UserRead.model_validate(user)
+        with _auth_user_cache_lock:
+            _auth_user_cache[email] = user_read
+        return user_read
+
     def get_user_by_provider(
         self,
         session: Session,
@@ -80,12 +137,44 @@ class UserService(BaseService[User, UserCreate, UserUpdate, UserRead]):
         if not user:
             return None
 
-        user.last_login = datetime.utcnow()
+        user.last_login = func.now()
         session.add(user)
         session.commit()
         session.refresh(user)
         return user
 
+    def record_login(self, session: Session, user_id: int, hashed_password: Optional[str] = None) -> bool:
+        """
+        UPDATE de last_login (y del hash rehasheado) sin commit: viaja en la
+        transacción del login junto con el INSERT del refresh token.
+
+        Sin rehash, la fila se toma con FOR NO KEY UPDATE SKIP LOCKED: si otro
+        login concurrente del mismo usuario ya la está escribiendo, este no
+        espera el lock y omite su last_login (ambos serían el mismo instante).
+        El rehash sí espera: no se puede perder.
+
+        Returns:
+            True si se actualizó la fila
+        """
+        values = {"last_login": func.now()}
+        if hashed_password is not None:
+            values["hashed_password"] = hashed_password
+            target = User.id == user_id
+        else:
+            locked = (
+                select(User.id)
+                .where(User.id == user_id)
+                .with_for_update(key_share=True, skip_locked=True)
+                .scalar_subquery()
+            )
+            target = User.id == locked
+
+        result = session.execute(
+            update(User).where(target).values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount > 0
+
     async def get_or_create_user(
         self,
         session: Session,
@@ -111,7 +200,7 @@ class UserService(BaseService[User, UserCreate, UserUpdate, UserRead]):
 
         if user:
             # Update last login for existing user
-            user.last_login = datetime.utcnow()
+            user.last_login = func.now()
             session.add(user)
             session.commit()
             session.refresh(user)
@@ -3,17 +3,20 @@ Webhook service for managing and delivering webhooks
 
 Handles webhook subscriptions, delivery, retries, and HMAC signatures.
 """
+import gzip
 import hmac
-import hashlib
 import secrets
 import httpx
 import json
 import uuid
+from functools import lru_cache
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
 
+from app.config import settings
 from app.models.webhook import WebhookSubscription, WebhookDelivery, WebhookEventType
 from app.schemas.webhook import WebhookEventPayload
 from app.utils.logger import get_structured_logger, LogContext
@@ -21,6 +24,18 @@ from app.utils.logger import get_structured_logger, LogContext
 logger = get_structured_logger(__name__)
 
 
+@lru_cache(maxsize=4096)
+def _secret_key(secret: str) -> bytes:
+    """Secret de la subscription codificado una sola vez (la clave incluye el
+    secret, así que rotarlo no necesita invalidación)."""
+    return secret.encode('utf-8')
+
+
+def _serialize_payload(payload: Dict[str, Any]) -> bytes:
+    """Bytes canónicos del payload: los que se firman y los que se envían."""
+    return json.dumps(payload, sort_keys=True).encode('utf-8')
+
+
 class WebhookService:
     """
     Service for managing webhook subscriptions and deliveries
@@ -192,25 +207,21 @@ class WebhookService:
             Number of webhooks triggered
         """
         # Find active subscriptions for this event
-        subscriptions = db.query(WebhookSubscription).filter(
-            and_(
-                WebhookSubscription.active == True,
-                WebhookSubscription.events.contains([event_type])
-            )
-        ).all()
+        subscriptions = self._subscriptions_for_event(db, event_type)
 
         if not subscriptions:
             logger.debug("No webhook subscriptions for event", event_type=event_type)
             return 0
 
-        # Create event payload
+        # Create event payload (serializado una sola vez para todas las
+        # subscriptions; mode="json" deja el timestamp listo para firmar)
         event_id = str(uuid.uuid4())
         payload = WebhookEventPayload(
             event_type=event_type,
             event_id=event_id,
             timestamp=datetime.utcnow(),
             data=data
-        )
+        ).model_dump(mode="json")
 
         triggered = 0
         for subscription in subscriptions:
@@ -222,7 +233,7 @@ class WebhookService:
                 continue
 
             # Enqueue delivery (will be processed by worker)
-            await self._enqueue_delivery(db, subscription, payload)
+            await self._enqueue_delivery(db, subscription, event_type, payload)
             triggered += 1
 
         logger.info("Webhook event triggered",
@@ -232,6 +243,19 @@ class WebhookService:
 
         return triggered
 
+    def _subscriptions_for_event(self, db: Session, event_type: str) -> List[WebhookSubscription]:
+        """
+        Active subscriptions listening to event_type.
+
+        En Postgres, events @> '["<event>"]' sobre JSONB usa el índice GIN;
+        otros dialectos (SQLite) no tienen containment JSON y se filtra en Python.
+        """
+        query = db.query(WebhookSubscription).filter(WebhookSubscription.active == True)
+        if db.get_bind().dialect.name == "postgresql":
+            events = type_coerce(WebhookSubscription.events, JSONB)
+            return query.filter(events.contains([event_type])).all()
+        return [sub for sub in query.all() if event_type in (sub.events or ())]
+
     def _matches_filters(self, data: Dict[str, Any], filters: Dict[str, Any]) -> bool:
         """Check if event data matches subscription filters"""
         for key, expected_value in filters.items():
@@ -244,7 +268,8 @@ class WebhookService:
         self,
         db: Session,
         subscription: WebhookSubscription,
-        payload: WebhookEventPayload
+        event_type: str,
+        payload: Dict[str, Any]
     ):
         """
         Enqueue webhook delivery
@@ -258,13 +283,13 @@ class WebhookService:
         # Enqueue webhook delivery task
         job_id = await queue_service.enqueue_webhook_delivery(
             subscription_id=subscription.id,
-            event_type=payload.event_type,
-            payload=payload.model_dump()
+            event_type=event_type,
+            payload=payload
         )
 
         logger.debug("Webhook delivery enqueued",
                     subscription_id=subscription.id,
-                    event_type=payload.event_type,
+                    event_type=event_type,
                     job_id=job_id)
 
     # Delivery
@@ -309,8 +334,10 @@ class WebhookService:
             )
 
             try:
-                # Generate signature
-                signature = self._generate_signature(payload, subscription.secret)
+                # Serializar una sola vez: el body enviado son exactamente los
+                # bytes firmados (httpx no vuelve a serializar con json=)
+                body = _serialize_payload(payload)
+                signature = self._sign(body, subscription.secret)
 
                 # Prepare headers
                 headers = {
@@ -327,13 +354,19 @@ class WebhookService:
 
                 delivery.headers = headers
 
+                # Payloads grandes comprimidos (la firma es sobre el body sin comprimir)
+                min_bytes = settings.WEBHOOK_GZIP_MIN_BYTES
+                if min_bytes and len(body) >= min_bytes:
+                    body = gzip.compress(body, compresslevel=6)
+                    headers["Content-Encoding"] = "gzip"
+
                 # Make request
                 start_time = datetime.utcnow()
                 client = await self.get_http_client()
 
                 response = await client.post(
                     subscription.url,
-                    json=payload,
+                    content=body,
                     headers=headers,
                     timeout=subscription.timeout
                 )
@@ -429,12 +462,12 @@ class WebhookService:
 
         Format: sha256=<hex_digest>
         """
-        payload_bytes = json.dumps(payload, sort_keys=True).encode('utf-8')
-        signature = hmac.new(
-            secret.encode('utf-8'),
-            payload_bytes,
-            hashlib.sha256
-        ).hexdigest()
+        return self._sign(_serialize_payload(payload), secret)
+
+    def _sign(self, body: bytes, secret: str) -> str:
+        """Firma HMAC SHA256 de un body ya serializado"""
+        # hmac.digest: HMAC one-shot en C (OpenSSL), sin objeto HMAC intermedio
+        signature = hmac.digest(_secret_key(secret), body, 'sha256').hex()
         return f"sha256={signature}"
 
     def verify_signature(self, payload: Dict[str, Any], signature: str, secret: str) -> bool:
@@ -1,8 +1,18 @@
 from typing import Dict, List, Set
 from fastapi import WebSocket
-import json
+import orjson
 from datetime import datetime
 
+from app.utils.logger import get_structured_logger
+
+logger = get_structured_logger(__name__)
+
+
+def _dumps(message: dict) -> str:
+    # orjson en vez del json.dumps de send_json; se envía como frame de texto
+    # (los clientes de browser hacen JSON.parse sobre event.data)
+    return orjson.dumps(message, option=orjson.OPT_NON_STR_KEYS).decode()
+
 
 class ConnectionManager:
     """
@@ -42,7 +52,9 @@ class ConnectionManager:
             websocket
         )
 
-        print(f"Client {client_id} connected to channel '{channel}'. Total clients: {len(self.active_connections[channel])}")
+        # DEBUG: en un pico de reconexiones no se formatea ni escribe nada por cliente
+        logger.debug("WebSocket client connected", client_id=client_id, channel=channel,
+                     clients=len(self.active_connections[channel]))
 
     def disconnect(self, channel: str, client_id: str) -> None:
         """
@@ -55,7 +67,8 @@ class ConnectionManager:
         if channel in self.active_connections:
             if client_id in self.active_connections[channel]:
                 del self.active_connections[channel][client_id]
-                print(f"Client {client_id} disconnected from channel '{channel}'. Remaining: {len(self.active_connections[channel])}")
+                logger.debug("WebSocket client removed", client_id=client_id, channel=channel,
+                             clients=len(self.active_connections[channel]))
 
                 # Clean up empty channels
                 if not self.active_connections[channel]:
@@ -70,9 +83,9 @@ class ConnectionManager:
             websocket: Target WebSocket connection
         """
         try:
-            await websocket.send_json(message)
+            await websocket.send_text(_dumps(message))
         except Exception as e:
-            print(f"Error sending personal message: {e}")
+            logger.warning("Error sending WebSocket message", error=str(e))
 
     async def broadcast_to_channel(self, channel: str, message: dict, exclude_client: str = None) -> None:
         """
@@ -91,6 +104,7 @@ class ConnectionManager:
         message["channel"] = channel
 
         disconnected_clients = []
+        text = _dumps(message)  # Serializado una vez para todos los clientes
 
         for client_id, websocket in self.active_connections[channel].items():
             # Skip excluded client
@@ -98,9 +112,10 @@ class ConnectionManager:
                 continue
 
             try:
-                await websocket.send_json(message)
+                await websocket.send_text(text)
             except Exception as e:
-                print(f"Error broadcasting to client {client_id}: {e}")
+                logger.warning("Error broadcasting WebSocket message", client_id=client_id,
+                               channel=channel, error=str(e))
                 disconnected_clients.append(client_id)
 
         # Clean up disconnected clients
@@ -0,0 +1,77 @@
+"""
+Sketch mergeable de duraciones para percentiles aproximados.
+
+Histograma con buckets logarítmicos (esquema de DDSketch): el valor v cae en
+el bucket ceil(log_gamma(v)) y se estima como el centro del bucket, con error
+relativo acotado por `relative_accuracy` en cualquier percentil. Dos sketches
+se combinan sumando los conteos por bucket, así los percentiles de una
+ventana salen de mergear los sketches de sus buckets de 5 minutos sin ordenar
+las duraciones crudas.
+"""
+import math
+from typing import Any, Dict, Iterable, Optional
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+
+
+class DurationSketch:
+    """Histograma logarítmico de duraciones (ms), serializable a JSON."""
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0  # duraciones <= 0 (no tienen logaritmo)
+        self.count = 0
+
+    def add(self, value: float, count: int = 1) -> None:
+        if value > 0:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[index] = self.bins.get(index, 0) + count
+        else:
+            self.zero_count += count
+        self.count += count
+
+    def update(self, values: Iterable[float]) -> None:
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: "DurationSketch") -> None:
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Valor aproximado del cuantil q (0..1); None si el sketch está vacío."""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if rank < seen:
+                # Centro del bucket (gamma^(i-1), gamma^i]: error relativo <= alpha
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.bins) / (self.gamma + 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "alpha": self.relative_accuracy,
+            "zero": self.zero_count,
+            # Claves str: JSON no admite claves enteras
+            "bins": {str(index): count for index, count in self.bins.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DurationSketch":
+        sketch = cls(data.get("alpha", DEFAULT_RELATIVE_ACCURACY))
+        sketch.zero_count = data.get("zero", 0)
+        sketch.bins = {int(index): count for index, count in data.get("bins", {}).items()}
+        sketch.count = sketch.zero_count + sum(sketch.bins.values())
+        return sketch
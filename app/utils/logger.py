@@ -239,6 +239,10 @@ class StructuredLogger:
     def __init__(self, name: str):
         self.logger = logging.getLogger(name)
 
+    def isEnabledFor(self, level: int) -> bool:
+        """Check level before building expensive log fields"""
+        return self.logger.isEnabledFor(level)
+
     def _log(self, level: int, msg: str, **kwargs):
         """Internal log method with extra fields"""
         extra = {"extra_fields": kwargs} if kwargs else {}
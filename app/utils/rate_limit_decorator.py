@@ -6,9 +6,60 @@ with customizable limits per endpoint.
 """
 from functools import wraps
 from typing import Callable, Optional
-from fastapi import Request, HTTPException
+from fastapi import Request, HTTPException, Response
 
 from app.services.rate_limiter import rate_limiter
+from app.utils.request import get_client_ip
+
+
+def _find_request(args, kwargs) -> Request:
+    """Extract the Request from the endpoint arguments"""
+    for arg in args:
+        if isinstance(arg, Request):
+            return arg
+
+    request = kwargs.get("request")
+    if not request:
+        raise ValueError("rate_limit decorator requires Request parameter")
+    return request
+
+
+def _rate_key(request: Request, key_func: Optional[Callable], args, kwargs) -> str:
+    if key_func:
+        # Custom key function
+        return key_func(request, *args, **kwargs)
+
+    # Default: rate limit by IP
+    client_ip = get_client_ip(request)
+    return f"ip:{client_ip}:{request.url.path}"
+
+
+def _limit_exceeded(info: dict, message: str) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail={
+            "error": "Rate limit exceeded",
+            "message": message,
+            "limit": info["limit"],
+            "current_usage": info["current_usage"],
+            "retry_after": info["retry_after"],
+            "reset_at": info["reset_at"]
+        },
+        headers={
+            "X-RateLimit-Limit": str(info["limit"]),
+            "X-RateLimit-Remaining": "0",
+            "X-RateLimit-Reset": str(info["reset_at"]),
+            "Retry-After": str(info["retry_after"])
+        }
+    )
+
+
+def _set_headers(result, info: dict):
+    if isinstance(result, Response):
+        result.headers["X-RateLimit-Limit"] = str(info["limit"])
+        result.headers["X-RateLimit-Remaining"] = str(info["remaining"])
+        result.headers["X-RateLimit-Reset"] = str(info["reset_at"])
+    return result
 
 
 def rate_limit(
@@ -43,33 +94,16 @@ def rate_limit(
     def decorator(func: Callable):
         @wraps(func)
         async def wrapper(*args, **kwargs):
-            # Extract request from args/kwargs
-            request = None
-            for arg in args:
-                if isinstance(arg, Request):
-                    request = arg
-                    break
-
-            if not request and "request" in kwargs:
-                request = kwargs["request"]
-
-            if not request:
-                raise ValueError("rate_limit decorator requires Request parameter")
-
-            # Generate rate limit key
-            if key_func:
-                # Custom key function
-                rate_key = key_func(request, *args, **kwargs)
-            else:
-                # Default: rate limit by IP
-                client_ip = request.client.host
-                forwarded_for = request.headers.get("X-Forwarded-For")
-                if forwarded_for:
-                    client_ip = forwarded_for.split(",")[0].strip()
-
-                rate_key = f"ip:{client_ip}:{request.url.path}"
-
-            # Check rate limit
+            request = _find_request(args, kwargs)
+            rate_key = _rate_key(request, key_func, args, kwargs)
+
+            # RateLimitMiddleware ya contó esta key con este mismo límite en
+            # este request: contarla otra vez gastaría dos lugares. Con otro
+            # limit/window (p.ej. más estricto) se chequea igual
+            if getattr(request.state, "rate_limit_check", None) == (rate_key, limit, window):
+                return await func(*args, **kwargs)
+
+            # Check rate limit (un solo EVALSHA)
             allowed, info = await rate_limiter.check_rate_limit(
                 key=rate_key,
                 limit=limit,
@@ -77,26 +111,60 @@ def rate_limit(
             )
 
             if not allowed:
-                raise HTTPException(
-                    status_code=429,
-                    detail={
-                        "error": "Rate limit exceeded",
-                        "message": f"Too many requests. Limit: {limit} requests per {window} seconds",
-                        "limit": info["limit"],
-                        "current_usage": info["current_usage"],
-                        "retry_after": info["retry_after"],
-                        "reset_at": info["reset_at"]
-                    },
-                    headers={
-                        "X-RateLimit-Limit": str(info["limit"]),
-                        "X-RateLimit-Remaining": "0",
-                        "X-RateLimit-Reset": str(info["reset_at"]),
-                        "Retry-After": str(info["retry_after"])
-                    }
+                raise _limit_exceeded(
+                    info, f"Too many requests. Limit: {limit} requests per {window} seconds"
                 )
 
             # Execute endpoint
-            return await func(*args, **kwargs)
+            return _set_headers(await func(*args, **kwargs), info)
+
+        return wrapper
+    return decorator
+
+
+def token_bucket(
+    capacity: int,
+    refill_per_sec: float,
+    key_func: Optional[Callable] = None
+):
+    """
+    Token bucket decorator for endpoints that should tolerate bursts
+
+    An idle client can spend the whole capacity at once and then gets
+    refill_per_sec requests per second; unlike a fixed window, it cannot
+    double its burst by straddling a window boundary.
+
+    Args:
+        capacity: Maximum burst size
+        refill_per_sec: Tokens added back per second
+        key_func: Function to generate rate limit key (default: by IP)
+
+    Example:
+        @app.post("/email/bulk")
+        @token_bucket(capacity=5, refill_per_sec=5 / 3600)  # ~5 per hour
+        async def bulk(request: Request):
+            ...
+    """
+    def decorator(func: Callable):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            request = _find_request(args, kwargs)
+            rate_key = _rate_key(request, key_func, args, kwargs)
+
+            allowed, info = await rate_limiter.check_token_bucket(
+                key=rate_key,
+                capacity=capacity,
+                refill_per_sec=refill_per_sec
+            )
+
+            if not allowed:
+                raise _limit_exceeded(
+                    info,
+                    f"Too many requests. Burst of {capacity}, "
+                    f"refilling {refill_per_sec:g} requests per second"
+                )
+
+            return _set_headers(await func(*args, **kwargs), info)
 
         return wrapper
     return decorator
@@ -0,0 +1,37 @@
+"""
+Request helpers compartidos por middlewares y dependencias.
+"""
+from typing import Optional
+
+from fastapi import Request
+
+from app.config import settings
+
+
+def get_header(request: Request, name: bytes) -> Optional[str]:
+    """
+    Lee un header directo de scope["headers"] (nombre en minúsculas, bytes).
+
+    Evita construir el objeto Headers de Starlette en middlewares que solo
+    necesitan uno o dos headers por request.
+    """
+    for key, value in request.scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def get_client_ip(request: Request, default: Optional[str] = "unknown") -> Optional[str]:
+    """
+    IP del cliente.
+
+    X-Forwarded-For solo se respeta con TRUST_PROXY_HEADERS=True (app detrás
+    de un reverse proxy confiable); sin proxy el header lo controla el cliente
+    y permitiría falsear la IP (ej: evadir el rate limit).
+    """
+    if settings.TRUST_PROXY_HEADERS:
+        forwarded_for = get_header(request, b"x-forwarded-for")
+        if forwarded_for:
+            return forwarded_for.split(",", 1)[0].strip()
+    client = request.scope.get("client")
+    return client[0] if client else default
@@ -9,7 +9,10 @@ import asyncio
 from typing import Dict, Any, List
 from datetime import datetime
 
+import orjson
+
 from app.config import settings
+from app.services.queue_service import BULK_EMAIL_CHUNKS_KEY
 from app.utils.logger import get_structured_logger, LogContext
 
 logger = get_structured_logger(__name__)
@@ -90,23 +93,38 @@ async def send_bulk_emails(
     emails: List[Dict[str, str]],
     rate_limit: int = 10,
     user_id: int = None,
+    group_id: str = None,
+    chunk_index: int = 0,
+    chunk_count: int = 1,
+    group_results: Dict[str, Any] = None,
 ) -> Dict[str, Any]:
     """
     Envía múltiples emails con rate limiting.
 
+    Con group_id (QueueService.enqueue_bulk_emails) cada job es un chunk del
+    envío: acumula en group_results, encola el chunk siguiente al terminar y
+    solo el último publica bulk_email_completed con los totales del grupo.
+
     Args:
         emails: Lista de dicts con 'to_email', 'subject', 'body', 'html_body'
         rate_limit: Máximo de emails por minuto
+        group_id: Envío masivo al que pertenece este chunk
+        chunk_index: Posición del chunk dentro del grupo
+        chunk_count: Cantidad total de chunks del grupo
+        group_results: Totales acumulados por los chunks anteriores
     """
-    total = len(emails)
     job_id = ctx.get("job_id")
+    # Copia: un retry del job vuelve a partir de los totales recibidos
+    results = dict(group_results or {"total": len(emails), "sent": 0, "failed": 0, "errors": []})
+    results["errors"] = list(results["errors"])
+    total = results["total"]
 
     with LogContext(job_id=job_id, user_id=user_id, task="send_bulk_emails"):
-        logger.info("Starting bulk email", total_emails=total, rate_limit=rate_limit)
+        logger.info("Starting bulk email", total_emails=total, chunk_emails=len(emails),
+                    chunk_index=chunk_index, chunk_count=chunk_count, rate_limit=rate_limit)
 
         await _update_task_status(ctx, "processing", progress=0)
 
-        results = {"total": total, "sent": 0, "failed": 0, "errors": []}
         delay = 60.0 / rate_limit
 
         for idx, email_data in enumerate(emails):
@@ -127,25 +145,67 @@ async def send_bulk_emails(
                     "error": str(e),
                 })
 
-            progress = int((idx + 1) / total * 100)
-            await _update_task_status(ctx, "processing", progress=progress)
+            await _update_task_status(ctx, "processing", progress=int((idx + 1) / len(emails) * 100))
 
-            if (idx + 1) % 10 == 0:
+            done = results["sent"] + results["failed"]
+            if done % 10 == 0:
                 await _publish_notification(ctx, user_id, "bulk_email_progress", {
+                    "group_id": group_id,
                     "sent": results["sent"],
                     "failed": results["failed"],
                     "total": total,
-                    "progress": progress,
+                    "progress": int(done / total * 100),
                 })
 
-            if idx < total - 1:
+            if idx < len(emails) - 1:
                 await asyncio.sleep(delay)
 
-        await _publish_notification(ctx, user_id, "bulk_email_completed", results)
+        if group_id and chunk_index + 1 < chunk_count:
+            await _enqueue_next_bulk_chunk(
+                ctx, rate_limit, user_id, group_id, chunk_index + 1, chunk_count, results, delay
+            )
+            logger.info("Bulk email chunk completed", sent=results["sent"], failed=results["failed"])
+            return results
+
+        if group_id:
+            await ctx["redis"].delete(BULK_EMAIL_CHUNKS_KEY.format(group_id=group_id))
+        await _publish_notification(ctx, user_id, "bulk_email_completed", {**results, "group_id": group_id})
         logger.info("Bulk email completed", sent=results["sent"], failed=results["failed"])
         return results
 
 
+async def _enqueue_next_bulk_chunk(
+    ctx: Dict[str, Any],
+    rate_limit: int,
+    user_id: int,
+    group_id: str,
+    chunk_index: int,
+    chunk_count: int,
+    group_results: Dict[str, Any],
+    delay: float,
+):
+    """Encola el chunk siguiente de un envío masivo, un intervalo de rate después del último email."""
+    redis = ctx["redis"]
+    chunk = await redis.lindex(BULK_EMAIL_CHUNKS_KEY.format(group_id=group_id), chunk_index)
+    if chunk is None:
+        logger.error("Bulk email chunk missing", group_id=group_id, chunk_index=chunk_index)
+        return
+
+    # _job_id fijo: si este job se reintenta después de encolar, ARQ no duplica el siguiente
+    await redis.enqueue_job(
+        "send_bulk_emails",
+        orjson.loads(chunk),
+        rate_limit,
+        user_id,
+        group_id=group_id,
+        chunk_index=chunk_index,
+        chunk_count=chunk_count,
+        group_results=group_results,
+        _job_id=f"{group_id}:{chunk_index}",
+        _defer_by=delay,
+    )
+
+
 # ---- Helpers ----
 
 async def _update_task_status(ctx: Dict[str, Any], status: str, progress: int = None):
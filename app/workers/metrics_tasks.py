@@ -0,0 +1,73 @@
+"""
+Metrics maintenance tasks for ARQ workers
+
+Tasks:
+- rollup_metrics: Aggregate api_metrics into 5-minute buckets (cron)
+- maintain_metrics_partitions: Create upcoming monthly partitions and drop
+  the ones past METRICS_RETENTION_MONTHS (daily cron)
+"""
+import asyncio
+from datetime import date, datetime
+from typing import Dict, Any
+
+from sqlmodel import Session
+
+from app.config import settings
+from app.database import metrics_engine
+from app.services.metrics_service import metrics_service
+from app.utils.logger import get_structured_logger, LogContext
+
+logger = get_structured_logger(__name__)
+
+
+def _rollup() -> int:
+    with Session(metrics_engine) as session:
+        return metrics_service.rollup_buckets(session)
+
+
+async def rollup_metrics(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Roll complete 5-minute buckets of api_metrics into api_metrics_5m
+
+    Args:
+        ctx: ARQ context
+
+    Returns:
+        Dict with the number of bucket rows written
+    """
+    with LogContext(job_id=ctx.get("job_id"), task="rollup_metrics"):
+        # Engine síncrono: el INSERT ... SELECT corre en el threadpool
+        rows = await asyncio.get_running_loop().run_in_executor(None, _rollup)
+        logger.info("Metrics rollup completed", rows=rows)
+        return {"rows": rows}
+
+
+def _maintain_partitions() -> Dict[str, Any]:
+    with Session(metrics_engine) as session:
+        created = metrics_service.ensure_partitions(session)
+        dropped = []
+        if settings.METRICS_RETENTION_MONTHS > 0:
+            # Inicio del mes actual menos la retención: los meses que terminan antes se borran
+            today = date.today()
+            months = today.year * 12 + today.month - 1 - settings.METRICS_RETENTION_MONTHS
+            dropped = metrics_service.drop_partitions_before(
+                session, datetime(months // 12, months % 12 + 1, 1)
+            )
+        return {"partitions": created, "dropped": dropped}
+
+
+async def maintain_metrics_partitions(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Keep api_metrics partitions METRICS_PARTITIONS_AHEAD months ahead and drop
+    the ones older than METRICS_RETENTION_MONTHS full months
+
+    Args:
+        ctx: ARQ context
+
+    Returns:
+        Dict with the checked/created and the dropped partition names
+    """
+    with LogContext(job_id=ctx.get("job_id"), task="maintain_metrics_partitions"):
+        result = await asyncio.get_running_loop().run_in_executor(None, _maintain_partitions)
+        logger.info("Metrics partitions maintained", **result)
+        return result
@@ -8,6 +8,7 @@ To start workers:
 """
 import os
 from dotenv import load_dotenv
+from arq import cron
 from arq.connections import RedisSettings
 
 # Load environment variables
@@ -25,6 +26,16 @@ from app.workers.email_tasks import (
 from app.workers.webhook_tasks import (
     deliver_webhook,
 )
+from app.workers.metrics_tasks import (
+    maintain_metrics_partitions,
+    rollup_metrics,
+)
+
+
+async def shutdown(ctx):
+    """Close pooled SMTP connections when the worker stops"""
+    from app.services.email_service import email_service
+    await email_service.close()
 
 
 class WorkerSettings:
@@ -57,6 +68,17 @@ class WorkerSettings:
         deliver_webhook,
     ]
 
+    # Scheduled tasks
+    cron_jobs = [
+        # Un minuto después de cerrar cada bucket de 5 minutos (ver ROLLUP_GRACE)
+        cron(rollup_metrics, minute=set(range(1, 60, 5)), second=0),
+        # Particiones mensuales de api_metrics: crear las próximas y aplicar retención
+        cron(maintain_metrics_partitions, hour=3, minute=17, second=0),
+    ]
+
+    # Lifecycle hooks
+    on_shutdown = shutdown
+
     # Worker configuration
     queue_name = 'arq:queue'  # Default queue name
     max_jobs = 10  # Maximum number of concurrent jobs per worker
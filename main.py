@@ -1,12 +1,12 @@
 import uvicorn
 import asyncio
+from anyio import to_thread
 from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse
-from sqlmodel import inspect, text
+from sqlmodel import Session, inspect, text
 from prometheus_fastapi_instrumentator import Instrumentator
 import os
 
@@ -22,7 +22,7 @@ if settings.SENTRY_DSN:
         send_default_pii=False,
         release=settings.API_VERSION,
     )
-from app.database import engine, init_db, get_session
+from app.database import engine, init_db, metrics_engine, init_metrics_db
 from app.routes import users_router
 from app.routes.auth import router as auth_router
 from app.routes.media import router as media_router
@@ -42,11 +42,15 @@ from app.routes.gdpr import router as gdpr_router
 from app.routes.setup import router as setup_router
 from app.routes.seguros import router as seguros_router
 from app.services.cors_service import cors_service
-from app.middleware.metrics import MetricsMiddleware
+from app.services.email_service import email_service
+from app.services.metrics_service import metrics_service
+from app.middleware.cors import DynamicCORSMiddleware
+from app.middleware.metrics import MetricsMiddleware, start_metrics_writer, stop_metrics_writer
 from app.middleware.rate_limit import RateLimitMiddleware
 from app.middleware.logging import LoggingMiddleware
 from app.middleware.security_headers import SecurityHeadersMiddleware
-from app.services.task_notification_service import start_task_notification_listener
+from app.services.queue_service import queue_service
+from app.services.task_notification_service import task_notification_service, start_task_notification_listener
 from app.utils.logger import get_structured_logger
 from app.core.seed import seed_all
 
@@ -62,6 +66,10 @@ async def lifespan(app: FastAPI):
     """
     logger.info("Starting FastAPI application")
 
+    # Las rutas sync (def) corren en el threadpool de anyio; su tamaño acota
+    # cuántas pueden esperar I/O de BD a la vez
+    to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_SIZE
+
     # Check if tables already exist
     inspector = inspect(engine)
     existing_tables = inspector.get_table_names()
@@ -74,13 +82,44 @@ async def lifespan(app: FastAPI):
         seed_all()
 
     # Start task notification listener (if Redis is enabled)
+    cors_listener = None
     if settings.REDIS_ENABLED:
+        # Pool de ARQ y conexión Pub/Sub una sola vez al arrancar: los
+        # endpoints de /tasks ya no inicializan en cada request
+        try:
+            await queue_service.initialize()
+            await task_notification_service.initialize()
+        except Exception as e:
+            logger.warning("Could not initialize task queue", error=str(e))
+
         asyncio.create_task(start_task_notification_listener())
         logger.info("Task notification listener started")
 
+        # Invalidación de origins CORS entre workers
+        cors_listener = asyncio.create_task(cors_service.listen_for_invalidations())
+
+    # Base de métricas dedicada (METRICS_DATABASE_URL) + particiones mensuales
+    # de api_metrics (no-op si la tabla no está particionada)
+    try:
+        init_metrics_db()
+        with Session(metrics_engine) as session:
+            metrics_service.ensure_partitions(session)
+    except Exception as e:
+        logger.warning("Could not prepare metrics database", error=str(e))
+
+    # Writer de métricas en background (inserts por lotes)
+    await start_metrics_writer()
+
     yield
 
     logger.info("Shutting down FastAPI application")
+    if cors_listener is not None:
+        cors_listener.cancel()
+    await stop_metrics_writer()
+    await email_service.close()
+    if settings.REDIS_ENABLED:
+        await task_notification_service.stop()
+        await queue_service.close()
 
 
 # Create FastAPI application
@@ -92,26 +131,16 @@ app = FastAPI(
 )
 
 # Configure CORS with dynamic origins from database
-# Note: CORS middleware is configured on startup with DB origins
-# Origins are cached for performance, fallback to "*" if DB is empty
-def get_cors_origins():
-    """Get CORS origins from database with fallback to '*' if empty"""
-    try:
-        session = next(get_session())
-        origins = cors_service.get_active_origins(session)
-        session.close()
-        logger.info("CORS configured with origins from database", origin_count=len(origins))
-        return origins
-    except Exception as e:
-        logger.warning("Could not load CORS origins from DB, falling back to environment", error=str(e))
-        return settings.cors_origins_list
-
+# Origins se resuelven por request desde una copia local por worker
+# (Redis/BD al expirar); los cambios se propagan a todos los workers vía
+# pub/sub. Fallback a "*" si la BD está vacía, a CORS_ORIGINS si no responde.
 app.add_middleware(
-    CORSMiddleware,
-    allow_origins=get_cors_origins(),
+    DynamicCORSMiddleware,
+    cached_origins=cors_service.cached_origins,
+    load_origins=cors_service.load_origins,
     allow_credentials=settings.CORS_CREDENTIALS,
-    allow_methods=settings.CORS_METHODS.split(",") if settings.CORS_METHODS != "*" else ["*"],
-    allow_headers=settings.CORS_HEADERS.split(",") if settings.CORS_HEADERS != "*" else ["*"],
+    allow_methods=settings.cors_methods_list,
+    allow_headers=settings.cors_headers_list,
 )
 
 # Add logging middleware (should be first to capture all requests)
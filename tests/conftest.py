@@ -8,6 +8,7 @@ from sqlmodel.pool import StaticPool
 from fastapi.testclient import TestClient
 
 from app.database.connection import get_session
+from app.services.user_service import clear_user_cache
 from main import app
 
 
@@ -36,6 +37,7 @@ def engine_fixture():
     # webhook.py usa SQLAlchemy Base (no SQLModel) — se excluye de tests por ahora
 
     SQLModel.metadata.create_all(engine)
+    clear_user_cache()
     yield engine
     SQLModel.metadata.drop_all(engine)
 
@@ -1,4 +1,5 @@
 """Tests de endpoints básicos de la API."""
+import pytest
 
 
 class TestHealthCheck:
@@ -12,6 +13,25 @@ class TestHealthCheck:
         assert "timestamp" in data
 
 
+class TestRequestLogging:
+    def test_request_id_header(self, client):
+        response = client.get("/users/")
+        assert len(response.headers["X-Request-ID"]) == 16
+
+    def test_request_id_header_when_info_disabled(self, client):
+        import logging
+        from app.middleware.logging import logger
+
+        previous = logger.logger.level
+        logger.logger.setLevel(logging.WARNING)
+        try:
+            response = client.get("/users/")
+        finally:
+            logger.logger.setLevel(previous)
+        assert response.status_code == 200
+        assert len(response.headers["X-Request-ID"]) == 16
+
+
 class TestUsersCRUD:
     def test_create_user(self, client):
         response = client.post(
@@ -70,3 +90,236 @@ class TestUsersCRUD:
         assert result["total"] == 4
         assert len(result["data"]) == 2
         assert result["has_more"] is True
+
+
+class TestMediaEmbedding:
+    def test_halfvec_loads_as_compact_array(self):
+        from array import array
+        from sqlalchemy.dialects import postgresql
+        from app.models.media import CompactHalfVec
+
+        dialect = postgresql.dialect()
+        column_type = CompactHalfVec(3)
+
+        loaded = column_type.result_processor(dialect, None)("[1.5,2,3]")
+        assert isinstance(loaded, array) and loaded.typecode == "f"
+        assert list(loaded) == [1.5, 2.0, 3.0]
+        assert column_type.bind_processor(dialect)(loaded) == "[1.5,2.0,3.0]"
+
+    def test_media_read_accepts_array_embedding(self):
+        from array import array
+        from app.models.media import MediaRead
+
+        media = MediaRead.model_validate({
+            "id": 1, "filename": "a.png", "storage_path": "a.png", "file_size": 1,
+            "mime_type": None, "file_type": "image", "url": "/a.png",
+            "description": None, "alt_text": None, "embedding": array("f", [0.5, 1.0]),
+            "user_id": None, "storage_backend": "local", "is_public": False,
+            "is_active": True, "created_at": "2026-01-01T00:00:00",
+            "updated_at": "2026-01-01T00:00:00",
+        })
+        assert media.embedding == [0.5, 1.0]
+
+
+class TestMediaUrls:
+    def test_add_urls_to_many_matches_single(self, monkeypatch):
+        from app.models.media import Media, MediaRead
+        from app.services.media_service import media_service
+        from app.services.storage_service import storage_service
+
+        monkeypatch.setattr(storage_service, "use_s3", False)
+        rows = [
+            Media(id=i, filename=f"{i}.png", storage_path=f"2026/{i}.png", file_size=1,
+                  file_type="image", storage_backend="local")
+            for i in (1, 2)
+        ]
+
+        many = media_service.add_urls_to_many(rows)
+        single = [media_service._add_urls_to_media(MediaRead.model_validate(m)) for m in rows]
+        assert many == single
+        assert many[1].url == many[1].download_url == "/media/2/download"
+
+
+    def test_add_urls_to_many_converts_embedding(self, monkeypatch):
+        from array import array
+        from app.models.media import Media
+        from app.services.media_service import media_service
+        from app.services.storage_service import storage_service
+
+        monkeypatch.setattr(storage_service, "use_s3", False)
+        row = Media(id=3, filename="3.png", storage_path="2026/3.png", file_size=1,
+                    file_type="image", storage_backend="local")
+        row.embedding = array("f", [0.5, 0.25])
+
+        (media_read,) = media_service.add_urls_to_many([row])
+        assert media_read.embedding == [0.5, 0.25]
+        assert media_read.model_dump()["filename"] == "3.png"
+
+
+    def test_list_getters_return_media_read_with_urls(self, session, monkeypatch):
+        from app.models.media import Media, MediaRead
+        from app.services.media_service import media_service
+        from app.services.storage_service import storage_service
+
+        monkeypatch.setattr(storage_service, "use_s3", False)
+        session.add_all([
+            Media(filename="a.png", storage_path="2026/a.png", file_size=1, file_type="image",
+                  storage_backend="local", user_id=5, is_public=True),
+            Media(filename="b.mp4", storage_path="2026/b.mp4", file_size=1, file_type="video",
+                  storage_backend="local", user_id=6),
+        ])
+        session.commit()
+
+        (by_user,) = media_service.get_by_user(session, 5)
+        assert isinstance(by_user, MediaRead)
+        assert by_user.url == f"/media/{by_user.id}/download"
+        assert [m.filename for m in media_service.get_by_file_type(session, "video")] == ["b.mp4"]
+        assert [m.filename for m in media_service.get_public_media(session)] == ["a.png"]
+
+
+class TestMediaUpload:
+    def test_upload_stores_content_hash(self, client, session, tmp_path, monkeypatch):
+        import hashlib
+        from app.models.media import Media
+        from app.services.storage_service import storage_service
+
+        monkeypatch.setattr(storage_service, "use_s3", False)
+        monkeypatch.setattr(storage_service, "media_folder", tmp_path)
+        content = b"hello media" * 1000
+
+        resp = client.post("/media/upload", files={"file": ("hello.txt", content, "text/plain")})
+
+        assert resp.status_code == 201
+        media = session.get(Media, resp.json()["id"])
+        assert media.content_hash == hashlib.blake2b(content, digest_size=16).hexdigest()
+        assert (tmp_path / media.storage_path).read_bytes() == content
+
+
+class TestMediaConditionalGet:
+    def _upload(self, client, tmp_path, monkeypatch):
+        from app.services.storage_service import storage_service
+
+        monkeypatch.setattr(storage_service, "use_s3", False)
+        monkeypatch.setattr(storage_service, "media_folder", tmp_path)
+        resp = client.post("/media/upload", files={"file": ("a.txt", b"abc", "text/plain")})
+        return resp.json()["id"]
+
+    def test_get_media_304_on_matching_etag(self, client, tmp_path, monkeypatch):
+        media_id = self._upload(client, tmp_path, monkeypatch)
+
+        first = client.get(f"/media/{media_id}")
+        etag = first.headers["etag"]
+        assert first.status_code == 200 and etag.startswith('W/"')
+
+        again = client.get(f"/media/{media_id}", headers={"If-None-Match": etag})
+        assert again.status_code == 304 and again.content == b""
+
+        client.patch(f"/media/{media_id}", json={"description": "changed"})
+        changed = client.get(f"/media/{media_id}", headers={"If-None-Match": etag})
+        assert changed.status_code == 200 and changed.headers["etag"] != etag
+
+    def test_download_uses_content_hash_etag(self, client, tmp_path, monkeypatch):
+        import hashlib
+
+        media_id = self._upload(client, tmp_path, monkeypatch)
+        resp = client.get(f"/media/{media_id}/download")
+        expected = hashlib.blake2b(b"abc", digest_size=16).hexdigest()
+
+        assert resp.headers["etag"] == f'"{expected}"'
+        assert resp.headers["accept-ranges"] == "bytes"
+        assert client.get(
+            f"/media/{media_id}/download", headers={"If-None-Match": f'W/"{expected}", "other"'}
+        ).status_code == 304
+        assert client.get(
+            f"/media/{media_id}/download", headers={"If-Modified-Since": resp.headers["last-modified"]}
+        ).status_code == 304
+
+    def test_etag_matches(self):
+        from app.routes.media import _etag_matches
+
+        assert _etag_matches("*", '"a"')
+        assert _etag_matches('"b", W/"a"', '"a"')
+        assert not _etag_matches('"b"', '"a"')
+        assert not _etag_matches(None, '"a"')
+
+
+class TestMediaDownloadRange:
+    def test_parse_range(self):
+        from fastapi import HTTPException
+        from app.routes.media import _parse_range
+
+        assert _parse_range(None, 100) is None
+        assert _parse_range("bytes=0-9", 100) == (0, 9)
+        assert _parse_range("bytes=90-", 100) == (90, 99)
+        assert _parse_range("bytes=-10", 100) == (90, 99)
+        assert _parse_range("bytes=50-500", 100) == (50, 99)
+        # Multi-range / malformado: se sirve el archivo completo
+        assert _parse_range("bytes=0-1,5-6", 100) is None
+        assert _parse_range("bytes=a-b", 100) is None
+
+        with pytest.raises(HTTPException) as exc:
+            _parse_range("bytes=100-", 100)
+        assert exc.value.status_code == 416
+        assert exc.value.headers["Content-Range"] == "bytes */100"
+
+    def test_local_stream_honours_range(self, tmp_path):
+        import asyncio
+        from app.services.storage_service import StorageService, STREAM_CHUNK_SIZE
+
+        storage = StorageService.__new__(StorageService)
+        storage.use_s3 = False
+        storage.media_folder = tmp_path
+        data = bytes(range(256)) * (STREAM_CHUNK_SIZE // 128)
+        (tmp_path / "f.bin").write_bytes(data)
+
+        whole = asyncio.run(storage.open_stream("f.bin"))
+        assert b"".join(whole) == data
+
+        start, end = 10, STREAM_CHUNK_SIZE + 20
+        part = asyncio.run(storage.open_stream("f.bin", start, end))
+        assert b"".join(part) == data[start:end + 1]
+
+
+class TestSchemas:
+    def test_schemas_built_at_import(self):
+        """Los schemas de request/response quedan compilados al importar."""
+        from sqlmodel import SQLModel
+        import main  # noqa: F401  (importa todos los modelos/rutas)
+
+        def subclasses(cls):
+            for sub in cls.__subclasses__():
+                yield sub
+                yield from subclasses(sub)
+
+        pending = [s.__name__ for s in subclasses(SQLModel) if not s.__pydantic_complete__]
+        assert pending == []
+
+    def test_task_counters_are_smallint(self, session):
+        """progress/retry_count/max_retries son SMALLINT y conservan sus defaults."""
+        from sqlalchemy import SmallInteger
+        from app.models.task import Task
+
+        for column in ("progress", "retry_count", "max_retries"):
+            assert isinstance(Task.__table__.c[column].type, SmallInteger)
+
+        task = Task(task_id="job-1", task_type="email_sending")
+        session.add(task)
+        session.commit()
+        session.refresh(task)
+        assert (task.progress, task.retry_count, task.max_retries) == (0, 0, 3)
+
+    def test_task_status_is_enum(self, session):
+        """status se guarda como ENUM task_status con los valores en minúscula."""
+        from sqlalchemy import Enum
+        from app.models.task import Task, TaskStatus
+
+        column_type = Task.__table__.c["status"].type
+        assert isinstance(column_type, Enum)
+        assert column_type.name == "task_status"
+        assert column_type.enums == [s.value for s in TaskStatus]
+
+        task = Task(task_id="job-2", task_type="email_sending")
+        session.add(task)
+        session.commit()
+        session.refresh(task)
+        assert task.status is TaskStatus.PENDING
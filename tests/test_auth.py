@@ -46,6 +46,94 @@ class TestLogin:
         )
         assert response.status_code == 401
 
+    def test_login_sets_last_login(self, client, session, registered_user):
+        """created_at y last_login los asigna la BD."""
+        from sqlmodel import select
+        from app.models.user import User
+
+        client.post(
+            "/auth/login",
+            json={"email": "test@example.com", "password": "password123"},
+        )
+        user = session.exec(select(User).where(User.email == "test@example.com")).one()
+        assert user.created_at is not None
+        assert user.updated_at is not None
+        assert user.last_login is not None
+
+    def test_record_login_skips_locked_row(self, session, monkeypatch):
+        """Sin rehash el UPDATE toma la fila con FOR NO KEY UPDATE SKIP LOCKED."""
+        from sqlalchemy.dialects import postgresql
+        from app.models.user import User
+        from app.services.user_service import user_service
+
+        user = User(email="lock@example.com")
+        session.add(user)
+        session.commit()
+        user_id = user.id
+
+        statements = []
+        execute = session.execute
+        monkeypatch.setattr(session, "execute", lambda stmt, *a, **kw: statements.append(stmt) or execute(stmt, *a, **kw))
+
+        assert user_service.record_login(session, user_id) is True
+        assert user_service.record_login(session, user_id, hashed_password="$argon2id$x") is True
+        session.commit()
+
+        locked, rehash = (str(s.compile(dialect=postgresql.dialect())) for s in statements)
+        assert "FOR NO KEY UPDATE SKIP LOCKED" in locked
+        assert "FOR NO KEY UPDATE" not in rehash
+        session.refresh(user)
+        assert user.last_login is not None
+        assert user.hashed_password == "$argon2id$x"
+
+    def test_login_rehashes_legacy_bcrypt(self, client, session, registered_user):
+        """El rehash viaja en el mismo UPDATE que last_login."""
+        import bcrypt
+        from sqlmodel import select
+        from app.models.user import User
+
+        user = session.exec(select(User).where(User.email == "test@example.com")).one()
+        user.hashed_password = bcrypt.hashpw(b"password123", bcrypt.gensalt(rounds=4)).decode()
+        session.add(user)
+        session.commit()
+
+        response = client.post(
+            "/auth/login",
+            json={"email": "test@example.com", "password": "password123"},
+        )
+        assert response.status_code == 200
+
+        session.refresh(user)
+        assert user.hashed_password.startswith("$argon2id$")
+        assert user.last_login is not None
+
+    def test_login_queries_off_event_loop(self, client, registered_user, monkeypatch):
+        """Las consultas del login corren en el threadpool, no en el event loop."""
+        import asyncio
+        from app.services.user_service import user_service
+
+        on_loop = []
+
+        def spy(original):
+            def wrapper(*args, **kwargs):
+                try:
+                    asyncio.get_running_loop()
+                    on_loop.append(original.__name__)
+                except RuntimeError:
+                    pass
+                return original(*args, **kwargs)
+            return wrapper
+
+        monkeypatch.setattr(user_service, "get_user_by_email", spy(user_service.get_user_by_email))
+        monkeypatch.setattr(user_service, "record_login", spy(user_service.record_login))
+
+        response = client.post(
+            "/auth/login",
+            json={"email": "test@example.com", "password": "password123"},
+        )
+        assert response.status_code == 200
+        assert on_loop == []
+
 
 class TestProtectedEndpoints:
     def test_me_with_valid_token(self, client, registered_user):
@@ -53,6 +141,20 @@ class TestProtectedEndpoints:
         assert response.status_code == 200
         assert response.json()["email"] == "test@example.com"
 
+    def test_me_reflects_user_update_despite_cache(self, client, registered_user, session):
+        from sqlmodel import select
+        from app.models.user import User
+
+        assert client.get("/auth/me", headers=registered_user["headers"]).status_code == 200
+
+        user = session.exec(select(User).where(User.email == "test@example.com")).one()
+        user.is_active = False
+        session.add(user)
+        session.commit()
+
+        response = client.get("/auth/me", headers=registered_user["headers"])
+        assert response.status_code == 400
+
     def test_me_without_token(self, client):
         response = client.get("/auth/me")
         assert response.status_code in (401, 403)
@@ -80,3 +182,225 @@ class TestRefreshToken:
         )
         assert me_response.status_code == 200
         assert me_response.json()["email"] == "test@example.com"
+
+
+class TestRBACClaims:
+    def test_login_token_embeds_rbac_claims(self, client, registered_user):
+        from app.core.security import decode_access_token
+
+        claims = decode_access_token(registered_user["token"])
+        assert claims["sub"] == "test@example.com"
+        assert isinstance(claims["uid"], int)
+        assert isinstance(claims["roles"], list)
+        assert isinstance(claims["perms"], list)
+        assert claims["act"] is True
+
+    def test_permission_guard_uses_token_claims(self, client, registered_user):
+        from app.core.security import create_access_token, decode_access_token
+
+        base = decode_access_token(registered_user["token"])
+        without = create_access_token({"sub": base["sub"], "uid": base["uid"], "roles": [], "perms": []})
+        with_perm = create_access_token({"sub": base["sub"], "uid": base["uid"], "roles": [], "perms": ["read:roles"]})
+
+        assert client.get("/roles/", headers={"Authorization": f"Bearer {without}"}).status_code == 403
+        assert client.get("/roles/", headers={"Authorization": f"Bearer {with_perm}"}).status_code == 200
+
+    def test_guards_without_claims_load_rbac_once_per_request(self, monkeypatch):
+        import asyncio
+        from types import SimpleNamespace
+        from app.core import permissions
+        from app.models.user import UserRead
+
+        calls = []
+
+        def get_user_rbac(session, user_id):
+            calls.append(user_id)
+            return frozenset({"admin"}), frozenset({"read:roles"})
+
+        monkeypatch.setattr(permissions.rbac_cache, "get_user_rbac", get_user_rbac)
+        request = SimpleNamespace(state=SimpleNamespace())  # API key: sin token_claims
+        user = UserRead.model_construct(id=7, email="key@example.com", is_active=True)
+
+        async def run_guards():
+            await permissions.require_roles_read(request, user, None)
+            await permissions.require_admin(request, user, None)
+            await permissions.require_role("admin")(request, user, None)
+
+        asyncio.run(run_guards())
+        assert calls == [7]
+
+    def test_get_role_with_permissions_in_one_query(self, session):
+        from app.models.role import Permission, Role, RolePermission, RoleReadWithPermissions
+        from app.services.role_service import role_service
+
+        role = Role(name="reviewer", display_name="Reviewer")
+        read_media = Permission(action="read", resource="media")
+        read_users = Permission(action="read", resource="users")
+        session.add_all([role, read_media, read_users])
+        session.commit()
+        session.add_all([
+            RolePermission(role_id=role.id, permission_id=read_media.id),
+            RolePermission(role_id=role.id, permission_id=read_users.id),
+        ])
+        session.commit()
+        role_id = role.id
+        session.expunge_all()
+
+        loaded = role_service.get_role_by_id(session, role_id, load_permissions=True)
+        session.expunge(loaded)  # role.permissions ya cargado: no hay lazy load
+        body = RoleReadWithPermissions.model_validate(loaded)
+
+        assert body.name == "reviewer"
+        assert sorted(p.name for p in body.permissions) == ["read:media", "read:users"]
+        assert role_service.get_role_by_id(session, 999999, load_permissions=True) is None
+
+    def test_paginated_lists_carry_total(self, session):
+        from app.models.role import Role
+        from app.services.role_service import role_service
+
+        session.add_all([Role(name=f"page-{i}", display_name=f"Page {i}") for i in range(5)])
+        session.add(Role(name="page-off", display_name="Off", is_active=False))
+        session.commit()
+
+        page = role_service.get_all_roles_paginated(session, skip=2, limit=2)
+        assert page["total"] == 5
+        assert len(page["data"]) == 2 and page["has_more"] is True
+
+        past_end = role_service.get_all_roles_paginated(session, skip=10, limit=2)
+        assert past_end["data"] == [] and past_end["total"] == 5
+
+    def test_permission_name_generated_by_db(self, session):
+        """Permission.name es una columna generada: action:resource."""
+        from app.models.role import PermissionCreate
+        from app.services.role_service import permission_service
+
+        permission = permission_service.create_permission(
+            session, PermissionCreate(action="export", resource="reports")
+        )
+        assert permission.name == "export:reports"
+        assert permission_service.get_permission_by_name(session, "export:reports").id == permission.id
+
+
+class _FakeRedis:
+    """Redis en memoria con lo mínimo que usa RBACCache (sets + pipeline)."""
+
+    def __init__(self):
+        self.sets = {}
+        self.commands = []
+
+    def smembers(self, key):
+        self.commands.append(("smembers", key))
+        return set(self.sets.get(key, set()))
+
+    def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(members)
+
+    def delete(self, *keys):
+        self.commands.append(("delete",) + keys)
+        for key in keys:
+            self.sets.pop(key, None)
+
+    def expire(self, key, ttl):
+        pass
+
+    def pipeline(self, transaction=True):
+        redis = self
+
+        class Pipeline:
+            def __init__(self):
+                self.calls = []
+
+            def __getattr__(self, name):
+                return lambda *args: self.calls.append((name, args))
+
+            def execute(self):
+                return [getattr(redis, name)(*args) for name, args in self.calls]
+
+        return Pipeline()
+
+
+class TestRBACCache:
+    def _seed(self, session):
+        from app.models.role import Permission, Role, RolePermission, UserRole
+        from app.models.user import User
+
+        user = User(email="cache@example.com")
+        role = Role(name="viewer", display_name="Viewer")
+        other = Role(name="auditor", display_name="Auditor")
+        read_media = Permission(action="read", resource="media")
+        session.add_all([user, role, other, read_media])
+        session.commit()
+        session.add_all([
+            UserRole(user_id=user.id, role_id=role.id),
+            RolePermission(role_id=role.id, permission_id=read_media.id),
+        ])
+        session.commit()
+        return user, role, other
+
+    def _cache(self, monkeypatch):
+        from types import SimpleNamespace
+        from app.services import rbac_cache as module
+
+        fake = _FakeRedis()
+        cache = module.RBACCache(SimpleNamespace(enabled=True, client=fake))
+        monkeypatch.setattr(module, "rbac_cache", cache)
+        monkeypatch.setattr("app.services.role_service.rbac_cache", cache)
+        return cache, fake
+
+    def test_without_redis_reads_from_db(self, session):
+        from app.services.rbac_cache import rbac_cache
+
+        user, _, _ = self._seed(session)
+        roles, perms = rbac_cache.get_user_rbac(session, user.id)
+        assert roles == {"viewer"}
+        assert perms == {"read:media"}
+
+    def test_cache_hit_skips_db(self, session, monkeypatch):
+        user, _, _ = self._seed(session)
+        cache, fake = self._cache(monkeypatch)
+
+        assert cache.get_user_permissions(session, user.id) == {"read:media"}
+
+        def no_db(*args, **kwargs):
+            raise AssertionError("cache hit should not query the DB")
+
+        monkeypatch.setattr(cache, "_load", no_db)
+        assert cache.get_user_roles(session, user.id) == {"viewer"}
+
+    def test_user_without_roles_is_cached(self, session, monkeypatch):
+        from app.models.user import User
+
+        cache, fake = self._cache(monkeypatch)
+        user = User(email="norole@example.com")
+        session.add(user)
+        session.commit()
+
+        assert cache.get_user_permissions(session, user.id) == frozenset()
+        assert fake.sets[f"auth:user:{user.id}:perms"] == {""}
+
+    def test_role_assignment_invalidates(self, session, monkeypatch):
+        from app.services.role_service import role_service
+
+        user, _, other = self._seed(session)
+        self._cache(monkeypatch)
+
+        assert not role_service.user_has_role(session, user.id, "auditor")
+        role_service.assign_role_to_user(session, user.id, other.id)
+        assert role_service.user_has_role(session, user.id, "auditor")
+
+        role_service.remove_role_from_user(session, user.id, other.id)
+        assert not role_service.user_has_role(session, user.id, "auditor")
+
+    def test_role_permission_change_invalidates_holders(self, session, monkeypatch):
+        from app.models.role import Permission
+        from app.services.role_service import role_service
+
+        user, role, _ = self._seed(session)
+        self._cache(monkeypatch)
+        delete_media = Permission(action="delete", resource="media")
+        session.add(delete_media)
+        session.commit()
+
+        assert not role_service.user_has_permission(session, user.id, "delete", "media")
+        role_service.assign_permissions_to_role(session, role.id, [delete_media.id])
+        assert role_service.user_has_permission(session, user.id, "delete", "media")
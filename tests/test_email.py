@@ -101,6 +101,96 @@ class TestEmailTemplateRendering:
         with pytest.raises(Exception):
             email_service.render_template("nonexistent.html", {})
 
+    def test_templates_compiled_once(self):
+        """get_template devuelve el template cacheado, sin re-parsear."""
+        from app.services.email_service import email_service
+
+        env = email_service.jinja_env
+        assert env.auto_reload is False
+        assert env.get_template("welcome.html") is env.get_template("welcome.html")
+
+
+class FakeSMTP:
+    """Cliente SMTP falso: cuenta conexiones y mensajes enviados."""
+    connections = 0
+
+    def __init__(self, **kwargs):
+        self.is_connected = False
+        self.stale = False  # cerrada por el servidor sin que el cliente lo sepa
+
+    async def connect(self):
+        FakeSMTP.connections += 1
+        self.is_connected = True
+
+    async def login(self, username, password):
+        pass
+
+    async def send_message(self, message, recipients=None):
+        if self.stale:
+            import aiosmtplib
+            raise aiosmtplib.SMTPServerDisconnected("closed")
+
+    async def quit(self):
+        self.is_connected = False
+
+    def close(self):
+        self.is_connected = False
+
+
+class TestSMTPPool:
+    """El pool reutiliza conexiones autenticadas entre envíos."""
+
+    @pytest.fixture
+    def pool(self, monkeypatch):
+        from app.services import smtp_pool
+        monkeypatch.setattr(smtp_pool.aiosmtplib, "SMTP", FakeSMTP)
+        FakeSMTP.connections = 0
+        return smtp_pool.SMTPPool(hostname="smtp.test", port=587, username="u", password="p", size=2)
+
+    @pytest.mark.asyncio
+    async def test_connection_reused_across_sends(self, pool):
+        for _ in range(3):
+            await pool.send_message("msg", recipients=["a@example.com"])
+        assert FakeSMTP.connections == 1
+
+    @pytest.mark.asyncio
+    async def test_reconnects_when_server_closed_idle_connection(self, pool):
+        await pool.send_message("msg", recipients=["a@example.com"])
+        pool._idle[0].stale = True
+
+        await pool.send_message("msg", recipients=["a@example.com"])
+        assert FakeSMTP.connections == 2
+
+    @pytest.mark.asyncio
+    async def test_close_quits_idle_connections(self, pool):
+        await pool.send_message("msg", recipients=["a@example.com"])
+        client = pool._idle[0]
+        await pool.close()
+        assert not client.is_connected and pool._idle == []
+
+
+class TestSendEmailEnvelope:
+    """send_email arma un único sobre con destinatarios sin duplicar."""
+
+    @pytest.mark.asyncio
+    async def test_single_envelope_with_unique_recipients(self):
+        from app.services.email_service import email_service
+
+        with patch.object(email_service, "smtp_user", "u"), \
+             patch.object(email_service, "smtp_password", "p"), \
+             patch.object(email_service.smtp_pool, "send_message", new_callable=AsyncMock) as mock_send:
+            ok = await email_service.send_email(
+                to=["a@example.com", "b@example.com"],
+                subject="Hola",
+                html_content="<p>Hola</p>",
+                cc=["b@example.com"],
+                bcc=["c@example.com", "a@example.com"],
+            )
+
+        assert ok is True
+        mock_send.assert_awaited_once()
+        assert mock_send.call_args.kwargs["recipients"] == ["a@example.com", "b@example.com", "c@example.com"]
+
 
 class TestEmailEnqueue:
     """Verifica que enqueue() rutea correctamente según REDIS_ENABLED."""
@@ -258,3 +348,139 @@ class TestEmailValidation:
     def test_empty_email(self):
         from app.services.email_service import email_service
         assert email_service._validate_email("") is False
+
+    def test_validation_is_cached(self):
+        from app.services.email_service import _is_valid_email, email_service
+
+        _is_valid_email.cache_clear()
+        assert email_service._validate_email("cached@example.com") is True
+        assert email_service._validate_email("cached@example.com") is True
+        assert _is_valid_email.cache_info().hits == 1
+
+
+class TestEmailRequestSchemas:
+    def test_request_schemas_are_slotted(self):
+        from pydantic import BaseModel
+        from app.routes import email as email_routes
+
+        schemas = [
+            obj for name, obj in vars(email_routes).items()
+            if name.endswith("Request") and isinstance(obj, type) and issubclass(obj, BaseModel)
+        ]
+        assert len(schemas) == 6
+        for schema in schemas:
+            assert schema.__slots__ == ()
+
+        request = email_routes.WelcomeEmailRequest(to="a@example.com", name="A")
+        assert not hasattr(request, "__weakref__")
+        assert request.model_dump() == {"to": "a@example.com", "name": "A", "verification_url": None}
+
+
+class TestEmailRoutes:
+    """Los endpoints /email/send* responden 202 y envían en background."""
+
+    def test_send_returns_202_and_sends_in_background(self, client):
+        from app.services.email_service import email_service
+
+        with patch.object(email_service, "send_email", new_callable=AsyncMock, return_value=True) as mock_send:
+            resp = client.post("/email/send", json={
+                "to": ["user@example.com"], "subject": "Hola", "html_content": "<p>Hola</p>",
+            })
+
+        assert resp.status_code == 202
+        # TestClient ejecuta las background tasks antes de devolver la respuesta
+        mock_send.assert_awaited_once()
+        assert mock_send.call_args.kwargs["subject"] == "Hola"
+
+    def test_config_is_built_once(self, client):
+        from app.routes.email import _email_config
+
+        first = client.get("/email/config")
+        second = client.get("/email/config")
+
+        assert first.status_code == 200 and first.json() == second.json()
+        assert "password" not in first.text.lower()
+        assert _email_config.cache_info().currsize == 1
+
+    def test_templates_list_is_json(self, client):
+        resp = client.get("/email/templates")
+
+        assert resp.status_code == 200
+        assert resp.headers["content-type"] == "application/json"
+        assert "welcome.html" in [t["name"] for t in resp.json()["templates"]]
+
+    def test_send_template_unknown_template_is_400(self, client):
+        from app.services.email_service import email_service
+
+        with patch.object(email_service, "send_email", new_callable=AsyncMock) as mock_send:
+            resp = client.post("/email/send-template", json={
+                "to": ["user@example.com"], "subject": "x",
+                "template_name": "nonexistent.html", "context": {},
+            })
+
+        assert resp.status_code == 400
+        mock_send.assert_not_called()
+
+    def test_background_failure_does_not_fail_request(self, client):
+        from app.services.email_service import email_service
+
+        with patch.object(email_service, "send_welcome_email", new_callable=AsyncMock, return_value=False):
+            resp = client.post("/email/send-welcome", json={"to": "user@example.com", "name": "Ana"})
+
+        assert resp.status_code == 202
+
+
+class TestBulkEmailFanOut:
+    def test_chunks_run_as_a_chain_with_one_completion(self, monkeypatch):
+        """25 emails a 10/min: 3 chunks encadenados y un solo bulk_email_completed con el total del grupo."""
+        import asyncio
+        from types import SimpleNamespace
+        from app.services.queue_service import QueueService
+        from app.workers import email_tasks
+
+        queued, published, lists = [], [], {}
+
+        async def enqueue_job(name, *args, _job_id, _defer_by=None, **kwargs):
+            queued.append((name, args, kwargs, _job_id, _defer_by))
+            return SimpleNamespace(job_id=_job_id)
+
+        async def rpush(key, *values):
+            lists.setdefault(key, []).extend(values)
+
+        async def lindex(key, index):
+            return lists[key][index]
+
+        async def delete(key):
+            lists.pop(key, None)
+
+        async def publish(channel, message):
+            published.append(message)
+
+        async def noop(*args, **kwargs):
+            return None
+
+        redis = SimpleNamespace(enqueue_job=enqueue_job, rpush=rpush, lindex=lindex, delete=delete,
+                                publish=publish, expire=noop, setex=noop)
+        service = QueueService()
+        service.initialized = True
+        service.redis = redis
+        monkeypatch.setattr(email_tasks, "send_single_email", noop)
+        monkeypatch.setattr(email_tasks.asyncio, "sleep", noop)
+
+        emails = [{"to_email": f"u{i}@x.com", "subject": "s", "body": "b"} for i in range(25)]
+        group = asyncio.run(service.enqueue_bulk_emails(emails, rate_limit=10, user_id=1))
+        assert len(queued) == 1
+
+        ran = []
+        while queued:
+            name, args, kwargs, job_id, defer_by = queued.pop(0)
+            ran.append((job_id, len(args[0]), defer_by))
+            result = asyncio.run(email_tasks.send_bulk_emails({"redis": redis, "job_id": job_id}, *args, **kwargs))
+
+        group_id = group["group_id"]
+        assert ran == [(f"{group_id}:0", 10, None), (f"{group_id}:1", 10, 6.0), (f"{group_id}:2", 5, 6.0)]
+        assert group["task_ids"] == [job_id for job_id, _, _ in ran]
+        assert result["sent"] == 25 and result["total"] == 25
+        completed = [message for message in published if "bulk_email_completed" in message]
+        assert len(completed) == 1 and "'sent': 25" in completed[0]
+        assert lists == {}
@@ -99,6 +99,49 @@ class TestPagination:
         assert result["has_more"] is False
 
 
+    def test_paginated_offset_past_total(self, client, sample_users):
+        response = client.post("/users/filter/paginated", json={"limit": 2, "offset": 10})
+        assert response.status_code == 200
+        result = response.json()
+        assert result["total"] == 4
+        assert result["data"] == []
+        assert result["has_more"] is False
+
+    def test_keyset_pagination(self, client, sample_users):
+        first = client.post("/users/filter/paginated", json={"limit": 3, "after_id": 0}).json()
+        assert "total" not in first
+        assert first["has_more"] is True
+        ids = [u["id"] for u in first["data"]]
+        assert ids == sorted(ids) and first["next_cursor"] == ids[-1]
+
+        second = client.post(
+            "/users/filter/paginated", json={"limit": 3, "after_id": first["next_cursor"]}
+        ).json()
+        assert len(second["data"]) == 1
+        assert second["data"][0]["id"] > ids[-1]
+        assert second["has_more"] is False and second["next_cursor"] is None
+
+
+    def test_count_shared_across_pages(self, session, monkeypatch):
+        """El COUNT se cachea por condiciones: otra página del mismo filtro no lo repite."""
+        from app.services import filters as filters_module
+        from app.services.filters import QueryFilter
+        from app.services.user_service import user_service
+
+        store = {}
+        monkeypatch.setattr(filters_module.cache_service, "get", lambda prefix, **p: store.get((prefix, tuple(sorted(p.items())))))
+        monkeypatch.setattr(
+            filters_module.cache_service, "set",
+            lambda prefix, value, ttl=None, **p: store.__setitem__((prefix, tuple(sorted(p.items()))), value)
+        )
+
+        first = user_service.count_filtered(session, QueryFilter(limit=2, offset=0))
+        store_size = len(store)
+        second = user_service.count_filtered(session, QueryFilter(limit=2, offset=2))
+
+        assert first == second
+        assert store_size == len(store) == 1
+
 class TestOrdering:
     def test_order_by_name_asc(self, client, sample_users):
         response = client.post(
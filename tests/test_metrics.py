@@ -0,0 +1,265 @@
+"""Tests del MetricsMiddleware (cola en memoria + writer por lotes)."""
+import asyncio
+
+from sqlmodel import select
+
+
+class TestMetricsWriter:
+    """Tests del writer de métricas en background."""
+
+    def _store(self, middleware, n):
+        for i in range(n):
+            middleware._store_metric(
+                method="GET",
+                path=f"/items/{i}",
+                status_code=200,
+                duration_ms=1.5,
+                user_agent="x" * 600,
+            )
+
+    def test_queued_metrics_are_flushed(self, engine, session, monkeypatch):
+        """Las métricas encoladas se insertan en la BD al cerrar el writer."""
+        from app.middleware import metrics
+        from app.models.metric import ApiMetric
+
+        monkeypatch.setattr(metrics, "metrics_engine", engine)
+        middleware = metrics.MetricsMiddleware(app=None)
+
+        async def run():
+            await metrics.start_metrics_writer()
+            self._store(middleware, 3)
+            await asyncio.sleep(0)
+            self._store(middleware, 2)
+            await metrics.stop_metrics_writer()
+
+        asyncio.run(run())
+
+        rows = session.exec(select(ApiMetric)).all()
+        assert len(rows) == 5
+        assert all(r.timestamp is not None for r in rows)
+        assert all(len(r.user_agent) == 500 for r in rows)
+
+    def test_store_without_writer_is_noop(self, engine, session, monkeypatch):
+        """Sin writer activo (sin lifespan) la métrica se descarta sin error."""
+        from app.middleware import metrics
+        from app.models.metric import ApiMetric
+
+        monkeypatch.setattr(metrics, "metrics_engine", engine)
+        self._store(metrics.MetricsMiddleware(app=None), 1)
+
+        assert session.exec(select(ApiMetric)).all() == []
+
+
+class TestMetricPartitions:
+    """Las particiones son solo PostgreSQL: en SQLite los helpers no hacen nada."""
+
+    def test_partition_helpers_noop_on_sqlite(self, session):
+        from datetime import datetime
+        from app.services.metrics_service import metrics_service
+
+        assert metrics_service.ensure_partitions(session) == []
+        assert metrics_service.drop_partitions_before(session, datetime.utcnow()) == []
+
+    def test_add_months(self):
+        from datetime import date
+        from app.services.metrics_service import MetricsService
+
+        assert MetricsService._add_months(date(2025, 11, 1), 2) == date(2026, 1, 1)
+        assert MetricsService._add_months(date(2025, 1, 1), -1) == date(2024, 12, 1)
+
+    def test_maintenance_task_applies_retention(self, engine, monkeypatch):
+        """El cron diario crea particiones y borra las que terminan antes de mes actual - retención."""
+        import asyncio
+        from datetime import date, datetime
+        from app.config import settings
+        from app.workers import metrics_tasks
+
+        class FixedDate(date):
+            @classmethod
+            def today(cls):
+                return cls(2026, 2, 14)
+
+        calls = {}
+        monkeypatch.setattr(metrics_tasks, "metrics_engine", engine)
+        monkeypatch.setattr(metrics_tasks, "date", FixedDate)
+        monkeypatch.setattr(settings, "METRICS_RETENTION_MONTHS", 3)
+        monkeypatch.setattr(metrics_tasks.metrics_service, "ensure_partitions",
+                            lambda session: ["api_metrics_y2026m02"])
+        monkeypatch.setattr(metrics_tasks.metrics_service, "drop_partitions_before",
+                            lambda session, before: calls.setdefault("before", before) and [])
+
+        result = asyncio.run(metrics_tasks.maintain_metrics_partitions({}))
+
+        assert calls["before"] == datetime(2025, 11, 1)
+        assert result == {"partitions": ["api_metrics_y2026m02"], "dropped": []}
+
+        monkeypatch.setattr(settings, "METRICS_RETENTION_MONTHS", 0)
+        calls.clear()
+        asyncio.run(metrics_tasks.maintain_metrics_partitions({}))
+        assert calls == {}
+
+
+class TestMetricsDatabase:
+    def test_metrics_share_main_database_by_default(self):
+        """Sin METRICS_DATABASE_URL las métricas usan el engine y la sesión principales."""
+        from app.database import engine, get_session, metrics_engine, get_metrics_session
+
+        assert metrics_engine is engine
+        assert get_metrics_session is get_session
+
+
+class TestAnalyticsRoutes:
+    def test_analytics_routes_use_orjson(self):
+        """Todas las rutas /analytics serializan con ORJSONResponse."""
+        from fastapi.responses import ORJSONResponse
+        from app.routes.metrics import router
+
+        assert router.routes
+        for route in router.routes:
+            assert route.response_class is ORJSONResponse, route.path
+
+
+class TestAnalyticsCache:
+    class DictRedis:
+        def __init__(self):
+            self.data = {}
+
+        def get(self, key):
+            return self.data.get(key)
+
+        def setex(self, key, ttl, value):
+            self.data[key] = value
+
+    def test_aggregates_served_from_cache(self, session, monkeypatch):
+        """Con Redis, la segunda llamada no vuelve a consultar la BD."""
+        from app.models.metric import ApiMetric, MetricsSummary
+        from app.services.cache_service import cache_service
+        from app.services.metrics_service import metrics_service
+
+        monkeypatch.setattr(cache_service, "enabled", True)
+        monkeypatch.setattr(cache_service, "client", self.DictRedis())
+
+        for status_code in (200, 500):
+            session.add(ApiMetric(method="GET", path="/x", status_code=status_code, duration_ms=10.0))
+        session.commit()
+
+        summary = metrics_service.get_summary(session, hours=24)
+        endpoints = metrics_service.get_endpoint_stats(session, hours=24)
+
+        executed = []
+        monkeypatch.setattr(session, "exec", lambda *a, **kw: executed.append(a))
+
+        assert metrics_service.get_summary(session, hours=24) == summary
+        assert isinstance(metrics_service.get_summary(session, hours=24), MetricsSummary)
+        assert metrics_service.get_endpoint_stats(session, hours=24) == endpoints
+        assert executed == []
+
+
+class TestSummaryPercentiles:
+    def test_percentiles_interpolated_without_loading_rows(self, session):
+        """p50/p95/p99 con interpolación lineal, igual que percentile_cont."""
+        from app.models.metric import ApiMetric
+        from app.services.metrics_service import metrics_service
+
+        for i in range(1, 11):
+            session.add(ApiMetric(method="GET", path="/p", status_code=200 if i < 10 else 500,
+                                  duration_ms=float(i * 10)))
+        session.commit()
+
+        summary = metrics_service.get_summary(session, hours=24)
+
+        assert (summary.total_requests, summary.successful_requests, summary.failed_requests) == (10, 9, 1)
+        assert summary.p50_duration_ms == 55.0
+        assert summary.p95_duration_ms == 95.5
+        assert summary.p99_duration_ms == 99.1
+
+
+class TestMetricsRollup:
+    def _seed(self, session):
+        from datetime import datetime, timedelta
+        from app.models.metric import ApiMetric
+
+        now = datetime.utcnow()
+        for minutes_ago in range(1, 120, 7):
+            for status_code, duration in ((200, 10.0), (500, 30.0)):
+                session.add(ApiMetric(
+                    method="GET", path="/a", status_code=status_code, duration_ms=duration,
+                    timestamp=now - timedelta(minutes=minutes_ago),
+                ))
+            session.add(ApiMetric(
+                method="POST", path="/b", status_code=201, duration_ms=5.0,
+                timestamp=now - timedelta(minutes=minutes_ago),
+            ))
+        session.commit()
+
+    def test_rollup_writes_complete_buckets_once(self, session):
+        from sqlmodel import select, func
+        from app.models.metric import ApiMetric, ApiMetricBucket
+        from app.services.metrics_service import metrics_service
+
+        self._seed(session)
+
+        assert metrics_service.rollup_buckets(session) > 0
+        assert metrics_service.rollup_buckets(session) == 0  # nada nuevo que cerrar
+
+        buckets = session.exec(select(ApiMetricBucket)).all()
+        assert all(b.bucket.minute % 5 == 0 and b.bucket.second == 0 for b in buckets)
+        rolled_until = metrics_service._rolled_until(session)
+        raw_total = session.exec(
+            select(func.count(ApiMetric.id)).where(ApiMetric.timestamp < rolled_until)
+        ).one()
+        assert sum(b.count for b in buckets) == raw_total
+
+    def test_endpoint_stats_same_with_rollup(self, session):
+        from app.services.metrics_service import metrics_service
+
+        self._seed(session)
+        before = metrics_service.get_endpoint_stats(session, hours=1)
+        slowest_before = metrics_service.get_slowest_endpoints(session, hours=24)
+
+        metrics_service.rollup_buckets(session)
+
+        assert metrics_service.get_endpoint_stats(session, hours=1) == before
+        assert metrics_service.get_slowest_endpoints(session, hours=24) == slowest_before
+        assert before[0].endpoint == "/a" and before[0].error_rate == 50.0
+
+    def test_summary_percentiles_from_sketches(self, session):
+        import pytest
+        from app.services.metrics_service import metrics_service
+
+        self._seed(session)
+        exact = metrics_service.get_summary(session, hours=24)
+
+        metrics_service.rollup_buckets(session)
+
+        assert metrics_service._sketch_percentiles(session, hours=24) is not None
+        approx = metrics_service.get_summary(session, hours=24)
+        assert approx.total_requests == exact.total_requests
+        for name in ("p50_duration_ms", "p95_duration_ms", "p99_duration_ms"):
+            assert getattr(approx, name) == pytest.approx(getattr(exact, name), rel=0.01)
+
+
+class TestDurationSketch:
+    def test_quantiles_within_relative_accuracy(self):
+        import pytest
+        from app.utils.duration_sketch import DurationSketch
+
+        sketch = DurationSketch()
+        sketch.update(range(1, 1001))
+
+        assert sketch.quantile(0.5) == pytest.approx(500.5, rel=0.01)
+        assert sketch.quantile(0.99) == pytest.approx(990.01, rel=0.01)
+
+    def test_merge_matches_single_sketch(self):
+        from app.utils.duration_sketch import DurationSketch
+
+        whole, left, right = DurationSketch(), DurationSketch(), DurationSketch()
+        whole.update([0.0, 1.5, 20.0, 300.0, 4000.0])
+        left.update([0.0, 1.5])
+        right.update([20.0, 300.0, 4000.0])
+
+        merged = DurationSketch.from_dict(left.to_dict())
+        merged.merge(DurationSketch.from_dict(right.to_dict()))
+
+        assert merged.count == 5
+        assert [merged.quantile(q) for q in (0, 0.5, 1)] == [whole.quantile(q) for q in (0, 0.5, 1)]
@@ -25,6 +25,62 @@ class TestRateLimitMiddleware:
         # Path sin límite específico
         assert middleware._get_limit_for_path("/api/some-endpoint") is None
 
+    def test_path_limit_cache(self):
+        """_get_limit_for_path() cachea resultados y prioriza el prefijo más largo."""
+        from app.middleware.rate_limit import RateLimitMiddleware
+
+        middleware = RateLimitMiddleware(object(), default_limit=100, default_window=60)
+
+        # Prefijo más específico gana sobre "/tasks/"
+        assert middleware._get_limit_for_path("/tasks/email/bulk/retry") == (5, 3600)
+        assert middleware._limit_cache["/tasks/email/bulk/retry"] == (5, 3600)
+
+        # Los misses también se cachean
+        assert middleware._get_limit_for_path("/api/x") is None
+        assert "/api/x" in middleware._limit_cache
+
+    def test_client_ip_ignores_forwarded_for_by_default(self, monkeypatch):
+        """X-Forwarded-For solo se usa con TRUST_PROXY_HEADERS=True."""
+        from starlette.requests import Request
+        from app.config import settings
+        from app.middleware.rate_limit import RateLimitMiddleware
+
+        middleware = RateLimitMiddleware(object())
+        request = Request({
+            "type": "http",
+            "headers": [(b"x-forwarded-for", b"203.0.113.7, 10.0.0.1")],
+            "client": ("10.0.0.1", 1234),
+        })
+
+        monkeypatch.setattr(settings, "TRUST_PROXY_HEADERS", False)
+        assert middleware._get_client_ip(request) == "10.0.0.1"
+
+        monkeypatch.setattr(settings, "TRUST_PROXY_HEADERS", True)
+        assert middleware._get_client_ip(request) == "203.0.113.7"
+
+    def test_429_body_cached(self):
+        """El body 429 reutiliza el prefijo serializado por (limit, window)."""
+        import json
+        from app.middleware.rate_limit import RateLimitMiddleware
+
+        middleware = RateLimitMiddleware(object())
+        info = {"limit": 5, "current_usage": 6, "retry_after": 300, "reset_at": 1700000000}
+
+        body = json.loads(middleware._429_body(5, 300, info))
+        assert body == {
+            "error": "Rate limit exceeded",
+            "message": "Too many requests. Limit: 5 requests per 300 seconds",
+            "limit": 5,
+            "current_usage": 6,
+            "retry_after": 300,
+            "reset_at": 1700000000,
+        }
+        assert list(middleware._429_cache) == [(5, 300)]
+
+        info["current_usage"] = 7
+        assert json.loads(middleware._429_body(5, 300, info))["current_usage"] == 7
+        assert len(middleware._429_cache) == 1
+
     def test_get_plan_rate_limit(self, session):
         """get_plan_rate_limit() retorna el límite correcto por plan."""
         from app.core.plan_guards import get_plan_rate_limit
@@ -67,3 +123,160 @@ class TestRateLimitMiddleware:
 
         limit = get_plan_rate_limit(session, org.id)
         assert limit is None
+
+
+class TestRateLimiterScript:
+    """Tests del RateLimiter con el script Lua (Redis simulado con mocks)."""
+
+    def _limiter(self, reply):
+        from unittest.mock import AsyncMock, MagicMock
+        from app.services.rate_limiter import RateLimiter, SLIDING_COUNTER_LUA
+
+        script = AsyncMock(return_value=reply)
+        redis = MagicMock()
+        redis.register_script.return_value = script
+
+        limiter = RateLimiter(redis=redis)
+        limiter.enabled = True
+        return limiter, redis, script, SLIDING_COUNTER_LUA
+
+    def _freeze(self, monkeypatch, now):
+        from app.services import rate_limiter as module
+
+        monkeypatch.setattr(module.time, "time", lambda: now)
+
+    def test_single_script_call(self, monkeypatch):
+        """check_rate_limit() hace un solo EVALSHA y arma el info en Python."""
+        import asyncio
+
+        self._freeze(monkeypatch, 6015.0)  # 15s dentro de la ventana 100 (de 60s)
+        limiter, redis, script, lua = self._limiter([1, 3, 0])
+        allowed, info = asyncio.run(limiter.check_rate_limit("ip:1.2.3.4", limit=5, window=60))
+
+        redis.register_script.assert_any_call(lua)
+        script.assert_awaited_once()
+        assert script.await_args.kwargs["keys"] == [
+            "rate_limit:{ip:1.2.3.4}:60:100", "rate_limit:{ip:1.2.3.4}:60:99"
+        ]
+        assert script.await_args.kwargs["args"] == [5, 0.75, 120_000]
+        assert redis.pipeline.call_count == 0
+        assert allowed is True
+        assert info["remaining"] == 1
+        assert info["current_usage"] == 4
+        assert info["reset_at"] == 6060
+
+    def test_previous_window_is_weighted(self, monkeypatch):
+        """
+        Estimado = anterior * peso + actual; retry_after es cuando el peso
+        de la ventana anterior baja lo suficiente.
+        """
+        import asyncio
+
+        self._freeze(monkeypatch, 6015.0)
+        limiter, _, _, _ = self._limiter([0, 1, 8])  # 8 * 0.75 + 1 = 7 >= 5
+        allowed, info = asyncio.run(limiter.check_rate_limit("ip:1.2.3.4", limit=5, window=60))
+
+        assert allowed is False
+        assert info["remaining"] == 0
+        assert info["current_usage"] == 7
+        # 8 * peso + 1 < 5  =>  peso < 0.5  =>  30s dentro de la ventana (faltan 15)
+        assert info["retry_after"] == 15
+
+    def test_exceeded(self, monkeypatch):
+        """Ventana actual llena: hay que esperar a la siguiente ventana."""
+        import asyncio
+
+        self._freeze(monkeypatch, 6015.0)
+        limiter, _, _, _ = self._limiter([0, 5, 0])
+        allowed, info = asyncio.run(limiter.check_rate_limit("ip:1.2.3.4", limit=5, window=60))
+
+        assert allowed is False
+        assert info["remaining"] == 0
+        assert info["retry_after"] == 45
+
+    def test_token_bucket(self, monkeypatch):
+        """El bucket se consulta con un EVALSHA; tokens llegan como string."""
+        import asyncio
+        from app.services.rate_limiter import TOKEN_BUCKET_LUA
+
+        self._freeze(monkeypatch, 1000.0)
+        limiter, redis, script, _ = self._limiter([1, "3.5"])
+        allowed, info = asyncio.run(limiter.check_token_bucket("ip:1.2.3.4", capacity=5, refill_per_sec=0.5))
+
+        redis.register_script.assert_any_call(TOKEN_BUCKET_LUA)
+        assert script.await_args.kwargs["keys"] == ["token_bucket:{ip:1.2.3.4}"]
+        assert script.await_args.kwargs["args"] == [5, 0.5, 1000.0, 10_000]
+        assert allowed is True
+        assert info["remaining"] == 3
+        assert info["reset_at"] == 1003  # 1.5 tokens a 0.5/s
+
+    def test_token_bucket_empty(self, monkeypatch):
+        """Sin tokens: retry_after es lo que falta para recargar uno."""
+        import asyncio
+
+        self._freeze(monkeypatch, 1000.0)
+        limiter, _, _, _ = self._limiter([0, "0.25"])
+        allowed, info = asyncio.run(limiter.check_token_bucket("ip:1.2.3.4", capacity=5, refill_per_sec=0.5))
+
+        assert allowed is False
+        assert info["remaining"] == 0
+        assert info["retry_after"] == 2  # 0.75 tokens a 0.5/s = 1.5s
+
+
+class TestRequestHelpers:
+    """Helpers que leen directo de request.scope."""
+
+    def test_get_header_reads_raw_scope(self):
+        from starlette.requests import Request
+        from app.utils.request import get_header
+
+        request = Request({
+            "type": "http",
+            "headers": [(b"user-agent", b"pytest"), (b"authorization", b"Bearer x")],
+        })
+        assert get_header(request, b"user-agent") == "pytest"
+        assert get_header(request, b"authorization") == "Bearer x"
+        assert get_header(request, b"x-missing") is None
+
+
+
+class TestRateLimitDecorator:
+    """@rate_limit no vuelve a contar una key que ya contó el middleware."""
+
+    def test_decorator_skips_key_counted_by_middleware(self, monkeypatch):
+        import asyncio
+        from types import SimpleNamespace
+        from starlette.requests import Request
+        from app.utils import rate_limit_decorator
+
+        checks = []
+
+        async def check_rate_limit(key, limit, window):
+            checks.append(key)
+            return True, {"limit": limit, "remaining": limit - 1, "reset_at": 0}
+
+        monkeypatch.setattr(
+            rate_limit_decorator, "rate_limiter", SimpleNamespace(check_rate_limit=check_rate_limit)
+        )
+
+        @rate_limit_decorator.rate_limit(limit=5, window=60)
+        async def endpoint(request: Request):
+            return "ok"
+
+        request = Request({
+            "type": "http", "path": "/tasks/email/bulk", "headers": [],
+            "client": ("10.0.0.1", 1234), "query_string": b"", "state": {},
+        })
+        request.state.rate_limit_check = ("ip:10.0.0.1:/tasks/email/bulk", 5, 60)
+
+        assert asyncio.run(endpoint(request)) == "ok"
+        assert checks == []
+
+        request.state.rate_limit_check = None
+        assert asyncio.run(endpoint(request)) == "ok"
+        assert checks == ["ip:10.0.0.1:/tasks/email/bulk"]
+
+        # Misma key pero el middleware usó un límite más laxo: el decorador cuenta
+        request.state.rate_limit_check = ("ip:10.0.0.1:/tasks/email/bulk", 50, 60)
+        assert asyncio.run(endpoint(request)) == "ok"
+        assert checks == ["ip:10.0.0.1:/tasks/email/bulk"] * 2
@@ -172,3 +172,212 @@ class TestRateLimitingAuth:
         assert limit is not None
         assert limit[0] == 3  # 3 requests
         assert limit[1] == 3600  # por hora
+
+
+class TestPasswordVerifyCache:
+    """Cache en memoria de verify_password."""
+
+    def test_cached_result_skips_kdf(self, monkeypatch):
+        from app.core import security
+
+        security.clear_password_cache()
+        hashed = security.get_password_hash("Secret123!")
+        calls = []
+        original = security._checkpw
+
+        def counting_verify(plain, hashed_pw):
+            calls.append(plain)
+            return original(plain, hashed_pw)
+
+        monkeypatch.setattr(security, "_checkpw", counting_verify)
+        assert security.verify_password("Secret123!", hashed)
+        assert security.verify_password("Secret123!", hashed)
+        assert len(calls) == 1
+
+    def test_wrong_password_not_confused_with_cached_hit(self):
+        from app.core import security
+
+        security.clear_password_cache()
+        hashed = security.get_password_hash("Secret123!")
+        assert security.verify_password("Secret123!", hashed)
+        assert not security.verify_password("Other123!", hashed)
+
+    def test_argon2_hash_format(self):
+        from app.core import security
+
+        hashed = security.get_password_hash("Secret123!")
+        assert hashed.startswith("$argon2id$")
+        assert not security.password_needs_rehash(hashed)
+        assert not security.verify_password("Secret123!", "not-a-hash")
+
+    def test_legacy_bcrypt_hash_verifies_and_needs_rehash(self):
+        import bcrypt
+        from app.core import security
+
+        legacy = bcrypt.hashpw(b"Secret123!", bcrypt.gensalt(rounds=4)).decode()
+        assert security.verify_password("Secret123!", legacy)
+        assert security.password_needs_rehash(legacy)
+
+
+class TestJWT:
+    """Tokens JWT (PyJWT)."""
+
+    def test_access_token_roundtrip(self):
+        from app.core.security import create_access_token, verify_token
+
+        token = create_access_token({"sub": "jwt@example.com"})
+        assert verify_token(token) == "jwt@example.com"
+
+    def test_token_without_exp_rejected(self):
+        import jwt
+        from app.config import settings
+        from app.core.security import ALGORITHM, verify_token
+
+        token = jwt.encode({"sub": "jwt@example.com"}, settings.SECRET_KEY, algorithm=ALGORITHM)
+        assert verify_token(token) is None
+
+    def test_tampered_token_rejected(self):
+        from app.core.security import create_access_token, verify_token
+
+        token = create_access_token({"sub": "jwt@example.com"})
+        assert verify_token(token[:-2] + ("AA" if not token.endswith("AA") else "BB")) is None
+
+    def test_fast_mint_matches_pyjwt(self):
+        import jwt
+        from datetime import datetime, timedelta
+        from app.config import settings
+        from app.core.security import ALGORITHM, _mint
+
+        payload = {"sub": "jwt@example.com", "exp": datetime.utcnow() + timedelta(minutes=5)}
+        assert _mint(payload) == jwt.encode(payload, settings.SECRET_KEY, algorithm=ALGORITHM)
+
+    def test_secret_rotation_rekeys_signer(self, monkeypatch):
+        """Cambiar SECRET_KEY invalida el HMAC precalculado."""
+        from app.config import settings
+        from app.core.security import create_access_token, verify_token
+
+        token = create_access_token({"sub": "jwt@example.com"})
+        monkeypatch.setattr(settings, "SECRET_KEY", settings.SECRET_KEY + "-rotated")
+        assert verify_token(token) is None
+        assert verify_token(create_access_token({"sub": "jwt@example.com"})) == "jwt@example.com"
+
+    def test_expired_token_rejected(self):
+        from datetime import timedelta
+        from app.core.security import create_access_token, verify_token
+
+        token = create_access_token({"sub": "jwt@example.com"}, expires_delta=timedelta(seconds=-5))
+        assert verify_token(token) is None
+
+    def test_purpose_token_checks_purpose(self):
+        from app.core.security import create_password_reset_token, verify_purpose_token
+
+        token = create_password_reset_token("jwt@example.com")
+        assert verify_purpose_token(token, "reset") == "jwt@example.com"
+        assert verify_purpose_token(token, "verify") is None
+
+
+class TestAsyncPasswordHashing:
+    """Hash/verify en el pool dedicado (fuera del event loop)."""
+
+    def test_hash_and_verify_async(self):
+        import asyncio
+        from app.core.security import (
+            hash_password_async, verify_password_async, clear_password_cache,
+        )
+
+        async def run():
+            hashed = await hash_password_async("s3cret-pass")
+            clear_password_cache()
+            return (
+                hashed,
+                await verify_password_async("s3cret-pass", hashed),
+                await verify_password_async("wrong-pass", hashed),
+            )
+
+        hashed, ok, bad = asyncio.run(run())
+        assert hashed.startswith("$argon2id$")
+        assert ok is True
+        assert bad is False
+
+    def test_verify_async_cache_hit_skips_pool(self, monkeypatch):
+        import asyncio
+        from app.core import security
+
+        hashed = security.get_password_hash("cached-pass")
+        assert security.verify_password("cached-pass", hashed) is True
+
+        def fail(*args, **kwargs):
+            raise AssertionError("cache hit should not reach the pool")
+
+        monkeypatch.setattr(security._hash_pool, "submit", fail)
+        assert asyncio.run(security.verify_password_async("cached-pass", hashed)) is True
+
+
+class TestDynamicCORS:
+    """CORS con origins dinámicos (copia local por worker + invalidación pub/sub)."""
+
+    def _client(self, state):
+        from starlette.applications import Starlette
+        from starlette.responses import PlainTextResponse
+        from starlette.routing import Route
+        from starlette.testclient import TestClient
+        from app.middleware.cors import DynamicCORSMiddleware
+
+        app = Starlette(routes=[Route("/", lambda request: PlainTextResponse("ok"))])
+        app.add_middleware(
+            DynamicCORSMiddleware,
+            cached_origins=lambda: state["cached"],
+            load_origins=lambda: state["loaded"],
+            allow_methods=["*"],
+        )
+        return TestClient(app)
+
+    def test_origins_follow_service(self):
+        state = {"cached": None, "loaded": ["https://a.example"]}
+        client = self._client(state)
+
+        response = client.get("/", headers={"Origin": "https://a.example"})
+        assert response.headers["access-control-allow-origin"] == "https://a.example"
+        assert "access-control-allow-origin" not in client.get(
+            "/", headers={"Origin": "https://b.example"}
+        ).headers
+
+        # Otro worker agregó un origin: la copia local ya lo tiene
+        state["cached"] = ["https://a.example", "https://b.example"]
+        response = client.get("/", headers={"Origin": "https://b.example"})
+        assert response.headers["access-control-allow-origin"] == "https://b.example"
+
+        state["cached"] = ["*"]
+        response = client.get("/", headers={"Origin": "https://c.example"})
+        assert response.headers["access-control-allow-origin"] == "*"
+
+    def test_load_origins_keeps_local_copy(self, monkeypatch):
+        from app.services.cors_service import cors_service
+
+        calls = []
+        monkeypatch.setattr(
+            cors_service, "get_active_origins",
+            lambda session: calls.append(1) or ["https://a.example"],
+        )
+        cors_service.clear_local_cache()
+
+        assert cors_service.load_origins() == ["https://a.example"]
+        assert cors_service.load_origins() == ["https://a.example"]
+        assert len(calls) == 1
+        cors_service.clear_local_cache()
+
+    def test_invalidate_publishes_to_other_workers(self, monkeypatch):
+        from unittest.mock import MagicMock
+        from app.services.cache_service import cache_service
+        from app.services.cors_service import cors_service
+
+        client = MagicMock()
+        monkeypatch.setattr(cache_service, "enabled", True)
+        monkeypatch.setattr(cache_service, "client", client)
+        cors_service._local = (["https://a.example"], float("inf"))
+
+        cors_service.invalidate_cache()
+
+        assert cors_service.cached_origins() is None
+        client.delete.assert_called_once_with(cors_service.CACHE_KEY)
+        client.publish.assert_called_once_with(cors_service.INVALIDATE_CHANNEL, "1")
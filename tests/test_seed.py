@@ -0,0 +1,50 @@
+"""Tests del seed RBAC (idempotencia y asignaciones)."""
+from sqlmodel import select
+
+from app.core.seed import seed_permissions, seed_roles
+from app.models.role import Permission, Role, RolePermission
+
+
+class TestSeedRBAC:
+    def test_seed_permissions_creates_all(self, session):
+        permissions_map = seed_permissions(session)
+        session.commit()
+
+        assert "manage:all" in permissions_map
+        assert all(p.id is not None for p in permissions_map.values())
+        assert len(session.exec(select(Permission)).all()) == len(permissions_map)
+
+    def test_seed_is_idempotent(self, session):
+        first = seed_permissions(session)
+        seed_roles(session, first)
+        session.commit()
+
+        second = seed_permissions(session)
+        seed_roles(session, second)
+        session.commit()
+
+        assert {n: p.id for n, p in first.items()} == {n: p.id for n, p in second.items()}
+        assert len(session.exec(select(Role)).all()) == 5
+
+    def test_seed_roles_assigns_permissions(self, session):
+        permissions_map = seed_permissions(session)
+        roles_map = seed_roles(session, permissions_map)
+        session.commit()
+
+        admin = roles_map["admin"]
+        assigned = set(session.exec(
+            select(Permission.name)
+            .join(RolePermission)
+            .where(RolePermission.role_id == admin.id)
+        ).all())
+        assert assigned == {"manage:users", "manage:roles", "manage:permissions", "manage:media"}
+
+    def test_seed_data_is_immutable_and_consistent(self):
+        from app.core.seed import PERMISSIONS_DATA, ROLES_DATA
+
+        permission_names = {name for name, _, _, _ in PERMISSIONS_DATA}
+        assert isinstance(PERMISSIONS_DATA, tuple)
+        assert isinstance(ROLES_DATA, tuple)
+        for _, _, _, role_permissions in ROLES_DATA:
+            assert isinstance(role_permissions, tuple)
+            assert set(role_permissions) <= permission_names
@@ -0,0 +1,134 @@
+"""Tests del WebhookService (unit tests, sin tablas de webhooks)."""
+import hashlib
+import hmac
+import json
+
+
+class TestWebhookSignature:
+    PAYLOAD = {"event_type": "user.created", "data": {"id": 1, "email": "a@b.c"}}
+
+    def test_signature_matches_documented_recipe(self):
+        """La firma sigue siendo HMAC-SHA256 sobre el JSON con sort_keys (docs/WEBHOOKS.md)."""
+        from app.services.webhook_service import webhook_service
+
+        expected = hmac.new(
+            b"s3cret",
+            json.dumps(self.PAYLOAD, sort_keys=True).encode("utf-8"),
+            hashlib.sha256,
+        ).hexdigest()
+
+        assert webhook_service._generate_signature(self.PAYLOAD, "s3cret") == f"sha256={expected}"
+
+    def test_verify_signature(self):
+        from app.services.webhook_service import webhook_service
+
+        signature = webhook_service._generate_signature(self.PAYLOAD, "s3cret")
+        assert webhook_service.verify_signature(self.PAYLOAD, signature, "s3cret")
+        assert not webhook_service.verify_signature(self.PAYLOAD, signature, "rotated")
+
+
+class TestTriggerEvent:
+    def test_payload_serialized_once_for_all_subscriptions(self, monkeypatch):
+        """El payload se serializa una vez (JSON-safe) y se comparte entre subscriptions."""
+        import asyncio
+        from unittest.mock import AsyncMock, MagicMock
+        from app.services.queue_service import queue_service
+        from app.services.webhook_service import webhook_service
+
+        subs = [
+            MagicMock(id=1, filters=None, events=["user.created"]),
+            MagicMock(id=2, filters=None, events=["user.created", "task.failed"]),
+        ]
+        db = MagicMock()
+        db.query.return_value.filter.return_value.all.return_value = subs
+        enqueue = AsyncMock(return_value="job")
+        monkeypatch.setattr(queue_service, "enqueue_webhook_delivery", enqueue)
+
+        triggered = asyncio.run(webhook_service.trigger_event(db, "user.created", {"id": 1}))
+
+        assert triggered == 2
+        payloads = [call.kwargs["payload"] for call in enqueue.await_args_list]
+        assert payloads[0] is payloads[1]
+        assert isinstance(payloads[0]["timestamp"], str)
+        json.dumps(payloads[0])  # firmable sin conversiones extra
+
+    def test_subscriptions_for_event_on_sqlite(self):
+        """Sin JSONB (SQLite) el match por evento se resuelve en Python."""
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import Session
+        from app.models.webhook import WebhookSubscription
+        from app.services.webhook_service import webhook_service
+
+        engine = create_engine("sqlite://")
+        WebhookSubscription.__table__.create(engine)
+        with Session(engine) as db:
+            db.add_all([
+                WebhookSubscription(name="a", url="http://a", secret="s", events=["user.created"]),
+                WebhookSubscription(name="b", url="http://b", secret="s", events=["task.failed"]),
+                WebhookSubscription(name="c", url="http://c", secret="s", events=["user.created"], active=False),
+            ])
+            db.commit()
+
+            subs = webhook_service._subscriptions_for_event(db, "user.created")
+            assert [s.name for s in subs] == ["a"]
+
+
+class TestDeliverWebhook:
+    def _deliver(self, monkeypatch, payload):
+        import asyncio
+        from unittest.mock import AsyncMock, MagicMock
+        from app.services.webhook_service import webhook_service
+
+        subscription = MagicMock(
+            id=1, url="http://hook", secret="s3cret", headers=None, timeout=5,
+            max_retries=3, successful_deliveries=0, total_deliveries=0,
+        )
+        client = MagicMock()
+        client.post = AsyncMock(return_value=MagicMock(status_code=200, text="ok", headers={}))
+        monkeypatch.setattr(webhook_service, "get_subscription", lambda db, sid: subscription)
+        monkeypatch.setattr(webhook_service, "get_http_client", AsyncMock(return_value=client))
+
+        delivery = asyncio.run(webhook_service.deliver_webhook(MagicMock(), 1, "user.created", payload))
+        assert delivery.success is True
+        return client.post.await_args.kwargs
+
+    def test_body_is_the_signed_bytes(self, monkeypatch):
+        """El body enviado son los mismos bytes que se firmaron."""
+        from app.services.webhook_service import webhook_service
+
+        payload = {"b": 1, "a": "ñ"}
+        sent = self._deliver(monkeypatch, payload)
+
+        assert sent["content"] == json.dumps(payload, sort_keys=True).encode("utf-8")
+        assert sent["headers"]["X-Webhook-Signature"] == webhook_service._generate_signature(payload, "s3cret")
+        assert "Content-Encoding" not in sent["headers"]
+
+    def test_large_body_is_gzipped(self, monkeypatch):
+        """Sobre WEBHOOK_GZIP_MIN_BYTES se comprime; la firma es del body sin comprimir."""
+        import gzip
+        from app.config import settings
+        from app.services.webhook_service import webhook_service
+
+        monkeypatch.setattr(settings, "WEBHOOK_GZIP_MIN_BYTES", 1024)
+        payload = {"data": "x" * 4096}
+        sent = self._deliver(monkeypatch, payload)
+
+        assert sent["headers"]["Content-Encoding"] == "gzip"
+        assert len(sent["content"]) < 1024
+        raw = gzip.decompress(sent["content"])
+        assert webhook_service.verify_signature(json.loads(raw), sent["headers"]["X-Webhook-Signature"], "s3cret")
+
+
+class TestEventTypes:
+    def test_events_body_built_once(self):
+        """/webhooks/events devuelve los bytes precomputados, uno por cada evento del enum."""
+        import asyncio
+        from app.models.webhook import WebhookEventType
+        from app.routes.webhooks import _EVENTS_JSON, list_event_types
+
+        response = asyncio.run(list_event_types())
+
+        assert response.body == _EVENTS_JSON
+        events = json.loads(response.body)["events"]
+        assert [e["type"] for e in events] == [e.value for e in WebhookEventType]
+        assert events[0]["description"] != "No description available"
@@ -44,3 +44,29 @@ class TestWebSocketStats:
         assert response.status_code == 200
         stats = response.json()
         assert "channels" in stats or "total_connections" in stats
+
+
+class TestBroadcastSerialization:
+    def test_broadcast_serializes_once(self, monkeypatch):
+        """El mensaje se serializa una sola vez y sale como frame de texto a cada cliente."""
+        import asyncio
+        import json
+        from unittest.mock import AsyncMock
+        from app.services.websocket import manager as manager_module
+        from app.services.websocket.manager import ConnectionManager
+
+        dumps = []
+        real_dumps = manager_module._dumps
+        monkeypatch.setattr(manager_module, "_dumps", lambda m: dumps.append(m) or real_dumps(m))
+
+        manager = ConnectionManager()
+        clients = {f"c{i}": AsyncMock() for i in range(3)}
+        manager.active_connections["users"] = dict(clients)
+
+        asyncio.run(manager.broadcast_to_channel("users", {"type": "created", "data": {"id": 1}}))
+
+        assert len(dumps) == 1
+        for ws in clients.values():
+            sent = json.loads(ws.send_text.await_args.args[0])
+            assert sent["data"] == {"id": 1}
+            assert sent["channel"] == "users"